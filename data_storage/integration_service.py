@@ -5,6 +5,7 @@ Provides the complete end-to-end automation pipeline.
 
 import logging
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from pathlib import Path
@@ -19,6 +20,10 @@ from pdf_parser.pdf_service import PDFService
 
 logger = logging.getLogger(__name__)
 
+# Runs the independent get_system_status probes side by side: credential validation can
+# wait on the network while the PDF statistics and database counts read SQLite
+_status_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='status')
+
 
 class IntegrationService:
     """
@@ -462,20 +467,12 @@ class IntegrationService:
             logger.error(f"Error getting sync history: {e}")
             return []
     
-    def get_system_status(self) -> Dict:
-        """Get comprehensive system status."""
+    def _database_counts(self) -> Dict:
+        """Count the stored invoices, tracked emails and processed PDFs."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
         try:
-            # Get component statuses
-            email_status = self.email_service.get_service_status()
-            pdf_stats = self.pdf_service.get_processing_statistics()
-            
-            # Get recent sync history
-            recent_syncs = self.get_sync_history(5)
-            
-            # Get database statistics
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             cursor.execute("SELECT COUNT(*) FROM invoices")
             total_invoices = cursor.fetchone()[0]
             
@@ -484,17 +481,37 @@ class IntegrationService:
             
             cursor.execute("SELECT COUNT(*) FROM pdf_processing")
             total_pdfs_processed = cursor.fetchone()[0]
-            
+        finally:
             conn.close()
+        
+        return {
+            'total_invoices': total_invoices,
+            'total_emails_tracked': total_emails_tracked,
+            'total_pdfs_processed': total_pdfs_processed
+        }
+    
+    def get_system_status(self) -> Dict:
+        """Get comprehensive system status."""
+        try:
+            # The component probes are independent, so they run concurrently
+            email_future = _status_executor.submit(self.email_service.get_service_status)
+            pdf_future = _status_executor.submit(self.pdf_service.get_processing_statistics)
+            syncs_future = _status_executor.submit(self.get_sync_history, 5)
+            database_future = _status_executor.submit(self._database_counts)
+            
+            email_status = email_future.result()
+            pdf_stats = pdf_future.result()
+            
+            # Get recent sync history
+            recent_syncs = syncs_future.result()
+            
+            # Get database statistics
+            database_counts = database_future.result()
             
             return {
                 'email_service': email_status,
                 'pdf_processing': pdf_stats,
-                'database': {
-                    'total_invoices': total_invoices,
-                    'total_emails_tracked': total_emails_tracked,
-                    'total_pdfs_processed': total_pdfs_processed
-                },
+                'database': database_counts,
                 'recent_operations': recent_syncs,
                 'system_health': {
                     'database_accessible': True,
@@ -4,7 +4,9 @@ Handles Gmail and Outlook integration with provider-specific search logic.
 """
 
 import os
+import re
 import json
+import uuid
 import logging
 import base64
 import email
@@ -13,11 +15,50 @@ from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import sqlite3
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from .auth_adapter import AuthAdapter
 from .storage_adapter import StorageAdapter
 
 logger = logging.getLogger(__name__)
 
+# Gmail HTTP batch endpoint; Google allows 100 calls per batch but recommends
+# staying at or below 50 to avoid per-user rate limiting
+GMAIL_BATCH_URL = "https://gmail.googleapis.com/batch/gmail/v1"
+GMAIL_BATCH_SIZE = 50
+
+# Gmail message list endpoint, and the query that fetches only a message's Subject header
+GMAIL_MESSAGES_URL = "https://gmail.googleapis.com/gmail/v1/users/me/messages"
+GMAIL_SUBJECT_QUERY = "?format=metadata&metadataHeaders=Subject"
+
+# Gmail calls share one keep-alive connection pool, so each search, message and attachment
+# request after the first skips the TCP and TLS handshakes. Timeouts are (connect, read)
+# seconds: connecting should be quick, while attachment downloads can take a while.
+GMAIL_POOL_CONNECTIONS = 4
+GMAIL_POOL_MAXSIZE = 10
+GMAIL_TIMEOUT = (5, 30)
+
+# Seconds between retries of a failed connection, doubling each time
+HTTP_RETRY_BACKOFF = 0.2
+
+
+def build_http_session(max_retries: int = 0) -> requests.Session:
+    """
+    Create a requests session with a pooled HTTPS adapter for Google APIs.
+    
+    Args:
+        max_retries: Times to retry a request whose connection failed. urllib3 leaves
+            POSTs that reached the server alone, so this is safe for token exchanges.
+    """
+    retries = Retry(total=max_retries, backoff_factor=HTTP_RETRY_BACKOFF) if max_retries else 0
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=GMAIL_POOL_CONNECTIONS,
+                                          pool_maxsize=GMAIL_POOL_MAXSIZE,
+                                          max_retries=retries))
+    return session
+
 
 class EmailService:
     """
@@ -33,13 +74,14 @@ class EmailService:
             'local_storage_path': './data/invoices'
         })
         self.db_path = "./data/invoices.db"
+        self.http = build_http_session()
         self._init_email_tracking()
     
     def _load_providers_config(self) -> Dict:
         """Load provider configuration."""
         try:
             providers_file = self.config_path / "providers.json"
-            with open(providers_file, 'r') as f:
+            with open(providers_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             logger.error(f"Failed to load providers config: {e}")
@@ -64,6 +106,11 @@ class EmailService:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # Processing history is listed newest first, overall or for one provider
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_email_tracking_processed_date '
+                         'ON email_tracking(processed_date)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_email_tracking_provider_processed '
+                         'ON email_tracking(provider_name, processed_date)')
             conn.commit()
             conn.close()
             logger.info("Email tracking table initialized")
@@ -154,8 +201,6 @@ class EmailService:
             raise Exception("Gmail credentials not available")
         
         try:
-            import requests
-            
             headers = {
                 'Authorization': f"Bearer {creds['access_token']}",
                 'Content-Type': 'application/json'
@@ -165,10 +210,9 @@ class EmailService:
             query = self._build_gmail_search_query(email_patterns, days_back)
             
             # Search for emails
-            search_url = "https://gmail.googleapis.com/gmail/v1/users/me/messages"
             params = {'q': query, 'maxResults': 50}
             
-            response = requests.get(search_url, headers=headers, params=params)
+            response = self.http.get(GMAIL_MESSAGES_URL, headers=headers, params=params, timeout=GMAIL_TIMEOUT)
             
             if response.status_code != 200:
                 raise Exception(f"Gmail search failed: {response.status_code} - {response.text}")
@@ -176,14 +220,26 @@ class EmailService:
             search_results = response.json()
             messages = search_results.get('messages', [])
             
+            # Skip already processed emails up front so they are never fetched
+            processed_ids = self._get_processed_email_ids([message['id'] for message in messages])
+            message_ids = [message['id'] for message in messages if message['id'] not in processed_ids]
+            if processed_ids:
+                logger.debug(f"Skipping {len(processed_ids)} already processed emails")
+            
             invoices = []
-            for message in messages:
-                try:
-                    invoice = self._process_gmail_message(message['id'], headers, provider_name)
-                    if invoice:
-                        invoices.append(invoice)
-                except Exception as e:
-                    logger.error(f"Failed to process Gmail message {message['id']}: {e}")
+            for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+                chunk = message_ids[start:start + GMAIL_BATCH_SIZE]
+                fetched = self._batch_get_gmail_messages(chunk, headers)
+                
+                for message_id in chunk:
+                    try:
+                        invoice = self._process_gmail_message(
+                            message_id, headers, provider_name, message_data=fetched.get(message_id)
+                        )
+                        if invoice:
+                            invoices.append(invoice)
+                    except Exception as e:
+                        logger.error(f"Failed to process Gmail message {message_id}: {e}")
             
             return invoices
             
@@ -223,20 +279,142 @@ class EmailService:
         
         return ' '.join(query_parts)
     
-    def _process_gmail_message(self, message_id: str, headers: Dict, provider_name: str) -> Optional[Dict]:
-        """Process a Gmail message and download PDF attachments."""
+    def preview_gmail_search(self, email_patterns: Dict, headers: Dict, days_back: int = 30,
+                             sample_size: int = 5) -> Dict:
+        """
+        Run a provider's Gmail search without processing or downloading anything.
+        
+        Args:
+            email_patterns: Provider email patterns, as used by the invoice fetch
+            headers: Authorization headers for the Gmail API
+            days_back: How far back the search reaches
+            sample_size: Most recent matches whose subjects are returned
+            
+        Returns:
+            The search query, Gmail's estimate of the matching messages and the
+            subjects of the most recent ones
+        """
+        query = self._build_gmail_search_query(email_patterns, days_back)
+        params = {'q': query, 'maxResults': sample_size}
+        
+        response = self.http.get(GMAIL_MESSAGES_URL, headers=headers, params=params, timeout=GMAIL_TIMEOUT)
+        if response.status_code != 200:
+            raise Exception(f"Gmail search failed: {response.status_code} - {response.text}")
+        
+        search_results = response.json()
+        message_ids = [message['id'] for message in search_results.get('messages', [])]
+        fetched = self._batch_get_gmail_messages(message_ids, headers, query_string=GMAIL_SUBJECT_QUERY)
+        
+        sample_subjects = []
+        for message_id in message_ids:
+            message = fetched.get(message_id)
+            if message is None:
+                response = self.http.get(f"{GMAIL_MESSAGES_URL}/{message_id}{GMAIL_SUBJECT_QUERY}",
+                                         headers=headers, timeout=GMAIL_TIMEOUT)
+                if response.status_code != 200:
+                    continue
+                message = response.json()
+            
+            for header in message.get('payload', {}).get('headers', []):
+                if header.get('name', '').lower() == 'subject':
+                    sample_subjects.append(header.get('value', ''))
+                    break
+        
+        return {
+            'query': query,
+            'matches': search_results.get('resultSizeEstimate', len(message_ids)),
+            'sample_subjects': sample_subjects
+        }
+    
+    def _batch_get_gmail_messages(self, message_ids: List[str], headers: Dict,
+                                  query_string: str = '') -> Dict[str, Dict]:
+        """
+        Fetch several Gmail messages in one HTTP batch request.
+        
+        Args:
+            message_ids: Message IDs to fetch (at most GMAIL_BATCH_SIZE)
+            headers: Authorization headers for the Gmail API
+            query_string: Appended to each message URL, e.g. to request metadata only
+            
+        Returns:
+            Message ID -> message resource for every message fetched; IDs that
+            are missing are fetched individually by the caller
+        """
+        if len(message_ids) < 2:
+            return {}
+        
         try:
-            import requests
+            boundary = f"batch_{uuid.uuid4().hex}"
+            parts = []
+            for idx, message_id in enumerate(message_ids):
+                parts.append(
+                    f"--{boundary}\r\n"
+                    f"Content-Type: application/http\r\n"
+                    f"Content-ID: <item-{idx}>\r\n\r\n"
+                    f"GET /gmail/v1/users/me/messages/{message_id}{query_string}\r\n\r\n"
+                )
+            body = ''.join(parts) + f"--{boundary}--\r\n"
             
-            # Get message details
-            message_url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}"
-            response = requests.get(message_url, headers=headers)
+            batch_headers = {
+                'Authorization': headers['Authorization'],
+                'Content-Type': f'multipart/mixed; boundary={boundary}'
+            }
+            response = self.http.post(GMAIL_BATCH_URL, headers=batch_headers, data=body, timeout=GMAIL_TIMEOUT)
             
             if response.status_code != 200:
-                logger.error(f"Failed to get message {message_id}: {response.status_code}")
-                return None
+                logger.warning(f"Gmail batch request failed: {response.status_code}, fetching messages individually")
+                return {}
+            
+            content_type = response.headers.get('Content-Type', '')
+            match = re.search(r'boundary="?([^";]+)"?', content_type)
+            if not match:
+                logger.warning("Gmail batch response has no multipart boundary, fetching messages individually")
+                return {}
+            
+            messages = {}
+            for part in response.text.split(f"--{match.group(1)}"):
+                content_id = re.search(r'Content-ID:\s*<response-item-(\d+)>', part, re.IGNORECASE)
+                status = re.search(r'HTTP/[\d.]+ (\d{3})', part)
+                if not content_id or not status:
+                    continue
+                
+                message_id = message_ids[int(content_id.group(1))]
+                if status.group(1) != '200':
+                    logger.error(f"Failed to get message {message_id}: {status.group(1)}")
+                    continue
+                
+                # The embedded response body follows its own blank line
+                embedded = part[status.end():]
+                json_start = embedded.find('{')
+                if json_start >= 0:
+                    messages[message_id] = json.loads(embedded[json_start:embedded.rfind('}') + 1])
             
-            message_data = response.json()
+            return messages
+            
+        except Exception as e:
+            logger.warning(f"Gmail batch fetch error, fetching messages individually: {e}")
+            return {}
+    
+    def _process_gmail_message(self, message_id: str, headers: Dict, provider_name: str,
+                               message_data: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Process a Gmail message and download PDF attachments.
+        
+        When message_data comes from a batch fetch, the message was already
+        checked against the tracking table and is not fetched again.
+        """
+        try:
+            prefetched = message_data is not None
+            if not prefetched:
+                # Get message details
+                message_url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}"
+                response = self.http.get(message_url, headers=headers, timeout=GMAIL_TIMEOUT)
+                
+                if response.status_code != 200:
+                    logger.error(f"Failed to get message {message_id}: {response.status_code}")
+                    return None
+                
+                message_data = response.json()
             
             # Extract message metadata
             payload = message_data.get('payload', {})
@@ -258,7 +436,7 @@ class EmailService:
                     date_received = value
             
             # Check if already processed
-            if self._is_email_already_processed(message_id):
+            if not prefetched and self._is_email_already_processed(message_id):
                 logger.debug(f"Email {message_id} already processed, skipping")
                 return None
             
@@ -296,8 +474,6 @@ class EmailService:
     def _download_gmail_attachments(self, message_data: Dict, headers: Dict, provider_name: str) -> Optional[str]:
         """Download PDF attachments from Gmail message."""
         try:
-            import requests
-            
             payload = message_data.get('payload', {})
             parts = payload.get('parts', [payload])  # Handle single part messages
             
@@ -323,7 +499,7 @@ class EmailService:
                 if filename and filename.lower().endswith('.pdf') and attachment_id:
                     # Download the attachment
                     attachment_url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_data['id']}/attachments/{attachment_id}"
-                    response = requests.get(attachment_url, headers=headers)
+                    response = self.http.get(attachment_url, headers=headers, timeout=GMAIL_TIMEOUT)
                     
                     if response.status_code == 200:
                         attachment_data = response.json()
@@ -361,6 +537,23 @@ class EmailService:
             logger.error(f"Error checking email processing status: {e}")
             return False
     
+    def _get_processed_email_ids(self, email_ids: List[str]) -> set:
+        """Return which of the given emails have already been processed, in one query."""
+        if not email_ids:
+            return set()
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            placeholders = ','.join('?' * len(email_ids))
+            cursor.execute(f"SELECT email_id FROM email_tracking WHERE email_id IN ({placeholders})", email_ids)
+            result = {row[0] for row in cursor.fetchall()}
+            conn.close()
+            return result
+        except Exception as e:
+            logger.error(f"Error checking email processing status: {e}")
+            return set()
+    
     def _record_email_processing(self, email_id: str, provider_name: str, subject: str,
                                  sender: str, received_date: str, pdf_path: str, status: str):
         """Record email processing in tracking database."""
@@ -0,0 +1,56 @@
+"""
+Gunicorn configuration for serving the API in production.
+
+Run from the project root:
+    gunicorn web_app.backend.wsgi:app
+
+The API runs as a single worker process. Sync jobs, their status at
+/sync/jobs/<id> and the executor that runs them one at a time live in that
+process's memory, so a second worker would answer polls for jobs it never saw
+and could run a pipeline alongside another worker's against the same SQLite file.
+WEB_CONCURRENCY is deliberately not read.
+
+Requests are served by GUNICORN_THREADS threads rather than gevent greenlets:
+a sync's OCR and parsing are CPU bound, and on a greenlet they would stall every
+other request and the worker's heartbeat until gunicorn killed it at the timeout.
+On threads the job runs beside the requests and hands batches to the PDF process pool.
+
+GUNICORN_WORKER_CLASS=gevent still works for deployments that never sync from the
+API; psycopg2 is then made cooperative with psycogreen when that is installed.
+"""
+
+import os
+
+try:
+    from psycogreen.gevent import patch_psycopg
+except ImportError:
+    patch_psycopg = None
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '5000')}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+workers = 1
+
+# Concurrent requests the greenlets may hold open when gevent is chosen
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '100'))
+
+# Long-running Gmail syncs run as background jobs, so a request past this is stuck
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Every request thread can hold a connection, beside the sync and cache-fill threads;
+# explicit DB_POOL_SIZE / DB_MAX_OVERFLOW settings still win
+os.environ.setdefault('DB_POOL_SIZE', '20')
+os.environ.setdefault('DB_MAX_OVERFLOW', '10')
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def post_fork(server, worker):
+    """Let psycopg2 queries yield to other greenlets instead of blocking the worker."""
+    if worker_class == 'gevent' and patch_psycopg is not None:
+        patch_psycopg()
\ No newline at end of file
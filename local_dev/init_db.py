@@ -48,7 +48,8 @@ def create_database_schema(db_path: str):
         account_number TEXT,
         raw_text TEXT,
         parsing_confidence DECIMAL(3,2),
-        validation_errors TEXT
+        validation_errors TEXT,
+        cached_json BLOB
     )
     ''')
     
@@ -87,8 +88,16 @@ def create_database_schema(db_path: str):
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoices_provider ON invoices(provider_name)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices(invoice_date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoices_service_type ON invoices(service_type)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_invoice_date_service_provider ON invoices(invoice_date, service_type, provider_name, total_amount, usage_quantity)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_invoices_date_id ON invoices(invoice_date, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_invoice_provider_date ON invoices(provider_name, invoice_date, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_invoice_service_date ON invoices(service_type, invoice_date, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_invoice_provider_service_date ON invoices(provider_name, service_type, invoice_date, id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_processing_history_date ON processing_history(processing_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_processing_history_date_id ON processing_history(processing_date, id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_tracking_provider ON email_tracking(provider_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_email_tracking_processed_date ON email_tracking(processed_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_email_tracking_provider_processed ON email_tracking(provider_name, processed_date)')
     
     conn.commit()
     conn.close()
@@ -150,12 +159,21 @@ def generate_sample_data(db_path: str, num_months: int = 24):
     
     # Insert sample data
     cursor.executemany('''
-    INSERT OR REPLACE INTO invoices (
+    INSERT INTO invoices (
         id, provider_name, service_type, invoice_date, total_amount,
         usage_quantity, usage_rate, service_charge, billing_period_start,
         billing_period_end, file_path, processing_status, created_at,
         updated_at, account_number, raw_text, parsing_confidence, validation_errors
     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        provider_name = excluded.provider_name, service_type = excluded.service_type,
+        invoice_date = excluded.invoice_date, total_amount = excluded.total_amount,
+        usage_quantity = excluded.usage_quantity, usage_rate = excluded.usage_rate,
+        service_charge = excluded.service_charge, billing_period_start = excluded.billing_period_start,
+        billing_period_end = excluded.billing_period_end, file_path = excluded.file_path,
+        processing_status = excluded.processing_status, updated_at = excluded.updated_at,
+        account_number = excluded.account_number, raw_text = excluded.raw_text,
+        parsing_confidence = excluded.parsing_confidence, validation_errors = excluded.validation_errors
     ''', sample_invoices)
     
     # Add sample processing history
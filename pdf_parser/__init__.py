@@ -5,6 +5,6 @@ Handles PDF text extraction and data parsing for utility invoices.
 
 from .pdf_service import PDFService
 from .ocr_adapter import OCRAdapter
-from .template_processor import TemplateProcessor
+from .template_processor import ParseResult, TemplateProcessor
 
-__all__ = ['PDFService', 'OCRAdapter', 'TemplateProcessor']
\ No newline at end of file
+__all__ = ['PDFService', 'OCRAdapter', 'TemplateProcessor', 'ParseResult']
\ No newline at end of file
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Template Compilation Script
+
+Loads every parsing template once and publishes the result in shared memory,
+so parser worker processes attach to it instead of each finding, reading and
+parsing the template files themselves. The segment holds JSON, and each worker
+compiles the patterns it contains; the default name is per user.
+"""
+
+import sys
+import argparse
+import logging
+from multiprocessing import shared_memory
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from pdf_parser.template_processor import TemplateProcessor, SHARED_TEMPLATES_NAME, _SHARED_HEADER
+
+logger = logging.getLogger(__name__)
+
+
+def unlink_templates(name: str = SHARED_TEMPLATES_NAME) -> bool:
+    """Remove a published template segment; returns whether one existed."""
+    try:
+        # Attached with tracking, so unlink() below also clears the tracker's entry
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    
+    shm.close()
+    shm.unlink()
+    return True
+
+
+def publish_templates(templates_path: str, name: str = SHARED_TEMPLATES_NAME) -> int:
+    """
+    Load all templates and copy them into a named shared memory segment.
+    
+    Args:
+        templates_path: Directory containing the template JSON files
+        name: Shared memory segment name
+        
+    Returns:
+        Size of the published blob in bytes
+    """
+    blob = TemplateProcessor(templates_path).export_compiled()
+    
+    # Replace any previous segment; its size may differ
+    unlink_templates(name)
+    
+    shm = shared_memory.SharedMemory(name=name, create=True, size=_SHARED_HEADER.size + len(blob))
+    try:
+        _SHARED_HEADER.pack_into(shm.buf, 0, len(blob))
+        shm.buf[_SHARED_HEADER.size:_SHARED_HEADER.size + len(blob)] = blob
+    finally:
+        shm.close()
+    
+    try:
+        # The segment must outlive this process; stop the resource tracker
+        # from unlinking it at exit
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(f'/{name}', 'shared_memory')
+    except Exception:
+        pass
+    
+    return len(blob)
+
+
+def main():
+    """Compile templates into shared memory (or remove them with --unlink)."""
+    parser = argparse.ArgumentParser(description='Publish compiled parsing templates to shared memory')
+    parser.add_argument('--templates', default='./config/templates', help='Templates directory')
+    parser.add_argument('--name', default=SHARED_TEMPLATES_NAME, help='Shared memory segment name')
+    parser.add_argument('--unlink', action='store_true', help='Remove the published templates and exit')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    
+    if args.unlink:
+        if unlink_templates(args.name):
+            print(f"Removed shared templates '{args.name}'")
+        else:
+            print(f"No shared templates named '{args.name}'")
+        return
+    
+    size = publish_templates(args.templates, args.name)
+    print(f"Published compiled templates from {args.templates} to shared memory '{args.name}' ({size} bytes)")
+    print("Run with --unlink to remove them")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -4,17 +4,107 @@ Coordinates OCR extraction, template parsing, and database integration.
 """
 
 import os
+import atexit
 import logging
+import multiprocessing
+import queue
 import sqlite3
+import sys
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from .ocr_adapter import OCRAdapter
-from .template_processor import TemplateProcessor
+from .template_processor import ParseResult, TemplateProcessor
 
 logger = logging.getLogger(__name__)
 
+# History rows are written by a background thread in batches of this size
+HISTORY_BATCH_SIZE = 64
+# Seconds an idle history writer waits before exiting (restarted on demand)
+HISTORY_WRITER_IDLE_TIMEOUT = 30.0
+# Seconds a connection waits on another process's write lock before giving up
+SQLITE_BUSY_TIMEOUT = 30.0
+
+_live_services = weakref.WeakSet()
+
+
+def _close_live_services():
+    """Flush pending history rows of every live service at interpreter exit."""
+    for service in list(_live_services):
+        service.close()
+
+
+atexit.register(_close_live_services)
+
+# OCR and parsing are CPU bound, so batches are spread over worker processes
+PDF_POOL_MAX_WORKERS = min(os.cpu_count() or 1, 4)
+# Smaller batches are processed inline; worker start-up would outweigh the gain
+PDF_POOL_MIN_FILES = 4
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+_worker_services = {}
+
+
+def _gevent_patched() -> bool:
+    """Whether gevent has patched threading here, as in a gevent gunicorn worker."""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def _init_pdf_worker():
+    """Worker initializer: stop Tesseract's OpenMP threads oversubscribing the pool."""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared PDF worker pool, starting it on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # forkserver workers start from a clean server process that has already
+            # imported the PDF stack, instead of re-importing it per worker
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if 'forkserver' in methods:
+                ctx.set_forkserver_preload([__name__])
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_POOL_MAX_WORKERS,
+                mp_context=ctx,
+                initializer=_init_pdf_worker
+            )
+        return _pdf_pool
+
+
+def _process_pdf_job(config_path: str, db_path: str, pdf_path: str, provider: str,
+                     email_id: Optional[str], content_hash: Optional[str]) -> Dict:
+    """
+    Extract and parse one PDF inside a pool worker, reusing that worker's PDFService.
+    
+    Nothing is written here; the parent saves the batch's invoices and history.
+    """
+    service = _worker_services.get((config_path, db_path))
+    if service is None:
+        service = _worker_services[(config_path, db_path)] = PDFService(config_path, db_path)
+    ctx = PDFProcessingContext(pdf_path=pdf_path, provider=provider, email_id=email_id,
+                               content_hash=content_hash)
+    return service._process_pdf_core(ctx, store=False)
+
+
+@dataclass
+class PDFProcessingContext:
+    """Per-file inputs for the processing pipeline."""
+    pdf_path: str
+    provider: str
+    email_id: Optional[str] = None
+    content_hash: Optional[str] = None
+    start_ts: datetime = field(default_factory=datetime.now)
+
 
 class PDFService:
     """
@@ -28,11 +118,23 @@ class PDFService:
         self.ocr_adapter = OCRAdapter()
         self.template_processor = TemplateProcessor(self.config_path / "templates")
         self._init_processing_tables()
+        
+        # Processing history is written off the critical path by a single writer thread
+        self._history_q = queue.Queue()
+        self._history_lock = threading.Lock()
+        self._history_thread = None
+        _live_services.add(self)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, waiting out other processes' writes rather than failing."""
+        return sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT)
     
     def _init_processing_tables(self):
         """Initialize processing-related database tables."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
+            # WAL lets the API keep reading while a sync writes
+            conn.execute("PRAGMA journal_mode=WAL")
             
             # Table for PDF processing history
             conn.execute('''
@@ -58,7 +160,7 @@ class PDFService:
             logger.info("PDF processing tables initialized")
             
         except Exception as e:
-            logger.error(f"Failed to initialize PDF processing tables: {e}")
+            logger.error("Failed to initialize PDF processing tables: %s", e)
     
     def process_pdf(self, pdf_path: str, provider: str, email_id: str = None) -> Dict:
         """
@@ -72,13 +174,62 @@ class PDFService:
         Returns:
             Processing result with extracted data and metadata
         """
-        start_time = datetime.now()
+        ctx = PDFProcessingContext(pdf_path=pdf_path, provider=provider, email_id=email_id)
+        
+        # Check if already processed
+        if Path(pdf_path).exists() and self._is_pdf_already_processed(pdf_path):
+            logger.info("PDF already processed: %s", pdf_path)
+            existing_result = self._get_existing_processing_result(pdf_path)
+            if existing_result:
+                return existing_result
+        
+        return self._process_pdf_core(ctx)
+    
+    def process_pdf_prepared(self, pdf_path: str, provider: str, precomputed_hash: str = None,
+                             email_id: str = None, skip_cache_check: bool = False) -> Dict:
+        """
+        Process a PDF whose provider (and optionally content hash) the caller already knows.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            provider: Provider name for template selection
+            precomputed_hash: Content hash computed by the caller, carried into the result
+            email_id: Optional email ID for tracking
+            skip_cache_check: Skip the already-processed lookup (caller has done it in bulk)
+            
+        Returns:
+            Processing result with extracted data and metadata
+        """
+        ctx = PDFProcessingContext(
+            pdf_path=pdf_path,
+            provider=provider,
+            email_id=email_id,
+            content_hash=precomputed_hash
+        )
+        
+        if not skip_cache_check and self._is_pdf_already_processed(pdf_path):
+            logger.info("PDF already processed: %s", pdf_path)
+            existing_result = self._get_existing_processing_result(pdf_path)
+            if existing_result:
+                return existing_result
+        
+        return self._process_pdf_core(ctx)
+    
+    def _process_pdf_core(self, ctx: PDFProcessingContext, store: bool = True) -> Dict:
+        """
+        Run OCR, parsing and storage for a prepared processing context.
+        
+        With store=False the invoice is parsed but not saved and no history is
+        recorded; the caller passes the result to _store_results.
+        """
+        pdf_path = ctx.pdf_path
+        provider = ctx.provider
         
         result = {
             'success': False,
             'pdf_path': pdf_path,
             'provider': provider,
-            'email_id': email_id,
+            'email_id': ctx.email_id,
             'processing_time': 0.0,
             'ocr_result': None,
             'parsing_result': None,
@@ -86,21 +237,16 @@ class PDFService:
             'errors': [],
             'warnings': []
         }
+        if ctx.content_hash:
+            result['content_hash'] = ctx.content_hash
         
         try:
             # Check if file exists
             if not Path(pdf_path).exists():
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
             
-            # Check if already processed
-            if self._is_pdf_already_processed(pdf_path):
-                logger.info(f"PDF already processed: {pdf_path}")
-                existing_result = self._get_existing_processing_result(pdf_path)
-                if existing_result:
-                    return existing_result
-            
             # Step 1: Extract text using OCR
-            logger.info(f"Extracting text from {pdf_path}")
+            logger.info("Extracting text from %s", pdf_path)
             ocr_result = self.ocr_adapter.extract_text(pdf_path)
             result['ocr_result'] = ocr_result
             
@@ -114,48 +260,30 @@ class PDFService:
                 return result
             
             # Step 2: Parse extracted text using template
-            logger.info(f"Parsing text for provider: {provider}")
+            logger.info("Parsing text for provider: %s", provider)
             parsing_result = self.template_processor.parse_invoice(extracted_text, provider)
-            result['parsing_result'] = parsing_result
+            result['parsing_result'] = parsing_result.as_dict()
             
-            if parsing_result.get('validation_errors'):
-                result['errors'].extend(parsing_result['validation_errors'])
+            if parsing_result.validation_errors:
+                result['errors'].extend(parsing_result.validation_errors)
             
-            if parsing_result.get('parsing_warnings'):
-                result['warnings'].extend(parsing_result['parsing_warnings'])
+            if parsing_result.parsing_warnings:
+                result['warnings'].extend(parsing_result.parsing_warnings)
             
             # Step 3: Prepare invoice data for database
-            invoice_data = self._prepare_invoice_data(parsing_result, pdf_path, email_id)
+            invoice_data = self._prepare_invoice_data(parsing_result, pdf_path, ctx.email_id)
             result['invoice_data'] = invoice_data
             
-            # Step 4: Save to database if data is valid
-            if invoice_data and not result['errors']:
-                invoice_id = self._save_invoice_to_database(invoice_data)
-                if invoice_id:
-                    result['invoice_id'] = invoice_id
-                    result['success'] = True
-                    logger.info(f"Successfully processed PDF: {pdf_path} -> Invoice ID: {invoice_id}")
-                else:
-                    result['errors'].append("Failed to save invoice to database")
+            result['processing_time'] = (datetime.now() - ctx.start_ts).total_seconds()
             
-            # Record processing history
-            processing_time = (datetime.now() - start_time).total_seconds()
-            result['processing_time'] = processing_time
-            
-            self._record_processing_history(
-                pdf_path=pdf_path,
-                provider=provider,
-                ocr_result=ocr_result,
-                parsing_result=parsing_result,
-                success=result['success'],
-                error_message='; '.join(result['errors']) if result['errors'] else None,
-                invoice_id=result.get('invoice_id')
-            )
+            # Step 4: Save to database if data is valid, and record processing history
+            if store:
+                self._store_results([result])
             
         except Exception as e:
-            logger.error(f"PDF processing failed for {pdf_path}: {e}")
+            logger.error("PDF processing failed for %s: %s", pdf_path, e)
             result['errors'].append(str(e))
-            result['processing_time'] = (datetime.now() - start_time).total_seconds()
+            result['processing_time'] = (datetime.now() - ctx.start_ts).total_seconds()
         
         return result
     
@@ -180,36 +308,43 @@ class PDFService:
             'summary': {}
         }
         
+        # One lookup for the whole batch instead of a cache probe per file
+        processed_paths = self._get_processed_paths(
+            [f.get('path') for f in pdf_files if f.get('path')]
+        )
+        
+        file_results = []
+        pending = []
         for file_info in pdf_files:
             pdf_path = file_info.get('path')
             provider = file_info.get('provider')
-            email_id = file_info.get('email_id')
             
             if not pdf_path or not provider:
-                results['file_results'].append({
+                file_results.append({
                     'path': pdf_path,
                     'success': False,
                     'error': 'Missing path or provider information'
                 })
-                results['failed'] += 1
                 continue
             
-            try:
-                file_result = self.process_pdf(pdf_path, provider, email_id)
-                results['file_results'].append(file_result)
-                
-                if file_result['success']:
-                    results['successful'] += 1
-                else:
-                    results['failed'] += 1
-            
-            except Exception as e:
-                logger.error(f"Batch processing error for {pdf_path}: {e}")
-                results['file_results'].append({
-                    'path': pdf_path,
-                    'success': False,
-                    'error': str(e)
-                })
+            file_result = None
+            if pdf_path in processed_paths:
+                logger.info("PDF already processed: %s", pdf_path)
+                file_result = self._get_existing_processing_result(pdf_path)
+            if file_result is None:
+                pending.append((len(file_results), file_info))
+            file_results.append(file_result)
+        
+        if pending:
+            processed = self._process_pending_files([file_info for _, file_info in pending])
+            for (idx, _), file_result in zip(pending, processed):
+                file_results[idx] = file_result
+        
+        for file_result in file_results:
+            results['file_results'].append(file_result)
+            if file_result['success']:
+                results['successful'] += 1
+            else:
                 results['failed'] += 1
         
         results['processing_time'] = (datetime.now() - start_time).total_seconds()
@@ -231,18 +366,89 @@ class PDFService:
             'success_rate': results['successful'] / results['total_files'] if results['total_files'] > 0 else 0.0
         }
         
-        logger.info(f"Batch processing complete: {results['successful']}/{results['total_files']} successful")
+        logger.info("Batch processing complete: %d/%d successful", results['successful'], results['total_files'])
+        return results
+    
+    def process_pdfs_bulk(self, pdf_paths: List[str], provider: str) -> List[Dict]:
+        """
+        Process many PDFs from one provider across the worker process pool.
+        
+        Args:
+            pdf_paths: Paths of the PDF files
+            provider: Provider name for template selection
+            
+        Returns:
+            Processing results, in input order
+        """
+        processed_paths = self._get_processed_paths(pdf_paths)
+        results = [
+            self._get_existing_processing_result(path) if path in processed_paths else None
+            for path in pdf_paths
+        ]
+        
+        pending = [idx for idx, result in enumerate(results) if result is None]
+        processed = self._process_pending_files([{'path': pdf_paths[idx], 'provider': provider} for idx in pending])
+        for idx, result in zip(pending, processed):
+            results[idx] = result
         return results
     
-    def _prepare_invoice_data(self, parsing_result: Dict, pdf_path: str, email_id: str = None) -> Dict:
+    def _process_pending_files(self, file_infos: List[Dict]) -> List[Dict]:
+        """
+        Run the full pipeline for files known not to be processed yet.
+        
+        Batches of PDF_POOL_MIN_FILES or more go to the worker pool; smaller
+        ones, or any batch if the pool cannot start, are processed inline.
+        """
+        # Under gevent the pool's manager thread would be a greenlet, so files are processed inline
+        if len(file_infos) >= PDF_POOL_MIN_FILES and PDF_POOL_MAX_WORKERS > 1 and not _gevent_patched():
+            try:
+                pool = _get_pdf_pool()
+                futures = [
+                    pool.submit(_process_pdf_job, str(self.config_path), self.db_path,
+                                info['path'], info['provider'], info.get('email_id'), info.get('content_hash'))
+                    for info in file_infos
+                ]
+            except Exception as e:
+                logger.warning("PDF worker pool unavailable, processing inline: %s", e)
+            else:
+                results = []
+                for info, future in zip(file_infos, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        logger.error("Batch processing error for %s: %s", info['path'], e)
+                        results.append({'path': info['path'], 'success': False, 'error': str(e)})
+                
+                # Workers only parse; the whole batch is saved here in one transaction
+                try:
+                    self._store_results(results)
+                except Exception as e:
+                    logger.error("Failed to store batch results: %s", e)
+                return results
+        
+        results = []
+        for info in file_infos:
+            try:
+                results.append(self.process_pdf_prepared(
+                    info['path'], info['provider'],
+                    precomputed_hash=info.get('content_hash'),
+                    email_id=info.get('email_id'),
+                    skip_cache_check=True
+                ))
+            except Exception as e:
+                logger.error("Batch processing error for %s: %s", info['path'], e)
+                results.append({'path': info['path'], 'success': False, 'error': str(e)})
+        return results
+    
+    def _prepare_invoice_data(self, parsing_result: ParseResult, pdf_path: str, email_id: str = None) -> Dict:
         """Prepare parsed data for database insertion."""
         try:
-            extracted_data = parsing_result.get('extracted_data', {})
+            extracted_data = parsing_result.extracted_data
             
             # Map parsed fields to database columns
             invoice_data = {
-                'provider_name': parsing_result.get('provider_name'),
-                'service_type': parsing_result.get('service_type'),
+                'provider_name': parsing_result.provider_name,
+                'service_type': parsing_result.service_type,
                 'invoice_date': extracted_data.get('invoice_date'),
                 'total_amount': extracted_data.get('total_amount'),
                 'usage_quantity': extracted_data.get('usage_quantity'),
@@ -253,7 +459,7 @@ class PDFService:
                 'file_path': pdf_path,
                 'processing_status': 'parsed',
                 'email_id': email_id,
-                'parsing_confidence': parsing_result.get('parsing_confidence', 0.0),
+                'parsing_confidence': parsing_result.parsing_confidence,
                 'account_number': extracted_data.get('account_number')
             }
             
@@ -263,71 +469,145 @@ class PDFService:
             return invoice_data
             
         except Exception as e:
-            logger.error(f"Error preparing invoice data: {e}")
+            logger.error("Error preparing invoice data: %s", e)
             return {}
     
-    def _save_invoice_to_database(self, invoice_data: Dict) -> Optional[int]:
-        """Save invoice data to the database."""
+    def _store_results(self, results: List[Dict]):
+        """
+        Save the valid invoices of parsed results and queue their history rows.
+        
+        Results that never reached parsing (OCR failures, worker errors) are skipped.
+        """
+        parsed = [result for result in results if result.get('parsing_result') is not None]
+        to_save = [result for result in parsed if result['invoice_data'] and not result['errors']]
+        
+        invoice_ids = self._save_invoices_to_database([result['invoice_data'] for result in to_save])
+        for result, invoice_id in zip(to_save, invoice_ids):
+            if invoice_id:
+                result['invoice_id'] = invoice_id
+                result['success'] = True
+                logger.info("Successfully processed PDF: %s -> Invoice ID: %s", result['pdf_path'], invoice_id)
+            else:
+                result['errors'].append("Failed to save invoice to database")
+        
+        for result in parsed:
+            self._record_processing_history(
+                pdf_path=result['pdf_path'],
+                provider=result['provider'],
+                ocr_result=result['ocr_result'],
+                parsing_confidence=result['parsing_result']['parsing_confidence'],
+                success=result['success'],
+                errors=result['errors'],
+                invoice_id=result.get('invoice_id')
+            )
+    
+    def _save_invoices_to_database(self, invoices: List[Dict]) -> List[Optional[int]]:
+        """
+        Save a batch of invoices in one transaction, returning each one's id or None.
+        
+        BEGIN IMMEDIATE takes the write lock before the duplicate checks, so another
+        process cannot insert the same invoice between a check and its insert. Each
+        invoice gets a savepoint, so one that fails does not undo the rest.
+        """
+        if not invoices:
+            return []
+        
+        invoice_ids = [None] * len(invoices)
+        try:
+            conn = self._connect()
+        except Exception as e:
+            logger.error("Failed to save invoices to database: %s", e)
+            return invoice_ids
+        
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
-            # Check for duplicates based on provider, amount, and date
-            cursor.execute('''
-                SELECT id FROM invoices 
-                WHERE provider_name = ? AND total_amount = ? AND invoice_date = ?
-            ''', (
-                invoice_data.get('provider_name'),
-                invoice_data.get('total_amount'),
-                invoice_data.get('invoice_date')
-            ))
-            
-            existing = cursor.fetchone()
-            if existing:
-                logger.warning(f"Duplicate invoice found: {invoice_data.get('provider_name')} - ${invoice_data.get('total_amount')}")
-                conn.close()
-                return existing[0]
-            
-            # Prepare insert statement
-            columns = list(invoice_data.keys())
-            placeholders = ['?' for _ in columns]
-            values = list(invoice_data.values())
-            
-            insert_sql = f'''
-                INSERT INTO invoices ({', '.join(columns)})
-                VALUES ({', '.join(placeholders)})
-            '''
-            
-            cursor.execute(insert_sql, values)
-            invoice_id = cursor.lastrowid
+            cursor.execute("BEGIN IMMEDIATE")
+            for idx, invoice_data in enumerate(invoices):
+                try:
+                    cursor.execute("SAVEPOINT save_invoice")
+                    
+                    # Check for duplicates based on provider, amount, and date
+                    cursor.execute('''
+                        SELECT id FROM invoices 
+                        WHERE provider_name = ? AND total_amount = ? AND invoice_date = ?
+                    ''', (
+                        invoice_data.get('provider_name'),
+                        invoice_data.get('total_amount'),
+                        invoice_data.get('invoice_date')
+                    ))
+                    
+                    existing = cursor.fetchone()
+                    if existing:
+                        logger.warning("Duplicate invoice found: %s - $%s",
+                                       invoice_data.get('provider_name'), invoice_data.get('total_amount'))
+                        invoice_ids[idx] = existing[0]
+                    else:
+                        columns = list(invoice_data.keys())
+                        cursor.execute(
+                            f"INSERT INTO invoices ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                            list(invoice_data.values())
+                        )
+                        invoice_ids[idx] = cursor.lastrowid
+                        logger.info("Saved invoice to database: ID %s", invoice_ids[idx])
+                    
+                    cursor.execute("RELEASE save_invoice")
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO save_invoice")
+                    cursor.execute("RELEASE save_invoice")
+                    logger.error("Failed to save invoice to database: %s", e)
             
             conn.commit()
-            conn.close()
-            
-            logger.info(f"Saved invoice to database: ID {invoice_id}")
-            return invoice_id
-            
         except Exception as e:
-            logger.error(f"Failed to save invoice to database: {e}")
-            return None
+            conn.rollback()
+            logger.error("Failed to save invoices to database: %s", e)
+            invoice_ids = [None] * len(invoices)
+        finally:
+            conn.close()
+        
+        return invoice_ids
     
     def _is_pdf_already_processed(self, pdf_path: str) -> bool:
         """Check if PDF has already been processed."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            # Rows still queued for the history writer count as processed
+            self.flush_history()
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM pdf_processing WHERE file_path = ?", (pdf_path,))
             result = cursor.fetchone()
             conn.close()
             return result is not None
         except Exception as e:
-            logger.error(f"Error checking PDF processing status: {e}")
+            logger.error("Error checking PDF processing status: %s", e)
             return False
     
+    def _get_processed_paths(self, pdf_paths: List[str]) -> set:
+        """Return the subset of paths that already have a processing record."""
+        processed = set()
+        if not pdf_paths:
+            return processed
+        try:
+            # Rows still queued for the history writer count as processed
+            self.flush_history()
+            conn = self._connect()
+            cursor = conn.cursor()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(pdf_paths), 500):
+                chunk = pdf_paths[i:i + 500]
+                cursor.execute(
+                    f"SELECT file_path FROM pdf_processing WHERE file_path IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+                processed.update(row[0] for row in cursor.fetchall())
+            conn.close()
+        except Exception as e:
+            logger.error("Error checking PDF processing status: %s", e)
+        return processed
+    
     def _get_existing_processing_result(self, pdf_path: str) -> Optional[Dict]:
         """Get existing processing result for a PDF."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -354,46 +634,111 @@ class PDFService:
             return None
             
         except Exception as e:
-            logger.error(f"Error getting existing processing result: {e}")
+            logger.error("Error getting existing processing result: %s", e)
             return None
     
     def _record_processing_history(self, pdf_path: str, provider: str, ocr_result: Dict,
-                                  parsing_result: Dict, success: bool, error_message: str = None,
+                                  parsing_confidence: float, success: bool, errors: List[str] = None,
                                   invoice_id: int = None):
-        """Record processing history in database."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        """Queue a processing history row for the background writer."""
+        row = (
+            pdf_path,
+            provider,
+            datetime.now().isoformat(),
+            ocr_result.get('method', 'unknown'),
+            ocr_result.get('confidence', 0.0),
+            parsing_confidence,
+            len(ocr_result.get('text', '')),
+            success,
+            tuple(errors) if errors else None,
+            invoice_id
+        )
+        with self._history_lock:
+            self._ensure_history_writer()
+            self._history_q.put(row)
+    
+    def _ensure_history_writer(self):
+        """Start the history writer thread if it is not running (caller holds the lock)."""
+        if self._history_thread is None or not self._history_thread.is_alive():
+            self._history_thread = threading.Thread(
+                target=self._history_writer_loop,
+                name="pdf-history-writer",
+                daemon=True
+            )
+            self._history_thread.start()
+    
+    def _history_writer_loop(self):
+        """Drain queued history rows in batches until idle or told to stop."""
+        while True:
+            try:
+                row = self._history_q.get(timeout=HISTORY_WRITER_IDLE_TIMEOUT)
+            except queue.Empty:
+                with self._history_lock:
+                    if self._history_q.empty():
+                        self._history_thread = None
+                        return
+                continue
             
-            cursor.execute('''
+            batch = []
+            stop = row is None
+            if not stop:
+                batch.append(row)
+            while not stop and len(batch) < HISTORY_BATCH_SIZE:
+                try:
+                    row = self._history_q.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                else:
+                    batch.append(row)
+            
+            if batch:
+                self._write_history_rows(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._history_q.task_done()
+            if stop:
+                return
+    
+    def _write_history_rows(self, rows: List[Tuple]):
+        """Insert a batch of history rows in a single transaction."""
+        try:
+            conn = self._connect()
+            conn.executemany('''
                 INSERT OR REPLACE INTO pdf_processing
                 (file_path, provider_name, processing_date, ocr_method, ocr_confidence,
                  parsing_confidence, extracted_text_length, parsing_success, error_message, invoice_id)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                pdf_path,
-                provider,
-                datetime.now().isoformat(),
-                ocr_result.get('method', 'unknown'),
-                ocr_result.get('confidence', 0.0),
-                parsing_result.get('parsing_confidence', 0.0),
-                len(ocr_result.get('text', '')),
-                success,
-                error_message,
-                invoice_id
-            ))
-            
+            ''', [
+                row[:8] + ('; '.join(row[8]) if row[8] else None, row[9])
+                for row in rows
+            ])
             conn.commit()
             conn.close()
-            logger.debug(f"Recorded processing history for: {pdf_path}")
+            logger.debug("Recorded processing history for %d PDFs", len(rows))
             
         except Exception as e:
-            logger.error(f"Error recording processing history: {e}")
+            logger.error("Error recording processing history: %s", e)
+    
+    def flush_history(self):
+        """Block until all queued history rows have been written."""
+        self._history_q.join()
+    
+    def close(self):
+        """Flush pending history rows and stop the writer thread."""
+        with self._history_lock:
+            thread = self._history_thread
+            if thread is not None and thread.is_alive():
+                self._history_q.put(None)
+        if thread is not None:
+            thread.join()
+        _live_services.discard(self)
     
     def get_processing_statistics(self) -> Dict:
         """Get processing statistics and health metrics."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            self.flush_history()
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Overall statistics
@@ -462,13 +807,14 @@ class PDFService:
             }
             
         except Exception as e:
-            logger.error(f"Error getting processing statistics: {e}")
+            logger.error("Error getting processing statistics: %s", e)
             return {}
     
     def reprocess_failed_pdfs(self, provider: str = None) -> Dict:
         """Reprocess PDFs that previously failed."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            self.flush_history()
+            conn = self._connect()
             cursor = conn.cursor()
             
             if provider:
@@ -491,7 +837,7 @@ class PDFService:
                     'reprocessed': 0
                 }
             
-            logger.info(f"Reprocessing {len(failed_files)} failed PDFs")
+            logger.info("Reprocessing %d failed PDFs", len(failed_files))
             results = self.process_multiple_pdfs(failed_files)
             
             return {
@@ -500,7 +846,7 @@ class PDFService:
             }
             
         except Exception as e:
-            logger.error(f"Error reprocessing failed PDFs: {e}")
+            logger.error("Error reprocessing failed PDFs: %s", e)
             return {'error': str(e)}
     
     def test_template_with_sample(self, provider: str, sample_pdf_path: str) -> Dict:
@@ -516,15 +862,16 @@ class PDFService:
             template_test = self.template_processor.test_template(provider, ocr_result['text'])
             
             # Add OCR information
+            text = ocr_result.get('text', '')
             template_test['ocr_result'] = {
                 'method': ocr_result.get('method'),
                 'confidence': ocr_result.get('confidence'),
-                'text_length': len(ocr_result.get('text', '')),
-                'text_preview': ocr_result.get('text', '')[:500] + '...' if len(ocr_result.get('text', '')) > 500 else ocr_result.get('text', '')
+                'text_length': len(text),
+                'text_preview': text[:500] + '...' if len(text) > 500 else text
             }
             
             return template_test
             
         except Exception as e:
-            logger.error(f"Template testing failed: {e}")
+            logger.error("Template testing failed: %s", e)
             return {'error': str(e)}
\ No newline at end of file
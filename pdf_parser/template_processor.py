@@ -4,15 +4,301 @@ Handles regex-based data extraction and validation.
 """
 
 import json
+import os
 import re
+import struct
 import logging
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass
+from itertools import islice
+from datetime import date, datetime
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 from decimal import Decimal, InvalidOperation
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import re2  # google-re2: linear-time multi-pattern matching
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan  # Intel Hyperscan: SIMD multi-pattern matching
+except ImportError:
+    hyperscan = None
+
+try:
+    import ciso8601  # C ISO-8601 parser
+except ImportError:
+    ciso8601 = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# Any escape sequence, and escapes whose meaning does not depend on letter case
+# (other escapes such as \x41 might)
+_ANY_ESCAPE = re.compile(r'\\.')
+_CASE_NEUTRAL_ESCAPES = re.compile(r'\\[dDsSwWbBAZ]|\\[^A-Za-z0-9]')
+
+
+def _pattern_flags(pattern: str) -> int:
+    """
+    Work out the flags a template regex actually needs.
+    
+    MULTILINE only matters for patterns with line anchors, and IGNORECASE only
+    for patterns containing cased characters; leaving them off lets re use its
+    cheaper case-sensitive, single-line paths.
+    """
+    flags = 0
+    unescaped = _ANY_ESCAPE.sub('', pattern)
+    if '^' in unescaped or '$' in unescaped:
+        flags |= re.MULTILINE
+    if any(c.lower() != c.upper() for c in _CASE_NEUTRAL_ESCAPES.sub('', pattern)):
+        flags |= re.IGNORECASE
+    return flags
+
+
+# Bump when the published template structure changes so stale segments are ignored
+TEMPLATE_CACHE_VERSION = 6
+
+# Shared memory segment published by compile_templates.py for worker processes; named per
+# user, it holds the template JSON with its pattern strings, which are compiled on attach
+SHARED_TEMPLATES_NAME = f"ut_templates_{os.getuid()}" if hasattr(os, 'getuid') else 'ut_templates'
+# Where Linux exposes POSIX shared memory segments as files
+SHARED_MEMORY_DIR = Path('/dev/shm')
+_SHARED_HEADER = struct.Struct('<Q')  # payload length
+
+# Matches reported per pattern by test_template
+TEST_MATCH_LIMIT = 5
+
+# Templates are indexed lazily by reading the provider name from the first bytes of each file
+TEMPLATE_PEEK_BYTES = 512
+_PROVIDER_PEEK = re.compile(rb'"provider"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+# Constructs that cannot be safely wrapped into a fused alternation
+_UNFUSABLE = re.compile(r'\\[1-9]|\(\?P[<=]')
+
+# Deletion tables for characters stripped before numeric conversion
+_DECIMAL_DELETE = str.maketrans('', '', ',$ \t\n\r\f\v')
+_INT_DELETE = str.maketrans('', '', ', \t\n\r\f\v')
+
+# Fields finalised by the template's post-processing rules
+_MULTIPLIED_FIELDS = frozenset(('total_amount', 'service_charge'))
+_ROUNDED_FIELDS = frozenset(('total_amount', 'usage_rate', 'service_charge'))
+_DATE_FIELDS = frozenset(('invoice_date', 'billing_period_start', 'billing_period_end'))
+
+# Reasonable usage rate ranges by service type
+_REASONABLE_RATE_RANGES = {
+    'electricity': (0.10, 0.60),  # $/kWh
+    'gas': (0.02, 0.10),          # $/MJ
+    'water': (0.001, 0.01)        # $/L
+}
+
+
+def _numeric_checks_numpy(usage, rate, total, min_rate, max_rate):
+    """Vectorised amount/usage correlation and rate range checks."""
+    expected = usage * rate
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bad_correlation = np.abs(expected - total) / total > 0.2
+        bad_rate = (rate < min_rate) | (rate > max_rate)
+    return expected, bad_correlation, bad_rate
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _numeric_checks(usage, rate, total, min_rate, max_rate):
+        """Compiled amount/usage correlation and rate range checks."""
+        n = usage.shape[0]
+        expected = np.empty(n)
+        bad_correlation = np.zeros(n, dtype=np.bool_)
+        bad_rate = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            expected[i] = usage[i] * rate[i]
+            bad_correlation[i] = abs(expected[i] - total[i]) / total[i] > 0.2
+            bad_rate[i] = rate[i] < min_rate or rate[i] > max_rate
+        return expected, bad_correlation, bad_rate
+else:
+    _numeric_checks = _numeric_checks_numpy
+
+def _owned_by_current_user(path: Path) -> bool:
+    """Whether a cache file belongs to this user and no one else can write to it."""
+    if not hasattr(os, 'getuid'):
+        return True
+    st = os.stat(path)
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _dumps(payload: Any) -> bytes:
+    """Encode a cache payload as JSON, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
+def _loads(data) -> Any:
+    """Decode a JSON cache payload from bytes or a memoryview."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def _invalid_pattern_warnings(pattern_config: Dict) -> Tuple[str, ...]:
+    """Parse warnings for a field's patterns that failed to compile."""
+    return tuple(f"Invalid regex pattern: {entry['error']}" for entry in pattern_config.get('invalid', ()))
+
+
+def _parse_date(value: str, date_format: str) -> date:
+    """
+    Parse a date string, splitting the common day-first and ISO formats by hand
+    instead of going through strptime; other formats use strptime.
+    """
+    if date_format == '%d/%m/%Y':
+        parts = value.split('/')
+        if (len(parts) == 3 and value.isascii() and all(p.isdigit() for p in parts)
+                and len(parts[0]) <= 2 and len(parts[1]) <= 2 and len(parts[2]) == 4):
+            return date(int(parts[2]), int(parts[1]), int(parts[0]))
+    elif date_format == '%Y-%m-%d':
+        parts = value.split('-')
+        if (len(parts) == 3 and value.isascii() and all(p.isdigit() for p in parts)
+                and len(parts[0]) == 4 and len(parts[1]) <= 2 and len(parts[2]) <= 2):
+            return date(int(parts[0]), int(parts[1]), int(parts[2]))
+    
+    return datetime.strptime(value, date_format).date()
+
+
+def _parse_iso_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date, raising the same errors as strptime on bad input."""
+    if isinstance(value, str) and len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            if ciso8601 is not None:
+                return ciso8601.parse_datetime(value).date()
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+# Fuzzy patterns for common fields, used when a required field is not found
+_FUZZY_PATTERNS = {
+    field_name: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for field_name, patterns in {
+        'total_amount': [
+            r'total[:\s]*\$?([0-9,]+\.?[0-9]*)',
+            r'amount[:\s]*\$?([0-9,]+\.?[0-9]*)',
+            r'due[:\s]*\$?([0-9,]+\.?[0-9]*)',
+            r'\$([0-9,]+\.[0-9]{2})\s*(?:total|due|amount)'
+        ],
+        'invoice_date': [
+            r'(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})',
+            r'(\d{4}[/\-]\d{1,2}[/\-]\d{1,2})'
+        ],
+        'usage_quantity': [
+            r'([0-9,]+\.?[0-9]*)\s*kwh',
+            r'usage[:\s]*([0-9,]+\.?[0-9]*)',
+            r'consumption[:\s]*([0-9,]+\.?[0-9]*)'
+        ]
+    }.items()
+}
+
+
+@dataclass
+class ParseResult:
+    """Parsed invoice for one text; as_dict() gives the JSON-ready form."""
+    
+    # Declared by hand rather than slots=True to keep Python 3.9 support
+    __slots__ = ('provider_name', 'service_type', 'parsing_confidence', 'extracted_data',
+                 'validation_errors', 'parsing_warnings', 'template_version')
+    
+    provider_name: str
+    service_type: str
+    parsing_confidence: float
+    extracted_data: Dict[str, Any]
+    validation_errors: List[str]
+    parsing_warnings: List[str]
+    template_version: str
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the result as a plain dictionary for API responses."""
+        return {
+            'provider_name': self.provider_name,
+            'service_type': self.service_type,
+            'parsing_confidence': self.parsing_confidence,
+            'extracted_data': self.extracted_data,
+            'validation_errors': self.validation_errors,
+            'parsing_warnings': self.parsing_warnings,
+            'template_version': self.template_version
+        }
+
+
+def _attach_shared_memory(name: str):
+    """Attach to an existing shared memory segment without taking ownership of it."""
+    from multiprocessing import shared_memory
+    
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Older Pythons register attached segments too and unlink them when
+        # this process exits; readers must leave the segment in place
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(f'/{shm.name}', 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+def load_shared_templates(templates_path: Path, source_names: List[str], source_mtime: float) -> Optional[Dict]:
+    """
+    Return the templates published in shared memory, if they were built from the
+    same, unchanged template directory. Their patterns are still strings; the
+    caller compiles them.
+    """
+    segment_file = SHARED_MEMORY_DIR / SHARED_TEMPLATES_NAME
+    try:
+        if segment_file.exists() and not _owned_by_current_user(segment_file):
+            logger.warning(f"Ignoring shared templates {segment_file}: not owned by this user or writable by others")
+            return None
+        shm = _attach_shared_memory(SHARED_TEMPLATES_NAME)
+    except (FileNotFoundError, ImportError, OSError):
+        return None
+    
+    try:
+        (length,) = _SHARED_HEADER.unpack_from(shm.buf, 0)
+        with shm.buf[_SHARED_HEADER.size:_SHARED_HEADER.size + length] as view:
+            payload = _loads(view)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable shared templates: {e}")
+        return None
+    finally:
+        shm.close()
+    
+    if (payload.get('version') != TEMPLATE_CACHE_VERSION
+            or payload.get('path') != str(Path(templates_path).resolve())
+            or payload.get('sources') != source_names
+            or source_mtime > payload.get('mtime', 0.0)):
+        return None
+    
+    return payload['templates']
+
 
 class TemplateProcessor:
     """
@@ -23,7 +309,79 @@ class TemplateProcessor:
     def __init__(self, templates_path: str = "./config/templates"):
         self.templates_path = Path(templates_path)
         self.templates = {}
-        self.load_templates()
+        self._pattern_sets = {}
+        self._specialized = {}
+        self._template_files = {}
+        self._load_lock = threading.RLock()
+        self._index_templates()
+    
+    def _index_templates(self):
+        """
+        Map provider names to template files without loading them.
+        
+        Templates published to shared memory are used directly; otherwise each file
+        is only peeked at for its provider name and parsed on first use.
+        """
+        try:
+            if not self.templates_path.exists():
+                logger.error(f"Templates directory not found: {self.templates_path}")
+                return
+            
+            template_files = sorted(self.templates_path.glob("*.json"))
+            source_names = [p.name for p in template_files]
+            source_mtime = max((p.stat().st_mtime for p in template_files), default=0.0)
+            
+            shared_templates = load_shared_templates(self.templates_path, source_names, source_mtime)
+            if shared_templates is not None:
+                self.templates.update(self._compile_cached_templates(shared_templates))
+                logger.info(f"Attached {len(shared_templates)} templates from shared memory")
+                return
+            
+            for template_file in template_files:
+                provider = self._peek_provider(template_file)
+                if provider:
+                    self._template_files[provider] = template_file
+                else:
+                    # Provider not near the top of the file; load it fully instead
+                    provider, template_data = self._load_one(template_file)
+                    if provider:
+                        self._template_files[provider] = template_file
+                        self.templates[provider] = template_data
+            
+            logger.info(f"Indexed {len(self._template_files)} parsing templates")
+            
+        except Exception as e:
+            logger.error(f"Failed to index templates: {e}")
+    
+    def _peek_provider(self, template_file: Path) -> Optional[str]:
+        """Read the provider name from the start of a template file."""
+        try:
+            with open(template_file, 'rb') as f:
+                head = f.read(TEMPLATE_PEEK_BYTES)
+            match = _PROVIDER_PEEK.search(head)
+            if match:
+                return json.loads(match.group(1).decode('utf-8'))
+        except Exception as e:
+            logger.debug(f"Could not peek at template {template_file}: {e}")
+        return None
+    
+    def _ensure_template(self, provider: str) -> bool:
+        """Load a provider's template on first use; returns whether it is available."""
+        if provider in self.templates:
+            return True
+        
+        with self._load_lock:
+            if provider in self.templates:
+                return True
+            
+            template_file = self._template_files.get(provider)
+            if template_file is None:
+                return False
+            
+            loaded_provider, template_data = self._load_one(template_file)
+            if loaded_provider:
+                self.templates[loaded_provider] = template_data
+            return provider in self.templates
     
     def load_templates(self):
         """Load all parsing templates from the templates directory."""
@@ -32,31 +390,403 @@ class TemplateProcessor:
                 logger.error(f"Templates directory not found: {self.templates_path}")
                 return
             
-            for template_file in self.templates_path.glob("*.json"):
-                try:
-                    with open(template_file, 'r') as f:
-                        template_data = json.load(f)
-                    
-                    provider = template_data.get('provider')
+            template_files = sorted(self.templates_path.glob("*.json"))
+            
+            with self._load_lock:
+                # Overlap file reads and parsing; results are merged here, so no lock is needed
+                max_workers = max(1, min(8, os.cpu_count() or 1, len(template_files)))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    loaded = list(executor.map(self._load_one, template_files))
+                
+                for template_file, (provider, template_data) in zip(template_files, loaded):
                     if provider:
+                        self._template_files[provider] = template_file
                         self.templates[provider] = template_data
-                        logger.info(f"Loaded template for {provider}")
-                    else:
-                        logger.warning(f"Template missing provider name: {template_file}")
-                        
-                except Exception as e:
-                    logger.error(f"Failed to load template {template_file}: {e}")
+                
+                # Matchers and generated parsers refer to the replaced patterns
+                self._pattern_sets.clear()
+                self._specialized.clear()
             
             logger.info(f"Loaded {len(self.templates)} parsing templates")
             
         except Exception as e:
             logger.error(f"Failed to load templates: {e}")
     
+    def _load_one(self, template_file: Path) -> Tuple[Optional[str], Optional[Dict]]:
+        """Read, parse and compile one template file; returns (provider, template)."""
+        try:
+            if orjson is not None:
+                with open(template_file, 'rb') as f:
+                    template_data = orjson.loads(f.read())
+            else:
+                with open(template_file, 'r') as f:
+                    template_data = json.load(f)
+            
+            provider = template_data.get('provider')
+            if provider:
+                self._compile_patterns(provider, template_data)
+                logger.info(f"Loaded template for {provider}")
+                return provider, template_data
+            
+            logger.warning(f"Template missing provider name: {template_file}")
+            
+        except Exception as e:
+            logger.error(f"Failed to load template {template_file}: {e}")
+        
+        return None, None
+    
+    def _cache_source_payload(self, source_names: List[str], source_mtime: float) -> Dict:
+        """
+        The loaded templates in their JSON form, with the metadata used to validate them.
+        
+        Compiled patterns are stored as their pattern strings, invalid ones included,
+        and the derived matchers are left out; _compile_cached_templates rebuilds them.
+        """
+        templates = {}
+        for provider, template in self.templates.items():
+            patterns = {}
+            for field_name, pattern_config in template.get('patterns', {}).items():
+                source = {key: value for key, value in pattern_config.items()
+                          if key not in ('regex', 'invalid', 'fused', 'output')}
+                source['regex'] = ([p.pattern for p in pattern_config.get('regex', [])]
+                                   + [entry['pattern'] for entry in pattern_config.get('invalid', [])])
+                patterns[field_name] = source
+            templates[provider] = {**template, 'patterns': patterns}
+        
+        return {
+            'version': TEMPLATE_CACHE_VERSION,
+            'path': str(self.templates_path.resolve()),
+            'sources': source_names,
+            'mtime': source_mtime,
+            'templates': templates
+        }
+    
+    def _compile_cached_templates(self, templates: Dict) -> Dict:
+        """Compile the patterns of templates read back from shared memory."""
+        for provider, template_data in templates.items():
+            self._compile_patterns(provider, template_data)
+        return templates
+    
+    def export_compiled(self) -> bytes:
+        """
+        Load every template and return the set as a JSON blob.
+        
+        Used by compile_templates.py to publish templates to shared memory.
+        """
+        self.load_templates()
+        template_files = sorted(self.templates_path.glob("*.json"))
+        source_names = [p.name for p in template_files]
+        source_mtime = max((p.stat().st_mtime for p in template_files), default=0.0)
+        return _dumps(self._cache_source_payload(source_names, source_mtime))
+    
+    def _compile_patterns(self, provider: str, template_data: Dict):
+        """
+        Replace each field's regex strings with compiled pattern objects and
+        resolve the post-processing that applies to the field.
+        
+        Patterns that fail to compile are kept under 'invalid' with their error,
+        so parsing and test_template can still report them.
+        """
+        post_config = template_data.get('post_processing', {})
+        for field_name, pattern_config in template_data.get('patterns', {}).items():
+            pattern_config['output'] = self._output_transform(field_name, post_config)
+            compiled = []
+            invalid = []
+            for pattern in pattern_config.get('regex', []):
+                try:
+                    compiled.append(re.compile(pattern, _pattern_flags(pattern)))
+                except re.error as e:
+                    logger.error(f"Invalid regex pattern for {provider}.{field_name}: {pattern} - {e}")
+                    invalid.append({'pattern': pattern, 'error': str(e)})
+            pattern_config['regex'] = compiled
+            pattern_config['invalid'] = invalid
+            pattern_config['fused'] = self._fuse_patterns(compiled)
+    
+    def _output_transform(self, field_name: str, post_config: Dict) -> Optional[Tuple]:
+        """
+        Resolve post-processing for one field at load time.
+        
+        Returns (amount multiplier, round digits, date format), or None when the
+        field is left as converted.
+        """
+        multiplier = post_config.get('amount_multiplier', 1.0) if field_name in _MULTIPLIED_FIELDS else 1.0
+        round_digits = post_config.get('round_decimals', 2) if field_name in _ROUNDED_FIELDS else None
+        date_format = post_config.get('date_format', '%Y-%m-%d') if field_name in _DATE_FIELDS else None
+        
+        if multiplier == 1.0 and round_digits is None and date_format is None:
+            return None
+        return multiplier, round_digits, date_format
+    
+    def _fuse_patterns(self, compiled: List[re.Pattern]) -> Optional[re.Pattern]:
+        """
+        Join a field's patterns into one alternation with a named group per branch.
+        
+        A single search then tells whether any pattern matches and which branch
+        fired first. Returns None for single-pattern fields, for patterns using
+        back-references or named groups, which would break when renumbered, and
+        when a pattern has no capture group, as its value is read from the group
+        following the branch's own.
+        """
+        if len(compiled) < 2 or any(p.groups == 0 or _UNFUSABLE.search(p.pattern) for p in compiled):
+            return None
+        try:
+            branches = []
+            for idx, p in enumerate(compiled):
+                # Each branch keeps its own flags as a scoped inline group
+                scoped = ('i' if p.flags & re.IGNORECASE else '') + ('m' if p.flags & re.MULTILINE else '')
+                body = f'(?{scoped}:{p.pattern})' if scoped else p.pattern
+                branches.append(f'(?P<p{idx}>{body})')
+            return re.compile('|'.join(branches))
+        except re.error:
+            return None
+    
+    def _build_pattern_set(self, provider: str, template_data: Dict) -> Optional[Tuple]:
+        """
+        Build a multi-pattern matcher that reports every template pattern
+        occurring in a text after a single pass.
+        
+        Uses Hyperscan when installed, otherwise an RE2 set. Returns
+        (matcher, id -> (field, index) map, patterns the engine could not take),
+        or None when neither engine is available.
+        """
+        entries = [
+            ((field_name, idx), pattern.pattern)
+            for field_name, pattern_config in template_data.get('patterns', {}).items()
+            for idx, pattern in enumerate(pattern_config.get('regex', []))
+        ]
+        
+        if hyperscan is not None:
+            matcher = self._build_hyperscan_matcher(provider, entries)
+            if matcher is not None:
+                return matcher
+        
+        if re2 is not None:
+            return self._build_re2_matcher(provider, entries)
+        
+        return None
+    
+    def _build_hyperscan_matcher(self, provider: str, entries: List[Tuple]) -> Optional[Tuple]:
+        """Compile a block-mode Hyperscan database over the template patterns."""
+        try:
+            flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SINGLEMATCH
+            supported = []
+            unsupported = set()
+            
+            # A bad expression fails the whole database, so vet each one first
+            for key, pattern in entries:
+                try:
+                    probe = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+                    probe.compile(expressions=[pattern.encode()], flags=[flags])
+                    supported.append((key, pattern))
+                except Exception:
+                    # Back-references, lookarounds etc. stay on the re path
+                    unsupported.add(key)
+            
+            if not supported:
+                return None
+            
+            database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            database.compile(
+                expressions=[pattern.encode() for _, pattern in supported],
+                ids=list(range(len(supported))),
+                elements=len(supported),
+                flags=[flags] * len(supported)
+            )
+            id_map = {set_id: key for set_id, (key, _) in enumerate(supported)}
+            scan_lock = threading.Lock()  # the database's scratch space is not thread-safe
+            
+            def match(text: str) -> List[int]:
+                matched = []
+                
+                def on_match(set_id, start, end, match_flags, context):
+                    matched.append(set_id)
+                
+                with scan_lock:
+                    database.scan(text.encode('ascii'), match_event_handler=on_match)
+                return matched
+            
+            return match, id_map, unsupported
+            
+        except Exception as e:
+            logger.warning(f"Could not build Hyperscan database for {provider}: {e}")
+            return None
+    
+    def _build_re2_matcher(self, provider: str, entries: List[Tuple]) -> Optional[Tuple]:
+        """Compile an RE2 search set over the template patterns."""
+        try:
+            options = re2.Options()
+            options.case_sensitive = False
+            pattern_set = re2.Set.SearchSet(options)
+            id_map = {}
+            unsupported = set()
+            
+            for key, pattern in entries:
+                try:
+                    # Multi-line so ^/$ never match less than the Python pattern
+                    set_id = pattern_set.Add('(?m)' + pattern)
+                    id_map[set_id] = key
+                except Exception:
+                    # Lookarounds, back-references etc. stay on the re path
+                    unsupported.add(key)
+            
+            pattern_set.Compile()
+            return (lambda text: pattern_set.Match(text) or ()), id_map, unsupported
+            
+        except Exception as e:
+            logger.warning(f"Could not build RE2 pattern set for {provider}: {e}")
+            return None
+    
+    def _match_pattern_set(self, provider: str, text: str) -> Optional[Dict[str, set]]:
+        """
+        Scan text once with the provider's multi-pattern matcher.
+        
+        Returns field name -> pattern indices worth trying, or None when every
+        pattern should be tried (no matcher, or non-ASCII text where the
+        engines' character classes can differ from Python's).
+        """
+        if provider not in self._pattern_sets:
+            with self._load_lock:
+                if provider not in self._pattern_sets:
+                    self._pattern_sets[provider] = self._build_pattern_set(provider, self.templates[provider])
+        
+        pattern_set = self._pattern_sets[provider]
+        if pattern_set is None or not text.isascii():
+            return None
+        
+        match, id_map, unsupported = pattern_set
+        candidates = {}
+        for field_name, idx in unsupported:
+            candidates.setdefault(field_name, set()).add(idx)
+        for set_id in match(text):
+            field_name, idx = id_map[set_id]
+            candidates.setdefault(field_name, set()).add(idx)
+        return candidates
+    
+    def _get_specialized(self, provider: str):
+        """Return the provider's generated parser, building it on first use."""
+        if provider not in self._specialized:
+            with self._load_lock:
+                if provider not in self._specialized:
+                    self._specialized[provider] = self._build_specialized(provider, self.templates[provider])
+        return self._specialized[provider]
+    
+    def _build_specialized(self, provider: str, template: Dict):
+        """
+        Generate a straight-line extraction function for one template.
+        
+        The field loop of _extract_field is unrolled into source with every
+        pattern, converter and message bound as a constant, then compiled once.
+        The function takes (text, candidates) and returns (extracted data,
+        confidences, warnings, missing required field errors). Returns None
+        when the template cannot be specialized, leaving the generic path.
+        """
+        try:
+            namespace = {'logger': logger, 'MISS': object(), 'FUZZY': self._fuzzy_extract_field}
+            lines = [
+                'def parse(text, candidates):',
+                '    data = {}',
+                '    scores = []',
+                '    warnings = []',
+                '    errors = []',
+            ]
+            
+            for i, (field_name, pattern_config) in enumerate(template.get('patterns', {}).items()):
+                patterns = pattern_config.get('regex', [])
+                if not all(isinstance(p, re.Pattern) for p in patterns):
+                    return None
+                
+                namespace[f'N{i}'] = field_name
+                namespace[f'C{i}'] = partial(self._convert_value, field_type=pattern_config.get('type', 'string'),
+                                             config=pattern_config)
+                namespace[f'W{i}'] = f" for field '{field_name}'"
+                namespace[f'IW{i}'] = _invalid_pattern_warnings(pattern_config)
+                lines += [
+                    f'    # {field_name!r}',
+                    '    value = None',
+                    f'    fw = list(IW{i})' if namespace[f'IW{i}'] else '    fw = []',
+                    f'    cand = None if candidates is None else candidates.get(N{i}, ())',
+                ]
+                
+                fused = pattern_config.get('fused')
+                if fused is not None:
+                    namespace[f'F{i}'] = fused
+                    lines += [
+                        '    branch = -1',
+                        '    if cand is None:',
+                        f'        m = F{i}.search(text)',
+                        '        if m is None:',
+                        '            cand = ()',
+                        '        else:',
+                        '            branch = int(m.lastgroup[1:])',
+                        '            fm = m',
+                    ]
+                
+                for idx, pattern in enumerate(patterns):
+                    namespace[f'P{i}_{idx}'] = pattern
+                    guard = '(cand is None or {0} in cand)'.format(idx)
+                    lines.append(f'    if {guard}:' if idx == 0 else f'    if value is None and {guard}:')
+                    if fused is not None:
+                        lines += [
+                            f'        if branch == {idx}:',
+                            f'            raw = fm.group(F{i}.groupindex[fm.lastgroup] + 1)',
+                            '        else:',
+                            f'            m = P{i}_{idx}.search(text)',
+                            '            raw = m.group(1) if m is not None else MISS',
+                        ]
+                    else:
+                        lines += [
+                            f'        m = P{i}_{idx}.search(text)',
+                            '        raw = m.group(1) if m is not None else MISS',
+                        ]
+                    # MISS marks no match; a capture group can legitimately be None
+                    lines += [
+                        '        if raw is not MISS:',
+                        f'            value = C{i}(raw)',
+                        '            if value is not None:',
+                        f'                logger.debug("Extracted %s: %s using pattern: %s", N{i}, value, P{i}_{idx}.pattern)',
+                        '            else:',
+                        f'                fw.append(f"Failed to convert \'{{raw}}\'" + W{i})',
+                    ]
+                
+                lines += [
+                    '    if value is not None:',
+                    f'        data[N{i}] = value',
+                    '        scores.append(1.0)',
+                ]
+                if pattern_config.get('required', False):
+                    namespace[f'CFG{i}'] = pattern_config
+                    namespace[f'FW{i}'] = f"Used fuzzy matching for {field_name}"
+                    namespace[f'E{i}'] = f"Required field '{field_name}' not found"
+                    lines += [
+                        '    else:',
+                        f'        fuzzy = FUZZY(text, N{i}, CFG{i})',
+                        "        if fuzzy['value'] is not None:",
+                        f"            data[N{i}] = fuzzy['value']",
+                        "            scores.append(fuzzy['confidence'])",
+                        "            fw = fuzzy['warnings']",
+                        f'            fw.append(FW{i})',
+                        '        else:',
+                        f'            errors.append(E{i})',
+                    ]
+                lines += [
+                    '    if fw:',
+                    '        warnings.extend(fw)',
+                ]
+            
+            lines.append('    return data, scores, warnings, errors')
+            code = compile('\n'.join(lines) + '\n', f'<template:{provider}>', 'exec')
+            exec(code, namespace)
+            return namespace['parse']
+        
+        except Exception as e:
+            logger.warning(f"Could not specialize parser for {provider}: {e}")
+            return None
+    
     def get_available_providers(self) -> List[str]:
         """Get list of providers with available templates."""
-        return list(self.templates.keys())
+        return list(dict.fromkeys([*self.templates, *self._template_files]))
     
-    def parse_invoice(self, text: str, provider: str) -> Dict[str, Any]:
+    def parse_invoice(self, text: str, provider: str) -> ParseResult:
         """
         Parse invoice text using provider-specific template.
         
@@ -65,88 +795,187 @@ class TemplateProcessor:
             provider: Provider name (must match template)
             
         Returns:
-            Dictionary with parsed invoice data
+            ParseResult with parsed invoice data
         """
-        if provider not in self.templates:
+        if not self._ensure_template(provider):
             raise ValueError(f"No template available for provider: {provider}")
         
         template = self.templates[provider]
-        patterns = template.get('patterns', {})
+        field_items = list(template.get('patterns', {}).items())
+        return self._parse_with_template(text, provider, template, field_items)
+    
+    def parse_invoices_batch(self, texts: List[str], provider: str) -> List[ParseResult]:
+        """
+        Parse many invoice texts from the same provider.
         
-        result = {
-            'provider_name': provider,
-            'service_type': template.get('service_type', 'Unknown'),
-            'parsing_confidence': 0.0,
-            'extracted_data': {},
-            'validation_errors': [],
-            'parsing_warnings': [],
-            'template_version': template.get('version', '1.0')
-        }
+        The template and its field list are resolved once for the whole batch.
+        
+        Args:
+            texts: Extracted texts from PDFs
+            provider: Provider name (must match template)
+            
+        Returns:
+            List of ParseResult objects, in input order
+        """
+        if not self._ensure_template(provider):
+            raise ValueError(f"No template available for provider: {provider}")
+        
+        template = self.templates[provider]
+        field_items = list(template.get('patterns', {}).items())
+        
+        if np is None:
+            results = [
+                self._parse_with_template(text, provider, template, field_items, validate=False)
+                for text in texts
+            ]
+        else:
+            # Per-field confidences land in one (invoices x fields) array; the
+            # means are then computed in a single vectorised reduction
+            scores = np.zeros((len(texts), len(field_items)), dtype=np.float64)
+            counts = np.zeros(len(texts), dtype=np.int64)
+            results = [
+                self._parse_with_template(text, provider, template, field_items, validate=False,
+                                          confidence=(scores, counts, row))
+                for row, text in enumerate(texts)
+            ]
+            means = scores.sum(axis=1) / np.maximum(counts, 1)
+            for result, mean in zip(results, means.tolist()):
+                result.parsing_confidence = mean
+        
+        for result, errors in zip(results, self.validate_batch([r.extracted_data for r in results], provider)):
+            result.validation_errors.extend(errors)
+        
+        return results
+    
+    def _parse_with_template(self, text: str, provider: str, template: Dict,
+                             field_items: List[Tuple[str, Dict]], validate: bool = True,
+                             confidence: Optional[Tuple] = None) -> ParseResult:
+        """
+        Parse one invoice text against an already resolved template.
+        
+        When confidence is given as (scores, counts, row), field confidences are
+        written into that batch array row and the mean is left to the caller.
+        """
+        result = ParseResult(
+            provider_name=provider,
+            service_type=template.get('service_type', 'Unknown'),
+            parsing_confidence=0.0,
+            extracted_data={},
+            validation_errors=[],
+            parsing_warnings=[],
+            template_version=template.get('version', '1.0')
+        )
         
         # Extract data using patterns
         extracted_data = {}
         confidence_scores = []
+        candidates = self._match_pattern_set(provider, text)
         
-        for field_name, pattern_config in patterns.items():
-            field_result = self._extract_field(text, field_name, pattern_config)
-            
-            if field_result['value'] is not None:
-                extracted_data[field_name] = field_result['value']
-                confidence_scores.append(field_result['confidence'])
-            elif pattern_config.get('required', False):
-                result['validation_errors'].append(f"Required field '{field_name}' not found")
-            
-            if field_result['warnings']:
-                result['parsing_warnings'].extend(field_result['warnings'])
+        # The generated parser covers the template's full field list
+        specialized = self._get_specialized(provider) if len(field_items) == len(template.get('patterns', {})) else None
+        if specialized is not None:
+            try:
+                extracted_data, confidence_scores, warnings, errors = specialized(text, candidates)
+                result.validation_errors.extend(errors)
+                result.parsing_warnings.extend(warnings)
+            except Exception as e:
+                # e.g. a pattern without a capture group; the generic loop reports it per field
+                logger.debug(f"Specialized parser failed for {provider}, using generic path: {e}")
+                specialized = None
+                extracted_data, confidence_scores = {}, []
         
-        result['extracted_data'] = extracted_data
-        result['parsing_confidence'] = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
+        if specialized is None:
+            for field_name, pattern_config in field_items:
+                field_result = self._extract_field(
+                    text, field_name, pattern_config,
+                    None if candidates is None else candidates.get(field_name, ())
+                )
+                
+                if field_result['value'] is not None:
+                    extracted_data[field_name] = field_result['value']
+                    confidence_scores.append(field_result['confidence'])
+                elif pattern_config.get('required', False):
+                    result.validation_errors.append(f"Required field '{field_name}' not found")
+                
+                if field_result['warnings']:
+                    result.parsing_warnings.extend(field_result['warnings'])
         
-        # Apply post-processing
-        post_processing = template.get('post_processing', {})
-        processed_data = self._apply_post_processing(extracted_data, post_processing)
-        result['extracted_data'] = processed_data
+        if confidence is not None:
+            scores, counts, row = confidence
+            scores[row, :len(confidence_scores)] = confidence_scores
+            counts[row] = len(confidence_scores)
+        
+        # Values are already post-processed by _convert_value
+        result.extracted_data = extracted_data
+        result.parsing_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
         
         # Validate extracted data
-        validation_errors = self._validate_extracted_data(processed_data, template)
-        result['validation_errors'].extend(validation_errors)
+        if validate:
+            validation_errors = self._validate_extracted_data(extracted_data, template)
+            result.validation_errors.extend(validation_errors)
         
         return result
     
-    def _extract_field(self, text: str, field_name: str, pattern_config: Dict) -> Dict:
-        """Extract a single field using its pattern configuration."""
+    def _extract_field(self, text: str, field_name: str, pattern_config: Dict,
+                       candidates: Optional[set] = None) -> Dict:
+        """
+        Extract a single field using its pattern configuration.
+        
+        Args:
+            text: Invoice text
+            field_name: Field being extracted
+            pattern_config: Template configuration for the field
+            candidates: Indices of patterns known to match (None tries all)
+        """
         result = {
             'value': None,
             'confidence': 0.0,
-            'warnings': []
+            'warnings': list(_invalid_pattern_warnings(pattern_config))
         }
         
         regex_patterns = pattern_config.get('regex', [])
         field_type = pattern_config.get('type', 'string')
         required = pattern_config.get('required', False)
         
+        # One pass over the fused alternation: a miss rules out every pattern, a hit
+        # gives the leftmost match of the branch that fired. Earlier branches may
+        # still match further along the text, so they are searched individually.
+        fused_branch = None
+        fused = pattern_config.get('fused')
+        if candidates is None and fused is not None:
+            fused_match = fused.search(text)
+            if fused_match is None:
+                candidates = ()
+            else:
+                fused_branch = int(fused_match.lastgroup[1:])
+        
         # Try each regex pattern
-        for pattern in regex_patterns:
+        for idx, pattern in enumerate(regex_patterns):
+            if candidates is not None and idx not in candidates:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                
-                if match:
+                if idx == fused_branch:
+                    raw_value = fused_match.group(fused.groupindex[fused_match.lastgroup] + 1)
+                else:
+                    match = pattern.search(text)
+                    if not match:
+                        continue
                     raw_value = match.group(1)
+                
+                # Convert to appropriate type
+                converted_value = self._convert_value(raw_value, field_type, pattern_config)
+                
+                if converted_value is not None:
+                    result['value'] = converted_value
+                    result['confidence'] = 1.0  # Full confidence for successful regex match
                     
-                    # Convert to appropriate type
-                    converted_value = self._convert_value(raw_value, field_type, pattern_config)
-                    
-                    if converted_value is not None:
-                        result['value'] = converted_value
-                        result['confidence'] = 1.0  # Full confidence for successful regex match
-                        
-                        logger.debug(f"Extracted {field_name}: {converted_value} using pattern: {pattern}")
-                        break
-                    else:
-                        result['warnings'].append(f"Failed to convert '{raw_value}' for field '{field_name}'")
+                    logger.debug(f"Extracted {field_name}: {converted_value} using pattern: {pattern.pattern}")
+                    break
+                else:
+                    result['warnings'].append(f"Failed to convert '{raw_value}' for field '{field_name}'")
                 
             except re.error as e:
-                logger.error(f"Invalid regex pattern for {field_name}: {pattern} - {e}")
+                logger.error(f"Invalid regex pattern for {field_name}: {pattern.pattern} - {e}")
                 result['warnings'].append(f"Invalid regex pattern: {e}")
             except Exception as e:
                 logger.error(f"Error extracting {field_name}: {e}")
@@ -168,7 +997,7 @@ class TemplateProcessor:
             
             if field_type == 'decimal':
                 # Remove commas and currency symbols
-                cleaned = re.sub(r'[,$\s]', '', raw_value)
+                cleaned = raw_value.translate(_DECIMAL_DELETE)
                 value = float(cleaned)
                 
                 # Apply validation if specified
@@ -183,23 +1012,35 @@ class TemplateProcessor:
                 if max_val is not None and value > max_val:
                     logger.warning(f"Value {value} above maximum {max_val}")
                     return None
-                
-                return value
             
             elif field_type == 'date':
                 date_format = config.get('format', '%d/%m/%Y')
-                return datetime.strptime(raw_value, date_format).date()
+                value = _parse_date(raw_value, date_format)
             
             elif field_type == 'integer':
-                cleaned = re.sub(r'[,\s]', '', raw_value)
-                return int(cleaned)
+                cleaned = raw_value.translate(_INT_DELETE)
+                value = int(cleaned)
             
             elif field_type == 'string':
-                return raw_value
+                value = raw_value
             
             else:
                 logger.warning(f"Unknown field type: {field_type}")
-                return raw_value
+                value = raw_value
+            
+            # Apply the field's post-processing (multiplier, rounding, date format)
+            output = config.get('output')
+            if output is not None:
+                multiplier, round_digits, date_format = output
+                if isinstance(value, (int, float)):
+                    if multiplier != 1.0:
+                        value *= multiplier
+                    if round_digits is not None:
+                        value = round(value, round_digits)
+                elif date_format is not None and hasattr(value, 'strftime'):
+                    value = value.strftime(date_format)
+            
+            return value
         
         except (ValueError, InvalidOperation) as e:
             logger.warning(f"Failed to convert '{raw_value}' to {field_type}: {e}")
@@ -216,73 +1057,23 @@ class TemplateProcessor:
             'warnings': []
         }
         
-        # Define fuzzy patterns for common fields
-        fuzzy_patterns = {
-            'total_amount': [
-                r'total[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                r'amount[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                r'due[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                r'\$([0-9,]+\.[0-9]{2})\s*(?:total|due|amount)'
-            ],
-            'invoice_date': [
-                r'(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})',
-                r'(\d{4}[/\-]\d{1,2}[/\-]\d{1,2})'
-            ],
-            'usage_quantity': [
-                r'([0-9,]+\.?[0-9]*)\s*kwh',
-                r'usage[:\s]*([0-9,]+\.?[0-9]*)',
-                r'consumption[:\s]*([0-9,]+\.?[0-9]*)'
-            ]
-        }
-        
-        if field_name in fuzzy_patterns:
-            for pattern in fuzzy_patterns[field_name]:
-                try:
-                    match = re.search(pattern, text, re.IGNORECASE)
-                    if match:
-                        raw_value = match.group(1)
-                        converted_value = self._convert_value(raw_value, config.get('type', 'string'), config)
-                        
-                        if converted_value is not None:
-                            result['value'] = converted_value
-                            result['confidence'] = 0.6  # Lower confidence for fuzzy matches
-                            logger.info(f"Fuzzy extraction for {field_name}: {converted_value}")
-                            break
-                
-                except Exception as e:
-                    logger.warning(f"Fuzzy extraction error for {field_name}: {e}")
-        
-        return result
-    
-    def _apply_post_processing(self, data: Dict, post_config: Dict) -> Dict:
-        """Apply post-processing rules to extracted data."""
-        processed = data.copy()
-        
-        try:
-            # Apply amount multiplier
-            amount_multiplier = post_config.get('amount_multiplier', 1.0)
-            if amount_multiplier != 1.0 and 'total_amount' in processed:
-                processed['total_amount'] *= amount_multiplier
-                
-            if amount_multiplier != 1.0 and 'service_charge' in processed:
-                processed['service_charge'] *= amount_multiplier
-            
-            # Round decimal values
-            round_decimals = post_config.get('round_decimals', 2)
-            for field in ['total_amount', 'usage_rate', 'service_charge']:
-                if field in processed and isinstance(processed[field], (int, float)):
-                    processed[field] = round(processed[field], round_decimals)
-            
-            # Ensure date fields are strings for JSON serialization
-            date_format = post_config.get('date_format', '%Y-%m-%d')
-            for field in ['invoice_date', 'billing_period_start', 'billing_period_end']:
-                if field in processed and hasattr(processed[field], 'strftime'):
-                    processed[field] = processed[field].strftime(date_format)
+        for pattern in _FUZZY_PATTERNS.get(field_name, ()):
+            try:
+                match = pattern.search(text)
+                if match:
+                    raw_value = match.group(1)
+                    converted_value = self._convert_value(raw_value, config.get('type', 'string'), config)
+                    
+                    if converted_value is not None:
+                        result['value'] = converted_value
+                        result['confidence'] = 0.6  # Lower confidence for fuzzy matches
+                        logger.info(f"Fuzzy extraction for {field_name}: {converted_value}")
+                        break
             
-        except Exception as e:
-            logger.error(f"Post-processing error: {e}")
+            except Exception as e:
+                logger.warning(f"Fuzzy extraction error for {field_name}: {e}")
         
-        return processed
+        return result
     
     def _validate_extracted_data(self, data: Dict, template: Dict) -> List[str]:
         """Validate extracted data against template rules."""
@@ -303,21 +1094,7 @@ class TemplateProcessor:
             
             # Check date sequence
             if validation_rules.get('date_sequence_check', False):
-                if 'billing_period_start' in data and 'billing_period_end' in data:
-                    try:
-                        start_date = datetime.strptime(data['billing_period_start'], '%Y-%m-%d').date()
-                        end_date = datetime.strptime(data['billing_period_end'], '%Y-%m-%d').date()
-                        
-                        if start_date >= end_date:
-                            errors.append("Billing period start date is not before end date")
-                        
-                        # Check if period is reasonable (1-100 days)
-                        period_days = (end_date - start_date).days
-                        if period_days < 1 or period_days > 100:
-                            errors.append(f"Billing period length unusual: {period_days} days")
-                    
-                    except ValueError as e:
-                        errors.append(f"Date validation error: {e}")
+                errors.extend(self._check_date_sequence(data))
             
             # Check reasonable rates
             if validation_rules.get('reasonable_rates_check', False):
@@ -325,15 +1102,8 @@ class TemplateProcessor:
                     rate = data['usage_rate']
                     service_type = template.get('service_type', '').lower()
                     
-                    # Define reasonable rate ranges by service type
-                    reasonable_ranges = {
-                        'electricity': (0.10, 0.60),  # $/kWh
-                        'gas': (0.02, 0.10),          # $/MJ
-                        'water': (0.001, 0.01)        # $/L
-                    }
-                    
-                    if service_type in reasonable_ranges:
-                        min_rate, max_rate = reasonable_ranges[service_type]
+                    if service_type in _REASONABLE_RATE_RANGES:
+                        min_rate, max_rate = _REASONABLE_RATE_RANGES[service_type]
                         if not (min_rate <= rate <= max_rate):
                             errors.append(f"Usage rate ${rate:.3f} outside reasonable range for {service_type}")
         
@@ -343,9 +1113,104 @@ class TemplateProcessor:
         
         return errors
     
+    def _check_date_sequence(self, data: Dict) -> List[str]:
+        """Check the billing period dates are ordered and of a plausible length."""
+        errors = []
+        if 'billing_period_start' in data and 'billing_period_end' in data:
+            try:
+                start_date = _parse_iso_date(data['billing_period_start'])
+                end_date = _parse_iso_date(data['billing_period_end'])
+                
+                if start_date >= end_date:
+                    errors.append("Billing period start date is not before end date")
+                
+                # Check if period is reasonable (1-100 days)
+                period_days = (end_date - start_date).days
+                if period_days < 1 or period_days > 100:
+                    errors.append(f"Billing period length unusual: {period_days} days")
+            
+            except ValueError as e:
+                errors.append(f"Date validation error: {e}")
+        return errors
+    
+    def validate_batch(self, records: List[Dict], provider: str) -> List[List[str]]:
+        """
+        Validate many extracted records for one provider at once.
+        
+        The numeric correlation and rate checks run over contiguous arrays
+        (numba-compiled when available, otherwise numpy); messages are only
+        formatted for failing rows. Falls back to per-record validation when
+        numpy is not installed.
+        
+        Args:
+            records: Extracted data dictionaries
+            provider: Provider name (must match template)
+            
+        Returns:
+            Validation errors for each record, in input order
+        """
+        if not self._ensure_template(provider):
+            raise ValueError(f"No template available for provider: {provider}")
+        
+        template = self.templates[provider]
+        if np is None or not records:
+            return [self._validate_extracted_data(data, template) for data in records]
+        
+        validation_rules = template.get('post_processing', {}).get('validation_rules', {})
+        check_correlation = validation_rules.get('amount_usage_correlation', False)
+        check_dates = validation_rules.get('date_sequence_check', False)
+        service_type = template.get('service_type', '').lower()
+        check_rates = (validation_rules.get('reasonable_rates_check', False)
+                       and service_type in _REASONABLE_RATE_RANGES)
+        min_rate, max_rate = _REASONABLE_RATE_RANGES.get(service_type, (-np.inf, np.inf))
+        
+        # AoS -> SoA; rows the arrays cannot represent faithfully use the scalar path
+        n = len(records)
+        usage = np.full(n, np.nan)
+        rate = np.full(n, np.nan)
+        total = np.full(n, np.nan)
+        has_all = np.zeros(n, dtype=bool)
+        has_rate = np.zeros(n, dtype=bool)
+        scalar_rows = set()
+        
+        for i, data in enumerate(records):
+            values = (data.get('usage_quantity'), data.get('usage_rate'), data.get('total_amount'))
+            if any(v is not None and (isinstance(v, bool) or not isinstance(v, (int, float))) for v in values):
+                scalar_rows.add(i)
+                continue
+            if values[0] is not None:
+                usage[i] = values[0]
+            if values[1] is not None:
+                rate[i] = values[1]
+                has_rate[i] = True
+            if values[2] is not None:
+                total[i] = values[2]
+            has_all[i] = 'usage_quantity' in data and 'usage_rate' in data and 'total_amount' in data
+            if has_all[i] and check_correlation and values[2] == 0:
+                scalar_rows.add(i)
+        
+        expected, bad_correlation, bad_rate = _numeric_checks(usage, rate, total, min_rate, max_rate)
+        
+        results = []
+        for i, data in enumerate(records):
+            if i in scalar_rows:
+                results.append(self._validate_extracted_data(data, template))
+                continue
+            
+            errors = []
+            if check_correlation and has_all[i] and bad_correlation[i]:
+                errors.append(f"Amount/usage correlation check failed: expected ~${float(expected[i]):.2f}, got ${float(total[i]):.2f}")
+            if check_dates:
+                errors.extend(self._check_date_sequence(data))
+            if check_rates and has_rate[i] and bad_rate[i]:
+                errors.append(f"Usage rate ${float(rate[i]):.3f} outside reasonable range for {service_type}")
+            results.append(errors)
+        
+        return results
+    
     def get_template_info(self, provider: str) -> Dict:
         """Get information about a specific template."""
-        if provider not in self.templates:
+        if not self._ensure_template(provider):
             return {}
         
         template = self.templates[provider]
@@ -373,7 +1238,7 @@ class TemplateProcessor:
         Returns:
             Detailed parsing results for debugging
         """
-        if provider not in self.templates:
+        if not self._ensure_template(provider):
             return {'error': f'Template not found for provider: {provider}'}
         
         result = self.parse_invoice(sample_text, provider)
@@ -384,32 +1249,41 @@ class TemplateProcessor:
         
         debug_info = {
             'template_info': self.get_template_info(provider),
-            'parsing_result': result,
+            'parsing_result': result.as_dict(),
             'field_details': {}
         }
         
         # Test each pattern individually
         for field_name, pattern_config in patterns.items():
+            invalid = pattern_config.get('invalid', [])
             field_debug = {
-                'patterns_tested': pattern_config.get('regex', []),
+                'patterns_tested': [p.pattern for p in pattern_config.get('regex', [])]
+                                   + [entry['pattern'] for entry in invalid],
                 'matches_found': [],
                 'conversion_attempts': []
             }
             
             for pattern in pattern_config.get('regex', []):
-                try:
-                    matches = re.findall(pattern, sample_text, re.IGNORECASE | re.MULTILINE)
-                    if matches:
-                        field_debug['matches_found'].append({
-                            'pattern': pattern,
-                            'matches': matches
-                        })
-                except re.error as e:
+                # Same shape as findall(), but stop after a few examples
+                matches = []
+                for match in islice(pattern.finditer(sample_text), TEST_MATCH_LIMIT):
+                    if pattern.groups == 0:
+                        matches.append(match.group(0))
+                    elif pattern.groups == 1:
+                        matches.append(match.group(1) or '')
+                    else:
+                        matches.append(match.groups(''))
+                if matches:
                     field_debug['matches_found'].append({
-                        'pattern': pattern,
-                        'error': str(e)
+                        'pattern': pattern.pattern,
+                        'matches': matches
                     })
             
+            # Patterns rejected when the template was compiled
+            field_debug['matches_found'].extend(
+                {'pattern': entry['pattern'], 'error': entry['error']} for entry in invalid
+            )
+            
             debug_info['field_details'][field_name] = field_debug
         
         return debug_info
\ No newline at end of file
@@ -72,6 +72,7 @@ setup(
             "utilities-tracker=local_dev.init_db:main",
             "ut-fetch=email_fetcher.fetch_invoices:main",
             "ut-parse=pdf_parser.parse_pdfs:main",
+            "ut-compile-templates=pdf_parser.compile_templates:main",
             "ut-serve=web_app.backend.app:main",
         ],
     },
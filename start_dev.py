@@ -40,8 +40,10 @@ def start_servers():
         backend_cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        universal_newlines=True,
-        preexec_fn=os.setsid if hasattr(os, 'setsid') else None
+        text=True,
+        bufsize=1,
+        close_fds=False,
+        start_new_session=hasattr(os, 'setsid')
     )
     
     # Wait a moment for backend to start
@@ -60,8 +62,10 @@ def start_servers():
         frontend_cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        universal_newlines=True,
-        preexec_fn=os.setsid if hasattr(os, 'setsid') else None
+        text=True,
+        bufsize=1,
+        close_fds=False,
+        start_new_session=hasattr(os, 'setsid')
     )
     
     print("\n✅ Development servers started!")
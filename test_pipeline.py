@@ -2,128 +2,205 @@
 """
 Test script for the complete utility invoice processing pipeline.
 Tests email fetching, PDF parsing, and data integration.
+
+Run with pytest; `make test` spreads the tests across workers with pytest-xdist.
 """
 
 import sys
-import os
 import logging
+import importlib.util
 from pathlib import Path
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+import pytest
+
 logger = logging.getLogger(__name__)
 
-# Add project root to path
 project_root = Path(__file__).parent
-sys.path.append(str(project_root))
 
-def test_imports():
-    """Test that all modules can be imported successfully."""
-    logger.info("Testing module imports...")
-    
-    try:
-        from email_fetcher import EmailService, StorageAdapter, AuthAdapter
-        logger.info("✅ Email fetcher modules imported successfully")
-    except Exception as e:
-        logger.error(f"❌ Email fetcher import failed: {e}")
+DB_PATH = "./data/invoices.db"
+
+
+def _database_initialised() -> bool:
+    """Check whether local_dev/init_db.py has created the invoices schema."""
+    if not Path(DB_PATH).exists():
         return False
     
-    try:
-        from pdf_parser import PDFService, OCRAdapter, TemplateProcessor
-        logger.info("✅ PDF parser modules imported successfully")
-    except Exception as e:
-        logger.error(f"❌ PDF parser import failed: {e}")
-        return False
+    from web_app.backend.models import connect_sqlite_readonly
     
+    conn = connect_sqlite_readonly(DB_PATH)
     try:
-        from data_storage import IntegrationService
-        logger.info("✅ Data storage modules imported successfully")
-    except Exception as e:
-        logger.error(f"❌ Data storage import failed: {e}")
-        return False
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='invoices'"
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+
+requires_database = pytest.mark.skipif(
+    not _database_initialised(),
+    reason=f"Database not initialised at {DB_PATH}; run local_dev/init_db.py"
+)
+
+
+def test_imports():
+    """Test that all modules can be found; the tests below import what they use."""
+    logger.info("Testing module imports...")
     
-    return True
+    # find_spec only locates each package, without running it or its dependencies
+    for package in ("email_fetcher", "pdf_parser", "data_storage"):
+        assert importlib.util.find_spec(package) is not None, f"{package} import failed"
+        logger.info(f"✅ {package} modules found")
 
 def test_template_loading():
     """Test that parsing templates load correctly."""
     logger.info("Testing template loading...")
     
-    try:
-        from pdf_parser.template_processor import TemplateProcessor
-        
-        processor = TemplateProcessor("./config/templates")
-        providers = processor.get_available_providers()
-        
-        logger.info(f"✅ Loaded templates for providers: {providers}")
-        
-        # Test template info for each provider
-        for provider in providers:
-            info = processor.get_template_info(provider)
-            logger.info(f"  {provider}: {len(info.get('fields', []))} fields, {len(info.get('required_fields', []))} required")
-        
-        return len(providers) > 0
-        
-    except Exception as e:
-        logger.error(f"❌ Template loading failed: {e}")
-        return False
+    from pdf_parser.template_processor import TemplateProcessor
+    
+    processor = TemplateProcessor("./config/templates")
+    providers = processor.get_available_providers()
+    
+    logger.info(f"✅ Loaded templates for providers: {providers}")
+    
+    # Test template info for each provider
+    for provider in providers:
+        info = processor.get_template_info(provider)
+        logger.info(f"  {provider}: {len(info.get('fields', []))} fields, {len(info.get('required_fields', []))} required")
+    
+    assert len(providers) > 0, "No provider templates loaded"
+
+# Invoice texts covering first and fallback patterns, lower-case labels, values that
+# fail to convert, and texts that fall back to fuzzy matching or miss required fields
+SAMPLE_INVOICE_TEXTS = [
+    "Invoice Date: 15/03/2024\nTotal Amount Due: $1,234.56\nTotal Usage: 2,345.5 kWh\n"
+    "Rate: $0.28 per kWh\nService Charge: $1.10\nPeriod: 01/02/2024 to 29/02/2024\n"
+    "Account Number: 1234-5678",
+    "Bill Date: 3/4/2024\nAmount Due: $88.10\nGas Usage: 1,234 MJ\nUnit Rate: $0.045\n"
+    "Daily Charge: $0.95\nBilling Period: 01/01/2024 to 31/03/2024",
+    "Issue Date: 01/07/2024\nAmount Payable: $245.90\nWater Usage: 45 kL\n"
+    "Water Rate: $2.50 per kL\nAccess Charge: $60.00\nFrom: 01/04/2024 To: 30/06/2024",
+    "date: 31/12/2023 total: $12.00 kwh used: 100 to 5/1/2024",
+    "Date: 45/13/2024\nTotal Amount: $99.99\nTotal: $1,000.00\nAccount: 99-1",
+    "Total amount 45.00 consumption 12 kwh 02/03/2024",
+    "No invoice data here",
+]
+
+
+def _parse_all(processor, providers):
+    """Parse every sample text with every template, as plain dictionaries."""
+    return {
+        (provider, text): processor.parse_invoice(text, provider).as_dict()
+        for provider in providers
+        for text in SAMPLE_INVOICE_TEXTS
+    }
+
+def test_specialized_parser_matches_generic_path():
+    """Test that the generated per-template parsers give the same results as the generic loop."""
+    from pdf_parser.template_processor import TemplateProcessor
+    
+    specialized = TemplateProcessor("./config/templates")
+    generic = TemplateProcessor("./config/templates")
+    providers = specialized.get_available_providers()
+    
+    for provider in providers:
+        assert generic._ensure_template(provider)
+        assert specialized._ensure_template(provider)
+        assert specialized._get_specialized(provider) is not None, f"{provider} was not specialized"
+        # A cached None sends parse_invoice down the generic field loop
+        generic._specialized[provider] = None
+    
+    assert _parse_all(specialized, providers) == _parse_all(generic, providers)
+
+def test_template_prefilters_match_plain_search():
+    """Test that the fused alternations and RE2/Hyperscan prefilters don't change parse results."""
+    from pdf_parser.template_processor import TemplateProcessor
+    
+    prefiltered = TemplateProcessor("./config/templates")
+    plain = TemplateProcessor("./config/templates")
+    providers = prefiltered.get_available_providers()
+    
+    for provider in providers:
+        assert plain._ensure_template(provider)
+        plain._specialized[provider] = None
+        plain._pattern_sets[provider] = None
+        for pattern_config in plain.templates[provider].get('patterns', {}).values():
+            pattern_config['fused'] = None
+    
+    assert _parse_all(prefiltered, providers) == _parse_all(plain, providers)
+    
+    # Where a multi-pattern engine is installed, it must report every pattern that matches
+    for provider in providers:
+        for text in SAMPLE_INVOICE_TEXTS:
+            candidates = prefiltered._match_pattern_set(provider, text)
+            if candidates is None:
+                continue
+            for field_name, pattern_config in prefiltered.templates[provider]['patterns'].items():
+                matching = {idx for idx, pattern in enumerate(pattern_config['regex']) if pattern.search(text)}
+                assert matching <= candidates.get(field_name, set()), f"{provider}.{field_name} prefilter missed a match"
+
+def test_pattern_without_capture_group_is_reported(tmp_path):
+    """Test that a capture-less pattern is left unfused and reported instead of raising."""
+    import json
+    from pdf_parser.template_processor import TemplateProcessor
+    
+    (tmp_path / 'test_template.json').write_text(json.dumps({
+        'provider': 'Test Energy',
+        'service_type': 'Gas',
+        'patterns': {
+            'account_number': {'regex': ['Acct (\\d+)', 'Ref \\d+']},
+            'total_amount': {'regex': ['Ref \\d+', 'Total \\$(\\d+)'], 'type': 'decimal'}
+        }
+    }))
+    
+    processor = TemplateProcessor(str(tmp_path))
+    result = processor.parse_invoice("Ref 123 Total $45", 'Test Energy')
+    
+    assert all(config['fused'] is None for config in processor.templates['Test Energy']['patterns'].values())
+    assert result.extracted_data == {'total_amount': 45.0}
+    assert result.parsing_warnings == ['Extraction error: no such group'] * 2
 
 def test_ocr_availability():
     """Test OCR dependencies and capabilities."""
     logger.info("Testing OCR availability...")
     
-    try:
-        from pdf_parser.ocr_adapter import OCRAdapter
-        
-        adapter = OCRAdapter()
-        
-        # Test pdfplumber import
-        try:
-            import pdfplumber
-            logger.info("✅ pdfplumber available")
-            pdfplumber_available = True
-        except ImportError:
-            logger.warning("⚠️ pdfplumber not available")
-            pdfplumber_available = False
-        
-        # Test tesseract availability
-        tesseract_available = adapter.tesseract_available
-        if tesseract_available:
-            logger.info("✅ Tesseract OCR available")
-        else:
-            logger.warning("⚠️ Tesseract OCR not available")
-        
-        return pdfplumber_available or tesseract_available
-        
-    except Exception as e:
-        logger.error(f"❌ OCR availability test failed: {e}")
-        return False
+    from pdf_parser.ocr_adapter import OCRAdapter
+    
+    adapter = OCRAdapter()
+    
+    # Test pdfplumber import
+    pdfplumber_available = importlib.util.find_spec("pdfplumber") is not None
+    if pdfplumber_available:
+        logger.info("✅ pdfplumber available")
+    else:
+        logger.warning("⚠️ pdfplumber not available")
+    
+    # Test tesseract availability
+    tesseract_available = adapter.tesseract_available
+    if tesseract_available:
+        logger.info("✅ Tesseract OCR available")
+    else:
+        logger.warning("⚠️ Tesseract OCR not available")
+    
+    if not (pdfplumber_available or tesseract_available):
+        pytest.skip("Neither pdfplumber nor Tesseract is installed")
 
+@requires_database
 def test_database_connection():
     """Test database connectivity and schema."""
     logger.info("Testing database connection...")
     
+    from web_app.backend.models import connect_sqlite_readonly
+    
+    conn = connect_sqlite_readonly(DB_PATH)
+    cursor = conn.cursor()
+    
     try:
-        import sqlite3
-        
-        db_path = "./data/invoices.db"
-        if not Path(db_path).exists():
-            logger.error(f"❌ Database file not found: {db_path}")
-            return False
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
         # Check required tables exist
         required_tables = ['invoices', 'processing_history', 'email_tracking']
         
         for table in required_tables:
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
-            if not cursor.fetchone():
-                logger.error(f"❌ Required table '{table}' not found")
-                return False
+            assert cursor.fetchone(), f"Required table '{table}' not found"
         
         logger.info("✅ Database connection and schema valid")
         
@@ -135,218 +212,212 @@ def test_database_connection():
         email_count = cursor.fetchone()[0]
         
         logger.info(f"  Database contains {invoice_count} invoices, {email_count} email records")
-        
+    finally:
         conn.close()
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Database test failed: {e}")
-        return False
 
+@pytest.fixture
+def api_database(tmp_path, monkeypatch):
+    """Serve the API blueprint from a fresh SQLite database; yields (client, engine)."""
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'invoices.db'))
+    
+    from flask import Flask
+    from web_app.backend import api, models
+    
+    manager = models.DatabaseManager()
+    manager.create_tables()
+    monkeypatch.setattr(models, 'db_manager', manager)
+    monkeypatch.setattr(api, 'db_manager', manager)
+    
+    app = Flask(__name__)
+    app.json = api.OrjsonProvider(app)
+    app.register_blueprint(api.api_bp)
+    yield app.test_client(), manager.engine
+    manager.engine.dispose()
+
+
+def _walk_cursors(client, path: str, key: str, limit: int = 50) -> list:
+    """Follow next_cursor from the first page and return every listed id in order."""
+    ids, url = [], path
+    for _ in range(limit):
+        response = client.get(url)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        payload = response.get_json()
+        ids.extend(row['id'] for row in payload[key])
+        cursor = payload['pagination']['next_cursor']
+        if cursor is None:
+            return ids
+        url = f"{path}&cursor={cursor}"
+    pytest.fail(f"{path} was still paging after {limit} pages")
+
+
+def test_invoice_cursor_pages_through_shared_dates(api_database):
+    """Test that invoice cursors list every row once when dates are stored as plain text."""
+    from sqlalchemy import text
+    
+    client, engine = api_database
+    
+    # init_db and the PDF service store bare dates; the ORM writes full timestamps
+    dates = ['2024-03-01'] * 5 + ['2024-02-01'] * 3 + ['2024-03-01 00:00:00.000000', '2024-04-01']
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO invoices (id, provider_name, service_type, total_amount, invoice_date, "
+            "processing_status, created_at, updated_at) "
+            "VALUES (:id, 'Origin Energy', 'gas', 10, :invoice_date, 'processed', :now, :now)"
+        ), [{'id': f"inv{i:02d}", 'invoice_date': d, 'now': '2024-05-01 00:00:00'} for i, d in enumerate(dates)])
+    
+    for order in ('asc', 'desc'):
+        ids = _walk_cursors(client, f"/api/invoices?per_page=2&sort_order={order}", 'invoices')
+        assert sorted(ids) == [f"inv{i:02d}" for i in range(len(dates))], order
+        assert len(ids) == len(set(ids)), order
+
+
+def test_processing_history_cursor_pages_through_mixed_timestamps(api_database):
+    """Test that history cursors list every row once across the stored timestamp formats."""
+    from sqlalchemy import text
+    
+    client, engine = api_database
+    
+    # init_db writes isoformat() with a 'T'; func.now() defaults have no microseconds
+    dates = ['2024-03-01T10:00:00.123456', '2024-03-01 10:00:00', '2024-03-01 10:00:00',
+             '2024-03-01T09:00:00', '2024-02-01 08:00:00.500000', '2024-03-01T10:00:00.123456']
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO processing_history (provider_name, processing_date, invoices_found, "
+            "invoices_processed, invoices_failed, status) "
+            "VALUES ('Sydney Water', :processing_date, 1, 1, 0, 'completed')"
+        ), [{'processing_date': d} for d in dates])
+        expected = [row.id for row in conn.execute(text(
+            "SELECT id FROM processing_history ORDER BY processing_date DESC, id DESC"
+        ))]
+    
+    ids = _walk_cursors(client, "/api/processing-history?per_page=1", 'history')
+    assert ids == expected
+
+@pytest.mark.slow
 def test_pdf_parsing_with_sample():
     """Test PDF parsing with a sample file if available."""
     logger.info("Testing PDF parsing...")
     
-    try:
-        from pdf_parser.pdf_service import PDFService
-        
-        # Look for sample PDFs
-        sample_dirs = [
-            "./tests/sample_invoices",
-            "./data/invoices",
-            "./tests"
-        ]
-        
-        sample_pdf = None
-        for sample_dir in sample_dirs:
-            if Path(sample_dir).exists():
-                for pdf_file in Path(sample_dir).glob("*.pdf"):
-                    sample_pdf = str(pdf_file)
-                    break
-            if sample_pdf:
+    # Look for sample PDFs
+    sample_dirs = [
+        "./tests/sample_invoices",
+        "./data/invoices",
+        "./tests"
+    ]
+    
+    sample_pdf = None
+    for sample_dir in sample_dirs:
+        if Path(sample_dir).exists():
+            for pdf_file in Path(sample_dir).glob("*.pdf"):
+                sample_pdf = str(pdf_file)
                 break
-        
-        if not sample_pdf:
-            logger.warning("⚠️ No sample PDF found for testing")
-            return True  # Not a failure, just no test data
-        
-        logger.info(f"Testing with sample PDF: {sample_pdf}")
-        
-        service = PDFService()
-        
-        # Try to determine provider from filename
-        filename = Path(sample_pdf).name.lower()
-        provider = None
-        
-        if 'energy' in filename or 'electricity' in filename:
-            provider = 'EnergyAustralia'
-        elif 'origin' in filename or 'gas' in filename:
-            provider = 'Origin'
-        elif 'water' in filename or 'sydney' in filename:
-            provider = 'Sydney_Water'
-        
-        if not provider:
-            # Try first available provider
-            from pdf_parser.template_processor import TemplateProcessor
-            processor = TemplateProcessor()
-            providers = processor.get_available_providers()
-            if providers:
-                provider = providers[0]
-        
-        if provider:
-            result = service.process_pdf(sample_pdf, provider)
-            
-            if result.get('success'):
-                logger.info("✅ PDF parsing test successful")
-                invoice_data = result.get('invoice_data', {})
-                logger.info(f"  Extracted: {invoice_data.get('provider_name')} - ${invoice_data.get('total_amount')}")
-            else:
-                logger.warning(f"⚠️ PDF parsing test failed: {result.get('errors', [])}")
-        else:
-            logger.warning("⚠️ No provider template available for testing")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ PDF parsing test failed: {e}")
-        return False
+        if sample_pdf:
+            break
+    
+    if not sample_pdf:
+        pytest.skip("No sample PDF found for testing")
+    
+    logger.info(f"Testing with sample PDF: {sample_pdf}")
+    
+    from pdf_parser.pdf_service import PDFService
+    
+    service = PDFService()
+    
+    # Try to determine provider from filename
+    filename = Path(sample_pdf).name.lower()
+    provider = None
+    
+    if 'energy' in filename or 'electricity' in filename:
+        provider = 'EnergyAustralia'
+    elif 'origin' in filename or 'gas' in filename:
+        provider = 'Origin Energy'
+    elif 'water' in filename or 'sydney' in filename:
+        provider = 'Sydney Water'
+    
+    guessed = provider is None
+    if guessed:
+        # Try first available provider
+        from pdf_parser.template_processor import TemplateProcessor
+        processor = TemplateProcessor()
+        providers = processor.get_available_providers()
+        if providers:
+            provider = providers[0]
+    
+    if not provider:
+        pytest.skip("No provider template available for testing")
+    
+    result = service.process_pdf(sample_pdf, provider)
+    
+    if not result.get('success') and guessed:
+        pytest.skip(f"No template matches {sample_pdf}; tried {provider}: {result.get('errors', [])}")
+    
+    assert result.get('success'), f"PDF parsing failed for {sample_pdf} ({provider}): {result.get('errors', [])}"
+    
+    logger.info("✅ PDF parsing test successful")
+    invoice_data = result.get('invoice_data', {})
+    logger.info(f"  Extracted: {invoice_data.get('provider_name')} - ${invoice_data.get('total_amount')}")
 
+@pytest.mark.slow
+@requires_database
 def test_integration_service():
     """Test the integration service initialization."""
     logger.info("Testing integration service...")
     
-    try:
-        from data_storage.integration_service import IntegrationService
-        
-        service = IntegrationService()
-        status = service.get_system_status()
-        
-        logger.info("✅ Integration service initialized successfully")
-        
-        # Check system health
-        health = status.get('system_health', {})
-        db_ok = health.get('database_accessible', False)
-        templates_ok = health.get('templates_loaded', False)
-        
-        logger.info(f"  Database accessible: {db_ok}")
-        logger.info(f"  Templates loaded: {templates_ok}")
-        
-        return db_ok and templates_ok
-        
-    except Exception as e:
-        logger.error(f"❌ Integration service test failed: {e}")
-        return False
+    from data_storage.integration_service import IntegrationService
+    
+    service = IntegrationService()
+    status = service.get_system_status()
+    
+    logger.info("✅ Integration service initialized successfully")
+    
+    # Check system health
+    health = status.get('system_health', {})
+    db_ok = health.get('database_accessible', False)
+    templates_ok = health.get('templates_loaded', False)
+    
+    logger.info(f"  Database accessible: {db_ok}")
+    logger.info(f"  Templates loaded: {templates_ok}")
+    
+    assert db_ok, f"Database not accessible: {status.get('error')}"
+    assert templates_ok, "No templates loaded"
 
 def test_email_service_init():
     """Test email service initialization (without actual API calls)."""
     logger.info("Testing email service initialization...")
     
-    try:
-        from email_fetcher.email_service import EmailService
-        
-        service = EmailService()
-        status = service.get_service_status()
-        
-        logger.info("✅ Email service initialized successfully")
-        
-        # Check authentication status
-        auth_status = status.get('authentication', {})
-        for provider, status_info in auth_status.items():
-            configured = status_info.get('configured', False)
-            logger.info(f"  {provider}: {'configured' if configured else 'not configured'}")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Email service test failed: {e}")
-        return False
+    from email_fetcher.email_service import EmailService
+    
+    service = EmailService()
+    status = service.get_service_status()
+    
+    logger.info("✅ Email service initialized successfully")
+    
+    # Check authentication status
+    auth_status = status.get('authentication', {})
+    for provider, status_info in auth_status.items():
+        configured = status_info.get('configured', False)
+        logger.info(f"  {provider}: {'configured' if configured else 'not configured'}")
 
+@pytest.mark.slow
 def test_web_api_integration():
     """Test that web API can access the new services."""
     logger.info("Testing web API integration...")
     
-    try:
-        # Check if we can add integration endpoints to the web app
-        web_app_path = Path("./web_app/backend/app.py")
-        if web_app_path.exists():
-            logger.info("✅ Web app backend found")
-            
-            # Test import compatibility
-            sys.path.append(str(Path("./web_app/backend").absolute()))
-            
-            # This would test if we can import our services in the web context
-            from data_storage.integration_service import IntegrationService
-            service = IntegrationService()
-            
-            logger.info("✅ Integration service accessible from web app context")
-            return True
-        else:
-            logger.warning("⚠️ Web app backend not found")
-            return True  # Not a failure if web app doesn't exist yet
-            
-    except Exception as e:
-        logger.error(f"❌ Web API integration test failed: {e}")
-        return False
-
-def main():
-    """Run all tests and report results."""
-    logger.info("🚀 Starting Utilities Tracker Pipeline Tests")
-    logger.info("=" * 60)
-    
-    tests = [
-        ("Module Imports", test_imports),
-        ("Template Loading", test_template_loading),
-        ("OCR Availability", test_ocr_availability),
-        ("Database Connection", test_database_connection),
-        ("PDF Parsing", test_pdf_parsing_with_sample),
-        ("Integration Service", test_integration_service),
-        ("Email Service", test_email_service_init),
-        ("Web API Integration", test_web_api_integration)
-    ]
-    
-    results = []
+    # Check if we can add integration endpoints to the web app
+    web_app_path = Path("./web_app/backend/app.py")
+    if not web_app_path.exists():
+        pytest.skip("Web app backend not found")
     
-    for test_name, test_func in tests:
-        logger.info(f"\n📋 Running: {test_name}")
-        try:
-            success = test_func()
-            results.append((test_name, success))
-        except Exception as e:
-            logger.error(f"❌ {test_name} crashed: {e}")
-            results.append((test_name, False))
+    logger.info("✅ Web app backend found")
     
-    # Report summary
-    logger.info("\n" + "=" * 60)
-    logger.info("📊 TEST RESULTS SUMMARY")
-    logger.info("=" * 60)
-    
-    passed = 0
-    failed = 0
-    
-    for test_name, success in results:
-        status = "✅ PASS" if success else "❌ FAIL"
-        logger.info(f"{status}: {test_name}")
-        
-        if success:
-            passed += 1
-        else:
-            failed += 1
-    
-    logger.info("-" * 60)
-    logger.info(f"Total Tests: {len(results)}")
-    logger.info(f"Passed: {passed}")
-    logger.info(f"Failed: {failed}")
-    logger.info(f"Success Rate: {passed/len(results)*100:.1f}%")
-    
-    if failed == 0:
-        logger.info("🎉 All tests passed! Pipeline is ready for use.")
-    else:
-        logger.warning(f"⚠️ {failed} test(s) failed. Check logs above for details.")
+    # Test import compatibility
+    sys.path.append(str(Path("./web_app/backend").absolute()))
     
-    logger.info("=" * 60)
+    # This would test if we can import our services in the web context
+    from data_storage.integration_service import IntegrationService
+    service = IntegrationService()
     
-    return failed == 0
+    logger.info("✅ Integration service accessible from web app context")
 
 if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(pytest.main([__file__, *sys.argv[1:]]))
\ No newline at end of file
@@ -5,40 +5,374 @@ This module provides RESTful API endpoints for accessing invoice data,
 triggering sync operations, and managing the application.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Tuple
 from decimal import Decimal
 import os
+import sys
+import json
+import time
+import zlib
+import base64
+import hashlib
+import binascii
 import logging
-
-from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import and_, or_, func, desc, asc
+import threading
+import uuid
+from pathlib import Path
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus, urlencode
+
+from flask import Blueprint, Response, request, current_app
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import (
+    and_, or_, case, cast, func, desc, asc, select, tuple_, type_coerce, update, bindparam, text,
+    DateTime, Float, String
+)
 from sqlalchemy.orm import Session
 
-from .models import db_manager, Invoice, ProcessingHistory
+from .models import (
+    db_manager, Invoice, ProcessingHistory, INVOICE_DICT_COLUMNS, PROCESSING_HISTORY_COLUMNS,
+    invoice_to_dict, processing_history_to_dict
+)
 
-# Import integration services
 try:
-    import sys
-    from pathlib import Path
-    sys.path.append(str(Path(__file__).parent.parent.parent))
-    from data_storage.integration_service import IntegrationService
-    from email_fetcher.email_service import EmailService
-    from pdf_parser.pdf_service import PDFService
-    INTEGRATION_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"Integration services not available: {e}")
-    INTEGRATION_AVAILABLE = False
-
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Configuration files edited through the /configuration endpoints
+CONFIG_DIR = PROJECT_ROOT / 'config'
+PROVIDERS_CONFIG_PATH = CONFIG_DIR / 'providers.json'
+UTILITY_ATTRIBUTES_PATH = CONFIG_DIR / 'utility_attributes.json'
+CREDENTIALS_PATH = CONFIG_DIR / 'credentials.json'
+
+# Rows fetched per round trip when streaming CSV exports
+CSV_EXPORT_BATCH_SIZE = 1000
+
+# Behind nginx, USE_XSENDFILE=1 writes each export to CSV_EXPORT_DIR and hands the download
+# to the proxy with X-Accel-Redirect, which needs a matching internal location:
+#     location /internal/exports/ { internal; alias /tmp/exports/; }
+# The directory and files are private to the API's user (0700/0600), so nginx's workers must
+# run as that user. Exports older than CSV_EXPORT_MAX_AGE seconds are removed by the next export
+USE_XSENDFILE = os.getenv('USE_XSENDFILE') == '1'
+CSV_EXPORT_DIR = Path(os.getenv('CSV_EXPORT_DIR', '/tmp/exports'))
+CSV_EXPORT_ACCEL_PREFIX = '/internal/exports/'
+CSV_EXPORT_MAX_AGE = 3600
+
+# Filtered list totals kept by _total_count, and how long each stays valid when the
+# database offers no data version to detect writes
+COUNT_CACHE_SIZE = 32
+COUNT_CACHE_TTL = 60
+
+_count_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+# Seconds clients may reuse the analytics and provider payloads, and the server-side cache
+# lifetime where the database has no data version to detect writes
+AGGREGATE_CACHE_TTL = 60
+
+# Cached analytics and provider payloads are gzipped once per change, so they can use the
+# highest level. Bodies under the minimum size (also applied to every other compressed
+# response) barely shrink once the gzip header is counted.
+PAYLOAD_GZIP_LEVEL = 9
+PAYLOAD_GZIP_MIN_SIZE = 500
+
+# zlib level for gzip-encoded CSV exports; low levels already shrink repetitive CSV several-fold
+CSV_GZIP_LEVEL = 4
+
+# Service types invoices are filed under
+SERVICE_TYPES = ('Electricity', 'Gas', 'Water')
+
+# Columns the invoice list may be sorted by; anything else falls back to invoice_date
+_SORT_COLS = {
+    'invoice_date': Invoice.invoice_date,
+    'provider_name': Invoice.provider_name,
+    'service_type': Invoice.service_type,
+    'total_amount': Invoice.total_amount,
+    'usage_quantity': Invoice.usage_quantity,
+    'usage_rate': Invoice.usage_rate,
+    'service_charge': Invoice.service_charge,
+    'billing_period_start': Invoice.billing_period_start,
+    'billing_period_end': Invoice.billing_period_end,
+    'processing_status': Invoice.processing_status,
+    'parsing_confidence': Invoice.parsing_confidence,
+    'created_at': Invoice.created_at,
+    'updated_at': Invoice.updated_at,
+}
+
+# Sort directions; anything else falls back to newest first
+_SORT_DIRS = {'asc': asc, 'desc': desc}
+
 # Create API blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 
+def _json_default(obj: Any) -> Any:
+    """Encode values neither JSON encoder handles natively."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_bytes(payload: Any, newline: bool = True) -> bytes:
+    """Encode a payload as compact JSON with sorted keys, using orjson when installed."""
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS | (orjson.OPT_APPEND_NEWLINE if newline else 0)
+        return orjson.dumps(payload, default=_json_default, option=option)
+    encoded = json.dumps(payload, default=_json_default, sort_keys=True, separators=(',', ':'))
+    return (encoded + '\n' if newline else encoded).encode('utf-8')
+
+
+def _json(payload: Any, status: int = 200) -> Response:
+    """Build a JSON response; replaces jsonify, which encodes in pure Python."""
+    return Response(_json_bytes(payload), status=status, mimetype='application/json')
+
+
+def _load_json_file(path: Path) -> Any:
+    """Read a JSON config file, parsing it with orjson when installed."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _dump_json_file(path: Path, data: Any, pretty: bool = False) -> None:
+    """
+    Write a JSON config file atomically, using orjson when installed.
+    
+    The data goes to a temporary file beside the target, which then replaces it,
+    so a crash mid-write leaves the old file intact and readers never see a
+    partial one. The config directory is created on the first write that needs it.
+    
+    Args:
+        path: File to write
+        data: Configuration to encode
+        pretty: Indent by two spaces for hand editing instead of writing compact JSON
+    """
+    if orjson is not None:
+        encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    else:
+        encoded = json.dumps(data, indent=2 if pretty else None,
+                             separators=None if pretty else (',', ':')).encode('utf-8')
+    
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            tmp_file = open(tmp_path, 'xb')
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = open(tmp_path, 'xb')
+        with tmp_file:
+            tmp_file.write(encoded)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    with _config_cache_lock:
+        _config_cache.pop(path, None)
+
+
+def _pretty_requested() -> bool:
+    """Whether a configuration save asked for an indented file with ?pretty=1."""
+    return request.args.get('pretty') in ('1', 'true')
+
+
+GMAIL_REQUIRED_FIELDS = frozenset({'client_id', 'client_secret'})
+PROVIDER_REQUIRED_FIELDS = frozenset({'provider_name', 'service_type'})
+
+
+def _missing_fields(data: Dict[str, Any], required: frozenset) -> List[str]:
+    """Return the required fields that are absent or empty in a posted payload, sorted."""
+    return sorted(required - {key for key, value in data.items() if value})
+
+
+def _cached_json_file(path: Path) -> Any:
+    """
+    Read a JSON config file, reusing the parsed data until the file changes.
+    
+    The data is shared between requests, so callers must not modify it; load the
+    file with _load_json_file to edit and save it.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    data = _load_json_file(path)
+    with _config_cache_lock:
+        _config_cache[path] = (version, data)
+    return data
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider routing jsonify and request.get_json through orjson when installed."""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return _json_bytes(obj, newline=False).decode('utf-8')
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s) if orjson is not None else json.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        return self._app.response_class(_json_bytes(self._prepare_response_obj(args, kwargs)),
+                                        mimetype=self.mimetype)
+
+
+def _cache_version() -> tuple:
+    """
+    Key the cached aggregate payloads by SQLite's data version, so they are rebuilt
+    after every write. Where no version is available (PostgreSQL) they are rebuilt
+    every AGGREGATE_CACHE_TTL seconds instead.
+    """
+    data_version = db_manager.data_version()
+    if data_version is None:
+        return ('ttl', int(time.time() // AGGREGATE_CACHE_TTL))
+    return ('data', data_version)
+
+
+@lru_cache(maxsize=32)
+def _encoded_payload(body: bytes, encoding: str) -> tuple:
+    """
+    Return (bytes, etag) for a cached payload in the given content encoding.
+    
+    The cached payloads are the same bytes objects until the data changes, so each
+    one is hashed and compressed once rather than on every request.
+    """
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(PAYLOAD_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        encoded = compressor.compress(body) + compressor.flush()
+    else:
+        encoded = body
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return encoded, f"{etag}-{encoding}" if encoding != 'identity' else etag
+
+
+def _etag_response(body: bytes) -> Response:
+    """Serve a cached JSON payload with an ETag, answering a matching If-None-Match with 304."""
+    encoding = 'gzip' if len(body) >= PAYLOAD_GZIP_MIN_SIZE and request.accept_encodings['gzip'] else 'identity'
+    encoded, etag = _encoded_payload(body, encoding)
+    
+    response = Response(encoded, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.cache_control.max_age = AGGREGATE_CACHE_TTL
+    return response.make_conditional(request)
+
+
+_services_lock = threading.RLock()
+
+# Days until the next bill for each billing cycle; 'custom' cycles set their own length
+BILLING_CYCLE_DAYS = {
+    'monthly': 30,
+    'bi-monthly': 60,
+    'quarterly': 90,
+    'semi-annual': 180,
+    'annual': 365
+}
+
+# Parsed config files with the (mtime, size) they were read at, see _cached_json_file
+_config_cache: Dict[Path, tuple] = {}
+_config_cache_lock = threading.Lock()
+
+# Encoded /system/status and /email/status payloads with their expiry; dashboards poll
+# these, and each one reads the config, credentials and database afresh. The masked
+# /configuration/gmail view is kept until init_services or a credentials save clears it.
+STATUS_CACHE_TTL = 5
+_status_cache: Dict[str, tuple] = {}
+
+
+@lru_cache(maxsize=None)
+def _load_integration():
+    """
+    Import IntegrationService on first use rather than with this module.
+    
+    It pulls in the email and PDF stacks (OCR, Gmail and Outlook clients), which only
+    the sync, email and configuration endpoints need. A failed import is not cached,
+    so it is retried, and reported, each time.
+    """
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.append(str(PROJECT_ROOT))
+    from data_storage.integration_service import IntegrationService
+    return IntegrationService
+
+
+def _integration_available() -> bool:
+    """Return whether the integration services can be imported."""
+    try:
+        _load_integration()
+    except ImportError as e:
+        logger.warning(f"Integration services not available: {e}")
+        return False
+    return True
+
+
+def init_services(app) -> None:
+    """
+    Build the integration services once and keep them on app.extensions.
+    
+    Constructing them reads the provider config, credentials and templates from disk
+    and compiles every template pattern, so request handlers share these instances.
+    Call again after configuration files are rewritten to pick up the new settings.
+    """
+    if not _integration_available():
+        return
+    
+    with _services_lock:
+        integration_service = _load_integration()()
+        app.extensions['integration_service'] = integration_service
+        app.extensions['email_service'] = integration_service.email_service
+        app.extensions['pdf_service'] = integration_service.pdf_service
+        _status_cache.clear()
+
+
+def _service(name: str):
+    """Return an app-wide service, building them on first use if startup did not."""
+    app = current_app._get_current_object()
+    if name not in app.extensions:
+        with _services_lock:
+            if name not in app.extensions:
+                init_services(app)
+    return app.extensions[name]
+
+
+def _cached_status(name: str, compute, ttl: Optional[float] = STATUS_CACHE_TTL) -> Response:
+    """
+    Serve a status payload encoded within the last ttl seconds, or a fresh one.
+    
+    Args:
+        name: Cache slot for the payload
+        compute: Builds the payload on a miss
+        ttl: Seconds the encoded payload is reused, or None to keep it until the cache is cleared
+    """
+    now = time.monotonic()
+    cached = _status_cache.get(name)
+    if cached is None or now >= cached[0]:
+        cached = (now + ttl if ttl is not None else float('inf'), _json_bytes(compute()))
+        _status_cache[name] = cached
+    return Response(cached[1], mimetype='application/json')
+
+
+@api_bp.teardown_app_request
+def _remove_session(exc):
+    """Release the request thread's database session once the response is done."""
+    db_manager.Session.remove()
+
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for monitoring system status."""
@@ -60,15 +394,161 @@ def health_check():
         }
         
         status_code = 200 if system_status['status'] == 'healthy' else 503
-        return jsonify(system_status), status_code
+        return _json(system_status, status_code)
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return jsonify({
+        return _json({
             'status': 'unhealthy',
             'error': str(e),
             'timestamp': datetime.now().isoformat()
-        }), 503
+        }, 503)
+
+
+def _total_count(query, table_name: str, filtered: bool) -> Tuple[int, bool]:
+    """
+    Count a list query's rows, returning (total, is_approximate).
+    
+    Unfiltered totals are read from the trigger-maintained counter on SQLite, or
+    from the planner's estimate on PostgreSQL. Filtered totals are counted and
+    cached per statement, so a polling UI does not rescan on every page fetch.
+    """
+    if not filtered:
+        count = db_manager.row_count(table_name)
+        if count is not None:
+            return count, False
+        count = db_manager.approximate_row_count(table_name)
+        if count is not None:
+            return count, True
+    
+    compiled = query.statement.compile()
+    key = (str(compiled), tuple(compiled.params.items()))
+    data_version = db_manager.data_version()
+    now = time.monotonic()
+    
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        # SQLite entries stay valid until the next write; elsewhere they age out after the TTL
+        if cached and cached[0] == data_version and now < cached[1]:
+            _count_cache.move_to_end(key)
+            return cached[2], False
+    
+    count = query.count()
+    with _count_cache_lock:
+        _count_cache[key] = (data_version, now + COUNT_CACHE_TTL, count)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return count, False
+
+
+# Stores cleared invoice payloads off the request path; held while a fill is queued or running
+_json_fill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='json-cache')
+_json_fill_lock = threading.Lock()
+JSON_FILL_BATCH_SIZE = 500
+
+
+def _fill_invoice_json(manager) -> None:
+    """Encode and store the payload of every invoice whose cached_json was cleared by a write."""
+    try:
+        with manager.get_session() as session:
+            last_id = ''
+            while True:
+                # Walking by id ends even if a concurrent write clears a payload behind the walk
+                rows = (session.query(type_coerce(Invoice.updated_at, String), *INVOICE_DICT_COLUMNS)
+                        .filter(Invoice.cached_json.is_(None), Invoice.id > last_id)
+                        .order_by(Invoice.id).limit(JSON_FILL_BATCH_SIZE).all())
+                if not rows:
+                    break
+                
+                # A row edited since it was read keeps its NULL payload for the next fill; its
+                # updated_at is matched as stored, since a re-rendered DateTime may not compare equal
+                table = Invoice.__table__
+                session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('invoice_id'), table.c.cached_json.is_(None),
+                           type_coerce(table.c.updated_at, String) == bindparam('seen_updated_at'))
+                    # Filling the cache is not an edit, so updated_at is kept rather than bumped
+                    .values(cached_json=bindparam('payload'), updated_at=table.c.updated_at),
+                    [{'invoice_id': row.id, 'seen_updated_at': row[0],
+                      'payload': _json_bytes(invoice_to_dict(row[1:]), newline=False)}
+                     for row in rows]
+                )
+                session.commit()
+                last_id = rows[-1].id
+    except Exception as e:
+        # Reads keep encoding the missing payloads until a later fill stores them
+        logger.warning(f"Could not store cached invoice JSON: {str(e)}")
+    finally:
+        _json_fill_lock.release()
+
+
+def _cached_invoice_json(session: Session, rows) -> List[bytes]:
+    """
+    Return each listed invoice's encoded to_dict() payload from invoices.cached_json.
+    
+    Rows whose payload was cleared by a write are encoded for this response only, and
+    a background fill stores them, so reads never write and each invoice is serialized
+    about once per change rather than on every list request.
+    """
+    missing = [row.id for row in rows if row.cached_json is None]
+    if not missing:
+        return [row.cached_json for row in rows]
+    
+    # Plain column rows skip ORM identity-map bookkeeping for every rebuilt invoice
+    rebuilt = {
+        invoice.id: _json_bytes(invoice_to_dict(invoice), newline=False)
+        for invoice in session.query(*INVOICE_DICT_COLUMNS).filter(Invoice.id.in_(missing))
+    }
+    
+    if _json_fill_lock.acquire(blocking=False):
+        _json_fill_executor.submit(_fill_invoice_json, db_manager)
+    
+    return [row.cached_json if row.cached_json is not None else rebuilt[row.id] for row in rows]
+
+
+def _stored_position(column):
+    """
+    Select a keyset date column as the value the database stores and orders by.
+    
+    SQLite keeps dates as text in whichever format the writer used (plain dates from
+    init_db, 'T'-separated or microsecond-less timestamps), so cursors carry and seek on
+    that text; a DateTime bind would be re-rendered in a format that sorts differently.
+    """
+    return type_coerce(column, String)
+
+
+def _encode_cursor(position, row_id) -> str:
+    """Encode a row's stored (date, id) position as an opaque page cursor."""
+    raw = f"{position}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+@lru_cache(maxsize=128)
+def _parse_iso_datetime(value: str) -> datetime:
+    """
+    Parse an ISO 8601 date or timestamp filter; raises ValueError if malformed.
+    
+    Dashboards mostly send plain YYYY-MM-DD dates, which are built directly
+    rather than through the general parser; a trailing Z is read as UTC.
+    """
+    if len(value) == 10 and value.isascii() and value[4] == value[7] == '-' \
+            and value[:4].isdigit() and value[5:7].isdigit() and value[8:].isdigit():
+        return datetime(int(value[:4]), int(value[5:7]), int(value[8:]))
+    return datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+
+
+def _decode_cursor(cursor: str):
+    """Decode a page cursor back into (stored date, id string); raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(str(e))
+    cursor_date, sep, cursor_id = raw.partition('|')
+    if not sep:
+        raise ValueError("cursor is missing the id")
+    _parse_iso_datetime(cursor_date)
+    return cursor_date, cursor_id
 
 
 @api_bp.route('/invoices', methods=['GET'])
@@ -76,7 +556,10 @@ def get_invoices():
     """Get invoices with optional filtering and pagination."""
     try:
         with db_manager.get_session() as session:
-            query = session.query(Invoice)
+            # Rows are served from their cached payloads, so only the keyset columns are loaded
+            query = session.query(
+                Invoice.id, _stored_position(Invoice.invoice_date).label('position'), Invoice.cached_json
+            )
             
             # Apply filters
             provider = request.args.get('provider')
@@ -85,6 +568,8 @@ def get_invoices():
             
             service_type = request.args.get('service_type')
             if service_type:
+                if service_type not in SERVICE_TYPES:
+                    return _json({'error': f"Invalid service_type. Use one of: {', '.join(SERVICE_TYPES)}"}, 400)
                 query = query.filter(Invoice.service_type == service_type)
             
             # Date range filtering
@@ -93,51 +578,76 @@ def get_invoices():
             
             if start_date:
                 try:
-                    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+                    start_dt = _parse_iso_datetime(start_date)
                     query = query.filter(Invoice.invoice_date >= start_dt)
                 except ValueError:
-                    return jsonify({'error': 'Invalid start_date format. Use ISO format.'}), 400
+                    return _json({'error': 'Invalid start_date format. Use ISO format.'}, 400)
             
             if end_date:
                 try:
-                    end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+                    end_dt = _parse_iso_datetime(end_date)
                     query = query.filter(Invoice.invoice_date <= end_dt)
                 except ValueError:
-                    return jsonify({'error': 'Invalid end_date format. Use ISO format.'}), 400
+                    return _json({'error': 'Invalid end_date format. Use ISO format.'}, 400)
             
             # Sorting
-            sort_by = request.args.get('sort_by', 'invoice_date')
-            sort_order = request.args.get('sort_order', 'desc')
+            sort_column = _SORT_COLS.get(request.args.get('sort_by', 'invoice_date'), Invoice.invoice_date)
+            order = _SORT_DIRS.get(request.args.get('sort_order', 'desc').lower(), desc)
             
-            if hasattr(Invoice, sort_by):
-                column = getattr(Invoice, sort_by)
-                if sort_order.lower() == 'asc':
-                    query = query.order_by(asc(column))
-                else:
-                    query = query.order_by(desc(column))
+            # Date ordering is made total with the id so it can be paged by keyset
+            keyset = sort_column is Invoice.invoice_date
+            if keyset:
+                query = query.order_by(order(Invoice.invoice_date), order(Invoice.id))
             else:
-                query = query.order_by(desc(Invoice.invoice_date))
+                query = query.order_by(order(sort_column))
             
             # Pagination
             page = int(request.args.get('page', 1))
             per_page = min(int(request.args.get('per_page', 50)), 100)  # Max 100 items per page
             
-            total_count = query.count()
-            invoices = query.offset((page - 1) * per_page).limit(per_page).all()
+            cursor = request.args.get('cursor')
+            count_query = query
+            if cursor:
+                if not keyset:
+                    return _json({'error': 'cursor pagination requires sort_by=invoice_date'}, 400)
+                try:
+                    cursor_date, cursor_id = _decode_cursor(cursor)
+                except ValueError:
+                    return _json({'error': 'Invalid cursor'}, 400)
+                
+                # Seek past the cursor row on the (invoice_date, id) index instead of an OFFSET scan
+                position = tuple_(_stored_position(Invoice.invoice_date), Invoice.id)
+                query = query.filter(position > (cursor_date, cursor_id) if order is asc
+                                     else position < (cursor_date, cursor_id))
+                rows = query.limit(per_page + 1).all()
+            else:
+                rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
             
-            return jsonify({
-                'invoices': [invoice.to_dict() for invoice in invoices],
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total_count,
-                    'pages': (total_count + per_page - 1) // per_page
-                }
-            })
+            invoices = rows[:per_page]
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'has_next': len(rows) > per_page,
+                'next_cursor': (_encode_cursor(invoices[-1].position, invoices[-1].id)
+                                if keyset and len(rows) > per_page else None)
+            }
+            
+            # Counting scans every matching row, so clients only pay for it on request
+            if request.args.get('include_total') in ('1', 'true'):
+                filtered = bool(provider or service_type or start_date or end_date)
+                total_count, approximate = _total_count(count_query, Invoice.__tablename__, filtered)
+                pagination['total'] = total_count
+                pagination['total_is_approximate'] = approximate
+                pagination['pages'] = (total_count + per_page - 1) // per_page
+            
+            # Splice the cached payloads in ahead of the encoded {"pagination": ...} object
+            tail = _json_bytes({'pagination': pagination})
+            body = b'{"invoices":[' + b','.join(_cached_invoice_json(session, invoices)) + b'],' + tail[1:]
+            return Response(body, mimetype='application/json')
             
     except Exception as e:
         logger.error(f"Error fetching invoices: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _json({'error': 'Internal server error'}, 500)
 
 
 @api_bp.route('/invoices/<string:invoice_id>', methods=['GET'])
@@ -145,146 +655,420 @@ def get_invoice(invoice_id: str):
     """Get a specific invoice by ID."""
     try:
         with db_manager.get_session() as session:
-            invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
+            # Served from the same encoded payload as the invoice list
+            invoice = session.query(Invoice.id, Invoice.cached_json).filter(Invoice.id == invoice_id).first()
             
             if not invoice:
-                return jsonify({'error': 'Invoice not found'}), 404
+                return _json({'error': 'Invoice not found'}, 404)
             
-            return jsonify(invoice.to_dict())
+            return Response(_cached_invoice_json(session, [invoice])[0] + b'\n', mimetype='application/json')
             
     except Exception as e:
         logger.error(f"Error fetching invoice {invoice_id}: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _json({'error': 'Internal server error'}, 500)
+
+
+# One GROUP BY on the finest (provider, service) key serves /providers as is and is rolled up
+# per service and per provider for /analytics, instead of scanning once per grouping. Raw sums
+# and non-null counts are kept so the rolled-up averages stay exact. COUNT(*) keeps the
+# (invoice_date, service_type, provider_name, ...) covering index covering, and on SQLite the
+# unary + stops the planner preferring a single-column index for the GROUP BY; PostgreSQL has
+# no unary + on text, so it gets the plain GROUP BY.
+_ROLLUP_SQL = (
+    "SELECT provider_name, service_type, COUNT(*) AS invoice_count, "
+    "SUM(total_amount) AS total_amount, AVG(total_amount) AS avg_amount, "
+    "COALESCE(SUM(usage_quantity), 0) AS usage_total, COUNT(usage_quantity) AS usage_count, "
+    "MIN(invoice_date) AS earliest_invoice, MAX(invoice_date) AS latest_invoice "
+    "FROM invoices {where} GROUP BY {prefix}provider_name, {prefix}service_type "
+    "ORDER BY provider_name, service_type"
+)
+_ROLLUP_FLOATS = {'total_amount': Float, 'avg_amount': Float, 'usage_total': Float}
+_ROLLUP_WHERE = {'12m': "WHERE invoice_date >= :since", 'all': ''}
+
+
+def _build_rollup(where: str, prefix: str):
+    """Prebuild the rollup statement for one window and GROUP BY prefix."""
+    statement = text(_ROLLUP_SQL.format(where=where, prefix=prefix))
+    if where:
+        statement = statement.bindparams(bindparam('since', type_=DateTime))
+    return statement.columns(earliest_invoice=DateTime, latest_invoice=DateTime, **_ROLLUP_FLOATS)
+
+
+# window -> (portable statement, SQLite statement)
+_Q_ROLLUP = {
+    window: (_build_rollup(where, ''), _build_rollup(where, '+'))
+    for window, where in _ROLLUP_WHERE.items()
+}
+
+
+def _rollup_query(window: str):
+    """The rollup statement for a window, with the SQLite index hint only on SQLite."""
+    return _Q_ROLLUP[window][db_manager.engine.dialect.name == 'sqlite']
+
+
+def _rollup(rows, key: str) -> List[tuple]:
+    """Sum (provider, service) group rows up to (key, [count, total, usage total, usage count]) per key."""
+    totals = defaultdict(lambda: [0, 0.0, 0.0, 0])
+    for row in rows:
+        acc = totals[getattr(row, key)]
+        acc[0] += row.invoice_count
+        acc[1] += row.total_amount
+        acc[2] += row.usage_total
+        acc[3] += row.usage_count
+    return sorted(totals.items())
+
+
+def _compute_providers() -> Dict[str, Any]:
+    """Compute provider statistics."""
+    with db_manager.get_session() as session:
+        # Get provider statistics
+        provider_stats = session.execute(_rollup_query('all')).all()
+        
+        providers = []
+        for stat in provider_stats:
+            providers.append({
+                'provider_name': stat.provider_name,
+                'service_type': stat.service_type,
+                'invoice_count': stat.invoice_count,
+                'total_amount': round(stat.total_amount, 2),
+                'avg_amount': stat.avg_amount,
+                'latest_invoice': stat.latest_invoice.isoformat() if stat.latest_invoice else None,
+                'earliest_invoice': stat.earliest_invoice.isoformat() if stat.earliest_invoice else None
+            })
+        
+        return {'providers': providers}
+
+
+@lru_cache(maxsize=8)
+def _providers_json(version: tuple) -> bytes:
+    """Provider statistics as JSON, computed once per cache version."""
+    return _json_bytes(_compute_providers())
 
 
 @api_bp.route('/providers', methods=['GET'])
 def get_providers():
     """Get list of available providers and their statistics."""
     try:
-        with db_manager.get_session() as session:
-            # Get provider statistics
-            provider_stats = session.query(
-                Invoice.provider_name,
-                Invoice.service_type,
-                func.count(Invoice.id).label('invoice_count'),
-                func.sum(Invoice.total_amount).label('total_amount'),
-                func.avg(Invoice.total_amount).label('avg_amount'),
-                func.max(Invoice.invoice_date).label('latest_invoice'),
-                func.min(Invoice.invoice_date).label('earliest_invoice')
-            ).group_by(Invoice.provider_name, Invoice.service_type).all()
-            
-            providers = []
-            for stat in provider_stats:
-                providers.append({
-                    'provider_name': stat.provider_name,
-                    'service_type': stat.service_type,
-                    'invoice_count': stat.invoice_count,
-                    'total_amount': float(stat.total_amount) if stat.total_amount else 0,
-                    'avg_amount': float(stat.avg_amount) if stat.avg_amount else 0,
-                    'latest_invoice': stat.latest_invoice.isoformat() if stat.latest_invoice else None,
-                    'earliest_invoice': stat.earliest_invoice.isoformat() if stat.earliest_invoice else None
-                })
-            
-            return jsonify({'providers': providers})
-            
+        return _etag_response(_providers_json(_cache_version()))
+        
     except Exception as e:
         logger.error(f"Error fetching providers: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _json({'error': 'Internal server error'}, 500)
+
+
+# The /analytics aggregates run on every cache miss with a fixed shape, so they are kept as
+# prebuilt statements rather than rebuilt and compiled from ORM expressions each time.
+# SUMs are rounded to the column scale in SQL and read as Float rather than Decimal, with
+# empty aggregates coalesced to 0 there too, so rows go into the payload unconverted.
+# Usage charges (usage_quantity * usage_rate) are NULL when either side is missing, and SUM skips NULLs
+_Q_OVERVIEW = text(
+    "SELECT COUNT(id) AS total_invoices, COALESCE(ROUND(SUM(total_amount), 2), 0) AS total_amount, "
+    "COALESCE(AVG(total_amount), 0) AS avg_amount, "
+    "COALESCE(ROUND(SUM(service_charge), 2), 0) AS total_service_charges, "
+    "COALESCE(ROUND(SUM(usage_quantity * usage_rate), 4), 0) AS total_usage_charges "
+    "FROM invoices"
+).columns(total_amount=Float, avg_amount=Float, total_service_charges=Float, total_usage_charges=Float)
+_Q_MONTHLY = text(
+    "SELECT strftime('%Y-%m', invoice_date) AS month, COUNT(id) AS invoice_count, "
+    "ROUND(SUM(total_amount), 2) AS total_amount, AVG(total_amount) AS avg_amount "
+    "FROM invoices WHERE invoice_date >= :since "
+    "GROUP BY strftime('%Y-%m', invoice_date) ORDER BY month"
+).bindparams(bindparam('since', type_=DateTime)).columns(total_amount=Float, avg_amount=Float)
+
+# Runs the /analytics scans side by side on a cache miss; SQLite releases the GIL while
+# it executes, so they overlap on separate connections
+_analytics_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='analytics')
+
+
+def _fetch_all(statement, params: Optional[dict] = None) -> list:
+    """Run a read-only statement on its own pooled connection and return every row."""
+    with db_manager.engine.connect() as conn:
+        return conn.execute(statement, params or {}).all()
+
+
+# The service and provider breakdowns cover the same twelve months as the trends by default,
+# so both are a range scan of the covering index; ?window=all restores the full-table
+# breakdowns for yearly reports
+ANALYTICS_WINDOWS = tuple(_Q_ROLLUP)
+
+
+def _compute_analytics(window: str = '12m') -> Dict[str, Any]:
+    """
+    Compute the aggregated analytics payload.
+    
+    Args:
+        window: '12m' to limit the service and provider breakdowns to the last
+            twelve months, or 'all' to cover every invoice
+    """
+    twelve_months_ago = datetime.now() - timedelta(days=365)
+    params = {'since': twelve_months_ago} if window == '12m' else {}
+    
+    # The three scans are independent, so the monthly trends and the grouped breakdowns
+    # run on their own pooled connections while this thread reads the overview
+    monthly_future = _analytics_executor.submit(_fetch_all, _Q_MONTHLY, {'since': twelve_months_ago})
+    groups_future = _analytics_executor.submit(_fetch_all, _rollup_query(window), params)
+    
+    # Overall statistics in a single scan
+    total_invoices, total_amount, avg_amount, total_service_charges, total_usage_charges = (
+        _fetch_all(_Q_OVERVIEW)[0]
+    )
+    
+    # Monthly trends (last 12 months)
+    monthly_data = monthly_future.result()
+    
+    # Service type breakdown and provider performance, rolled up from one grouped scan
+    groups = groups_future.result()
+    service_breakdown = _rollup(groups, 'service_type')
+    provider_performance = _rollup(groups, 'provider_name')
+    
+    analytics = {
+        'overview': {
+            'total_invoices': total_invoices,
+            'total_amount': total_amount,
+            'average_amount': avg_amount,
+            'total_service_charges': total_service_charges,
+            'total_usage_charges': total_usage_charges,
+            'data_period': {
+                'start': twelve_months_ago.isoformat(),
+                'end': datetime.now().isoformat()
+            }
+        },
+        'monthly_trends': [
+            {
+                'month': data.month,
+                'invoice_count': data.invoice_count,
+                'total_amount': data.total_amount,
+                'avg_amount': data.avg_amount
+            }
+            for data in monthly_data
+        ],
+        'service_breakdown': [
+            {
+                'service_type': service_type,
+                'count': count,
+                'total': round(total, 2),
+                'average': total / count
+            }
+            for service_type, (count, total, _, _) in service_breakdown
+        ],
+        'provider_performance': [
+            {
+                'provider_name': provider_name,
+                'count': count,
+                'total': round(total, 2),
+                'avg_usage': usage_total / usage_count if usage_count else 0
+            }
+            for provider_name, (count, total, usage_total, usage_count) in provider_performance
+        ]
+    }
+    
+    return analytics
+
+
+@lru_cache(maxsize=8)
+def _analytics_json(version: tuple, day: date, window: str) -> bytes:
+    """
+    Analytics as JSON, computed once per cache version, day and window.
+    
+    The day is part of the key because the monthly trends cover a rolling
+    twelve-month window.
+    """
+    return _json_bytes(_compute_analytics(window))
 
 
 @api_bp.route('/analytics', methods=['GET'])
 def get_analytics():
     """Get aggregated analytics and statistics."""
     try:
-        with db_manager.get_session() as session:
-            # Overall statistics
-            total_invoices = session.query(func.count(Invoice.id)).scalar()
-            total_amount = session.query(func.sum(Invoice.total_amount)).scalar()
-            avg_amount = session.query(func.avg(Invoice.total_amount)).scalar()
-            total_service_charges = session.query(func.sum(Invoice.service_charge)).scalar()
-            
-            # Calculate total usage charges (usage_quantity * usage_rate)
-            total_usage_charges = session.query(
-                func.sum(Invoice.usage_quantity * Invoice.usage_rate)
-            ).filter(
-                and_(Invoice.usage_quantity.isnot(None), Invoice.usage_rate.isnot(None))
-            ).scalar()
-            
-            # Monthly trends (last 12 months)
-            twelve_months_ago = datetime.now() - timedelta(days=365)
-            monthly_data = session.query(
-                func.strftime('%Y-%m', Invoice.invoice_date).label('month'),
-                func.count(Invoice.id).label('invoice_count'),
-                func.sum(Invoice.total_amount).label('total_amount'),
-                func.avg(Invoice.total_amount).label('avg_amount')
-            ).filter(
-                Invoice.invoice_date >= twelve_months_ago
-            ).group_by(
-                func.strftime('%Y-%m', Invoice.invoice_date)
-            ).order_by('month').all()
-            
-            # Service type breakdown
-            service_breakdown = session.query(
-                Invoice.service_type,
-                func.count(Invoice.id).label('count'),
-                func.sum(Invoice.total_amount).label('total'),
-                func.avg(Invoice.total_amount).label('average')
-            ).group_by(Invoice.service_type).all()
-            
-            # Provider performance
-            provider_performance = session.query(
-                Invoice.provider_name,
-                func.count(Invoice.id).label('count'),
-                func.sum(Invoice.total_amount).label('total'),
-                func.avg(Invoice.usage_quantity).label('avg_usage')
-            ).group_by(Invoice.provider_name).all()
+        window = request.args.get('window', '12m')
+        if window not in ANALYTICS_WINDOWS:
+            return _json({'error': f"Invalid window. Use one of: {', '.join(ANALYTICS_WINDOWS)}"}, 400)
+        
+        return _etag_response(_analytics_json(_cache_version(), date.today(), window))
+        
+    except Exception as e:
+        logger.error(f"Error generating analytics: {str(e)}")
+        return _json({'error': 'Internal server error'}, 500)
+
+
+_INVOICE_MONTH = func.strftime('%Y-%m', Invoice.invoice_date)
+_USAGE_CHARGE = Invoice.usage_quantity * Invoice.usage_rate
+_COSTED = and_(Invoice.usage_quantity.isnot(None), Invoice.usage_rate.isnot(None))
+
+# Per (service, month) aggregates behind /analytics/enhanced. Sums come back unrounded and
+# alongside non-null counts, so months can be rolled up to service totals and averages;
+# the rate extremes are cast to floats in SQL, since SQLite keeps whole-number rates as integers.
+# The costed_* columns only cover invoices that have both a usage quantity and rate.
+_SERVICE_MONTH_COLUMNS = (
+    Invoice.service_type,
+    _INVOICE_MONTH.label('month'),
+    func.count().label('invoice_count'),
+    func.sum(Invoice.total_amount, type_=Float).label('total_amount'),
+    func.sum(Invoice.usage_quantity, type_=Float).label('usage_total'),
+    func.count(Invoice.usage_quantity).label('usage_count'),
+    func.sum(Invoice.usage_rate, type_=Float).label('rate_total'),
+    func.count(Invoice.usage_rate).label('rate_count'),
+    cast(func.min(Invoice.usage_rate), Float).label('min_rate'),
+    cast(func.max(Invoice.usage_rate), Float).label('max_rate'),
+    func.sum(Invoice.service_charge, type_=Float).label('fee_total'),
+    func.count(Invoice.service_charge).label('fee_count'),
+    func.sum(_USAGE_CHARGE, type_=Float).label('usage_charges'),
+    func.count(_USAGE_CHARGE).label('costed_count'),
+    func.sum(case((_COSTED, Invoice.total_amount)), type_=Float).label('costed_amount'),
+    func.sum(case((_COSTED, Invoice.service_charge)), type_=Float).label('costed_service_charges'),
+)
+_SERVICE_MONTH_SUMS = tuple(column.name for column in _SERVICE_MONTH_COLUMNS[2:]
+                            if column.name not in ('min_rate', 'max_rate'))
+
+
+def _sum_groups(groups) -> Dict[str, float]:
+    """Add up the sums and counts of (service, month) rows; NULL sums count as 0."""
+    return {name: sum(getattr(g, name) or 0 for g in groups) for name in _SERVICE_MONTH_SUMS}
+
+
+def _rounded(total: float, scale: int) -> float:
+    """Round a rolled-up sum to its column's scale as a float, 0 when there is none."""
+    return round(float(total), scale) or 0
+
+
+def _ratio(total: float, count: int) -> float:
+    """Average from a rolled-up sum and count, 0 when there is nothing to average."""
+    return total / count if count and total else 0
+
+
+def _compute_enhanced_analytics(service_type: str, months: int, analysis_type: str) -> Dict[str, Any]:
+    """
+    Compute the enhanced analytics payload.
+    
+    Args:
+        service_type: Service to restrict the window to, or '' for all services
+        months: Length of the window, in 30-day months
+        analysis_type: Echoed back in the filters
+    """
+    with db_manager.get_session() as session:
+        # Base query filter
+        base_filter = []
+        
+        # Date filter
+        start_date = datetime.now() - timedelta(days=months*30)
+        base_filter.append(Invoice.invoice_date >= start_date)
+        
+        # Service type filter
+        if service_type:
+            base_filter.append(Invoice.service_type == service_type)
+        
+        # A single pass over the window grouped by service and month; the trends, statistics,
+        # rate comparison and cost breakdown below are all pivoted from these rows
+        groups = session.query(*_SERVICE_MONTH_COLUMNS).filter(and_(*base_filter)).group_by(
+            Invoice.service_type, _INVOICE_MONTH
+        ).order_by(Invoice.service_type, _INVOICE_MONTH).all()
+        
+        by_service = defaultdict(list)
+        for group in groups:
+            by_service[group.service_type].append(group)
+        
+        # Service-specific monthly trends
+        monthly_trends_by_service = {}
+        service_stats = {}
+        for service in SERVICE_TYPES:
+            service_groups = by_service.get(service, [])
             
-            analytics = {
-                'overview': {
-                    'total_invoices': total_invoices or 0,
-                    'total_amount': float(total_amount) if total_amount else 0,
-                    'average_amount': float(avg_amount) if avg_amount else 0,
-                    'total_service_charges': float(total_service_charges) if total_service_charges else 0,
-                    'total_usage_charges': float(total_usage_charges) if total_usage_charges else 0,
-                    'data_period': {
-                        'start': twelve_months_ago.isoformat(),
-                        'end': datetime.now().isoformat()
-                    }
-                },
-                'monthly_trends': [
+            monthly_trends_by_service[service] = {
+                'spending': [
                     {
-                        'month': data.month,
-                        'invoice_count': data.invoice_count,
-                        'total_amount': float(data.total_amount) if data.total_amount else 0,
-                        'avg_amount': float(data.avg_amount) if data.avg_amount else 0
-                    }
-                    for data in monthly_data
+                        'month': g.month,
+                        'total_amount': _rounded(g.total_amount, 2),
+                        'avg_amount': _ratio(g.total_amount, g.invoice_count),
+                        'count': g.invoice_count
+                    } for g in service_groups
                 ],
-                'service_breakdown': [
+                'usage': [
                     {
-                        'service_type': service.service_type,
-                        'count': service.count,
-                        'total': float(service.total) if service.total else 0,
-                        'average': float(service.average) if service.average else 0
-                    }
-                    for service in service_breakdown
+                        'month': g.month,
+                        'total_usage': _rounded(g.usage_total, 3),
+                        'avg_usage': _ratio(g.usage_total, g.usage_count)
+                    } for g in service_groups if g.usage_count
                 ],
-                'provider_performance': [
+                'rates': [
                     {
-                        'provider_name': provider.provider_name,
-                        'count': provider.count,
-                        'total': float(provider.total) if provider.total else 0,
-                        'avg_usage': float(provider.avg_usage) if provider.avg_usage else 0
-                    }
-                    for provider in provider_performance
+                        'month': g.month,
+                        'avg_rate': _ratio(g.rate_total, g.rate_count),
+                        'min_rate': g.min_rate,
+                        'max_rate': g.max_rate
+                    } for g in service_groups if g.rate_count
+                ],
+                'service_fees': [
+                    {
+                        'month': g.month,
+                        'total_service_charge': _rounded(g.fee_total, 2),
+                        'avg_service_charge': _ratio(g.fee_total, g.fee_count)
+                    } for g in service_groups if g.fee_count
                 ]
             }
             
-            return jsonify(analytics)
+            # Overall statistics by service
+            totals = _sum_groups(service_groups)
+            service_stats[service] = {
+                'total_invoices': totals['invoice_count'],
+                'total_amount': _rounded(totals['total_amount'], 2),
+                'avg_amount': _ratio(totals['total_amount'], totals['invoice_count']),
+                'total_service_charges': _rounded(totals['fee_total'], 2),
+                'avg_rate': _ratio(totals['rate_total'], totals['rate_count']),
+                'total_usage': _rounded(totals['usage_total'], 3),
+                'avg_usage': _ratio(totals['usage_total'], totals['usage_count'])
+            }
+        
+        # Rate comparison and cost breakdown across every service type in the window
+        rate_comparison = []
+        cost_breakdown = []
+        for service, service_groups in by_service.items():
+            totals = _sum_groups(service_groups)
+            if totals['rate_count']:
+                rate_comparison.append({
+                    'service_type': service,
+                    'avg_rate': _ratio(totals['rate_total'], totals['rate_count']),
+                    'min_rate': min(g.min_rate for g in service_groups if g.rate_count),
+                    'max_rate': max(g.max_rate for g in service_groups if g.rate_count),
+                    'count': totals['rate_count']
+                })
             
-    except Exception as e:
-        logger.error(f"Error generating analytics: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+            # Only invoices with both a usage quantity and rate have a usage charge to compare
+            if totals['costed_count']:
+                service_charges = _rounded(totals['costed_service_charges'], 2)
+                usage_charges = _rounded(totals['usage_charges'], 4)
+                amount = _rounded(totals['costed_amount'], 2)
+                cost_breakdown.append({
+                    'service_type': service,
+                    'total_service_charges': service_charges,
+                    'total_usage_charges': usage_charges,
+                    'total_amount': amount,
+                    'service_charge_percentage': (service_charges / amount * 100) if amount and service_charges else 0,
+                    'usage_charge_percentage': (usage_charges / amount * 100) if amount and usage_charges else 0
+                })
+        
+        enhanced_analytics = {
+            'filters': {
+                'service_type': service_type or 'All Services',
+                'months': months,
+                'analysis_type': analysis_type,
+                'period': {
+                    'start': start_date.isoformat(),
+                    'end': datetime.now().isoformat()
+                }
+            },
+            'service_trends': monthly_trends_by_service,
+            'service_statistics': service_stats,
+            'rate_comparison': rate_comparison,
+            'cost_breakdown': cost_breakdown
+        }
+        
+        return enhanced_analytics
+
+
+@lru_cache(maxsize=32)
+def _enhanced_analytics_json(version: tuple, day: date, service_type: str, months: int, analysis_type: str) -> bytes:
+    """Enhanced analytics as JSON, computed once per cache version, day and filter combination."""
+    return _json_bytes(_compute_enhanced_analytics(service_type, months, analysis_type))
 
 
 @api_bp.route('/analytics/enhanced', methods=['GET'])
@@ -296,220 +1080,162 @@ def get_enhanced_analytics():
         months = int(request.args.get('months', 12))
         analysis_type = request.args.get('analysis_type', 'spending')
         
-        with db_manager.get_session() as session:
-            # Base query filter
-            base_filter = []
-            
-            # Date filter
-            start_date = datetime.now() - timedelta(days=months*30)
-            base_filter.append(Invoice.invoice_date >= start_date)
-            
-            # Service type filter
-            if service_type:
-                base_filter.append(Invoice.service_type == service_type)
-            
-            # Service-specific monthly trends
-            monthly_trends_by_service = {}
-            for service in ['Electricity', 'Gas', 'Water']:
-                service_filter = base_filter + [Invoice.service_type == service]
-                
-                # Spending trends
-                spending_data = session.query(
-                    func.strftime('%Y-%m', Invoice.invoice_date).label('month'),
-                    func.sum(Invoice.total_amount).label('total_amount'),
-                    func.avg(Invoice.total_amount).label('avg_amount'),
-                    func.count(Invoice.id).label('count')
-                ).filter(and_(*service_filter)).group_by(
-                    func.strftime('%Y-%m', Invoice.invoice_date)
-                ).order_by('month').all()
-                
-                # Usage trends
-                usage_data = session.query(
-                    func.strftime('%Y-%m', Invoice.invoice_date).label('month'),
-                    func.sum(Invoice.usage_quantity).label('total_usage'),
-                    func.avg(Invoice.usage_quantity).label('avg_usage')
-                ).filter(and_(*service_filter)).filter(
-                    Invoice.usage_quantity.isnot(None)
-                ).group_by(
-                    func.strftime('%Y-%m', Invoice.invoice_date)
-                ).order_by('month').all()
-                
-                # Rate trends  
-                rate_data = session.query(
-                    func.strftime('%Y-%m', Invoice.invoice_date).label('month'),
-                    func.avg(Invoice.usage_rate).label('avg_rate'),
-                    func.min(Invoice.usage_rate).label('min_rate'),
-                    func.max(Invoice.usage_rate).label('max_rate')
-                ).filter(and_(*service_filter)).filter(
-                    Invoice.usage_rate.isnot(None)
-                ).group_by(
-                    func.strftime('%Y-%m', Invoice.invoice_date)
-                ).order_by('month').all()
-                
-                # Service fee trends
-                service_fee_data = session.query(
-                    func.strftime('%Y-%m', Invoice.invoice_date).label('month'),
-                    func.sum(Invoice.service_charge).label('total_service_charge'),
-                    func.avg(Invoice.service_charge).label('avg_service_charge')
-                ).filter(and_(*service_filter)).filter(
-                    Invoice.service_charge.isnot(None)
-                ).group_by(
-                    func.strftime('%Y-%m', Invoice.invoice_date)
-                ).order_by('month').all()
-                
-                monthly_trends_by_service[service] = {
-                    'spending': [
-                        {
-                            'month': d.month,
-                            'total_amount': float(d.total_amount) if d.total_amount else 0,
-                            'avg_amount': float(d.avg_amount) if d.avg_amount else 0,
-                            'count': d.count
-                        } for d in spending_data
-                    ],
-                    'usage': [
-                        {
-                            'month': d.month,
-                            'total_usage': float(d.total_usage) if d.total_usage else 0,
-                            'avg_usage': float(d.avg_usage) if d.avg_usage else 0
-                        } for d in usage_data
-                    ],
-                    'rates': [
-                        {
-                            'month': d.month,
-                            'avg_rate': float(d.avg_rate) if d.avg_rate else 0,
-                            'min_rate': float(d.min_rate) if d.min_rate else 0,
-                            'max_rate': float(d.max_rate) if d.max_rate else 0
-                        } for d in rate_data
-                    ],
-                    'service_fees': [
-                        {
-                            'month': d.month,
-                            'total_service_charge': float(d.total_service_charge) if d.total_service_charge else 0,
-                            'avg_service_charge': float(d.avg_service_charge) if d.avg_service_charge else 0
-                        } for d in service_fee_data
-                    ]
-                }
-            
-            # Overall statistics by service
-            service_stats = {}
-            for service in ['Electricity', 'Gas', 'Water']:
-                service_filter = base_filter + [Invoice.service_type == service]
-                
-                stats = session.query(
-                    func.count(Invoice.id).label('total_invoices'),
-                    func.sum(Invoice.total_amount).label('total_amount'),
-                    func.avg(Invoice.total_amount).label('avg_amount'),
-                    func.sum(Invoice.service_charge).label('total_service_charges'),
-                    func.avg(Invoice.usage_rate).label('avg_rate'),
-                    func.sum(Invoice.usage_quantity).label('total_usage'),
-                    func.avg(Invoice.usage_quantity).label('avg_usage')
-                ).filter(and_(*service_filter)).first()
-                
-                service_stats[service] = {
-                    'total_invoices': stats.total_invoices or 0,
-                    'total_amount': float(stats.total_amount) if stats.total_amount else 0,
-                    'avg_amount': float(stats.avg_amount) if stats.avg_amount else 0,
-                    'total_service_charges': float(stats.total_service_charges) if stats.total_service_charges else 0,
-                    'avg_rate': float(stats.avg_rate) if stats.avg_rate else 0,
-                    'total_usage': float(stats.total_usage) if stats.total_usage else 0,
-                    'avg_usage': float(stats.avg_usage) if stats.avg_usage else 0
-                }
-            
-            # Rate comparison across services
-            rate_comparison = session.query(
-                Invoice.service_type,
-                func.avg(Invoice.usage_rate).label('avg_rate'),
-                func.min(Invoice.usage_rate).label('min_rate'),
-                func.max(Invoice.usage_rate).label('max_rate'),
-                func.count(Invoice.id).label('count')
-            ).filter(and_(*base_filter)).filter(
-                Invoice.usage_rate.isnot(None)
-            ).group_by(Invoice.service_type).all()
-            
-            # Cost breakdown analysis
-            cost_breakdown = session.query(
-                Invoice.service_type,
-                func.sum(Invoice.service_charge).label('total_service_charges'),
-                func.sum(Invoice.usage_quantity * Invoice.usage_rate).label('total_usage_charges'),
-                func.sum(Invoice.total_amount).label('total_amount')
-            ).filter(and_(*base_filter)).filter(
-                and_(Invoice.usage_quantity.isnot(None), Invoice.usage_rate.isnot(None))
-            ).group_by(Invoice.service_type).all()
-            
-            enhanced_analytics = {
-                'filters': {
-                    'service_type': service_type or 'All Services',
-                    'months': months,
-                    'analysis_type': analysis_type,
-                    'period': {
-                        'start': start_date.isoformat(),
-                        'end': datetime.now().isoformat()
-                    }
-                },
-                'service_trends': monthly_trends_by_service,
-                'service_statistics': service_stats,
-                'rate_comparison': [
-                    {
-                        'service_type': r.service_type,
-                        'avg_rate': float(r.avg_rate) if r.avg_rate else 0,
-                        'min_rate': float(r.min_rate) if r.min_rate else 0,
-                        'max_rate': float(r.max_rate) if r.max_rate else 0,
-                        'count': r.count
-                    } for r in rate_comparison
-                ],
-                'cost_breakdown': [
-                    {
-                        'service_type': c.service_type,
-                        'total_service_charges': float(c.total_service_charges) if c.total_service_charges else 0,
-                        'total_usage_charges': float(c.total_usage_charges) if c.total_usage_charges else 0,
-                        'total_amount': float(c.total_amount) if c.total_amount else 0,
-                        'service_charge_percentage': (float(c.total_service_charges) / float(c.total_amount) * 100) if c.total_amount and c.total_service_charges else 0,
-                        'usage_charge_percentage': (float(c.total_usage_charges) / float(c.total_amount) * 100) if c.total_amount and c.total_usage_charges else 0
-                    } for c in cost_breakdown
-                ]
-            }
-            
-            return jsonify(enhanced_analytics)
-            
+        return _etag_response(
+            _enhanced_analytics_json(_cache_version(), date.today(), service_type, months, analysis_type)
+        )
+        
     except Exception as e:
         logger.error(f"Error generating enhanced analytics: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _json({'error': 'Internal server error'}, 500)
+
+
+# Syncs run one at a time off the request thread; PDF parsing inside a sync has its own process pool
+_sync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sync')
+_sync_lock = threading.Lock()
+_active_syncs = {}  # (provider, mode) -> processing_history id of the queued/running sync
+
+# Days of email searched per sync mode
+SYNC_DAYS_BACK = {'incremental': 7, 'full': 30}
+
+# Jobs queued by /sync/full, /sync/email-only, /sync/pdf-only and /pdf/reprocess, by id, for
+# polling at /sync/jobs/<id>; the oldest finished ones are dropped beyond SYNC_JOBS_KEPT.
+# They are held in this process only, which is why gunicorn.conf.py runs a single worker
+SYNC_JOBS_KEPT = 50
+_sync_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def _update_sync_history(history_id: int, **fields):
+    """Update the processing_history row tracking a background sync."""
+    with db_manager.get_session() as session:
+        session.query(ProcessingHistory).filter(ProcessingHistory.id == history_id).update(fields)
+        session.commit()
+
+
+def _run_sync(history_id: int, provider: Optional[str], mode: str, integration_service):
+    """Background job: run the integration pipeline and record its outcome."""
+    start = time.monotonic()
+    try:
+        _update_sync_history(history_id, status='running')
+        
+        result = integration_service.run_full_sync(provider, SYNC_DAYS_BACK[mode])
+        parsing = result.get('pdf_parsing', {})
+        _update_sync_history(
+            history_id,
+            status='done' if result.get('success') else 'failed',
+            invoices_found=parsing.get('total_files', 0),
+            invoices_processed=parsing.get('successful', 0),
+            invoices_failed=parsing.get('failed', 0),
+            error_details=result.get('error'),
+            processing_time_seconds=int(time.monotonic() - start)
+        )
+        logger.info(f"Sync {history_id} finished - success: {result.get('success')}")
+        
+    except Exception as e:
+        logger.error(f"Sync {history_id} failed: {e}")
+        try:
+            _update_sync_history(history_id, status='failed', error_details=str(e),
+                                 processing_time_seconds=int(time.monotonic() - start))
+        except Exception as update_error:
+            logger.error(f"Could not record failure of sync {history_id}: {update_error}")
+    finally:
+        with _sync_lock:
+            _active_syncs.pop((provider, mode), None)
+
+
+def _update_sync_job(job_id: str, **fields):
+    """Update the in-memory record of a queued pipeline job."""
+    with _sync_lock:
+        _sync_jobs[job_id].update(fields)
+
+
+def _run_sync_job(job_id: str, task, *args):
+    """Background job: run one integration pipeline call and keep its result for polling."""
+    _update_sync_job(job_id, status='started', started_at=datetime.now())
+    try:
+        result = task(*args)
+        _update_sync_job(job_id, status='finished', result=result, ended_at=datetime.now())
+    except Exception as e:
+        logger.error(f"Sync job {job_id} failed: {e}")
+        _update_sync_job(job_id, status='failed', error=str(e), ended_at=datetime.now())
+
+
+def _enqueue_sync_job(job_type: str, task, *args) -> Response:
+    """Queue a pipeline call behind any running sync and answer 202 with its job id."""
+    job_id = uuid.uuid4().hex
+    with _sync_lock:
+        _sync_jobs[job_id] = {
+            'job_id': job_id,
+            'type': job_type,
+            'status': 'queued',
+            'queued_at': datetime.now(),
+            'started_at': None,
+            'ended_at': None,
+            'result': None,
+            'error': None
+        }
+        finished = [key for key, job in _sync_jobs.items() if job['status'] in ('finished', 'failed')]
+        for key in finished[:max(len(_sync_jobs) - SYNC_JOBS_KEPT, 0)]:
+            del _sync_jobs[key]
+    
+    _sync_executor.submit(_run_sync_job, job_id, task, *args)
+    logger.info(f"Sync job {job_id} queued: {job_type}")
+    
+    return _json({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f"{api_bp.url_prefix}/sync/jobs/{job_id}"
+    }, 202)
 
 
 @api_bp.route('/sync', methods=['POST'])
 def trigger_sync():
-    """Trigger manual sync of invoices from email providers."""
+    """Queue a sync of invoices from email providers; poll /processing-history for progress."""
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
+    
     try:
         # Get optional parameters
-        provider = request.json.get('provider') if request.is_json else None
-        mode = request.json.get('mode', 'incremental') if request.is_json else 'incremental'
+        payload = request.get_json(silent=True) or {}
+        provider = payload.get('provider')
+        mode = payload.get('mode', 'incremental')
+        
+        if mode not in SYNC_DAYS_BACK:
+            return _json({'error': f"Invalid mode '{mode}'. Use one of: {', '.join(SYNC_DAYS_BACK)}"}, 400)
+        
+        with _sync_lock:
+            # An identical sync that is already queued or running covers this request
+            history_id = _active_syncs.get((provider, mode))
+            coalesced = history_id is not None
+            
+            if not coalesced:
+                with db_manager.get_session() as session:
+                    history = ProcessingHistory(provider_name=provider or 'all', status='queued')
+                    session.add(history)
+                    session.commit()
+                    history_id = history.id
+                
+                _active_syncs[(provider, mode)] = history_id
+                _sync_executor.submit(_run_sync, history_id, provider, mode, _service('integration_service'))
         
-        # In a real implementation, this would trigger the email fetcher
-        # For now, we'll simulate the process
         sync_result = {
-            'status': 'initiated',
+            'status': 'already_queued' if coalesced else 'initiated',
+            'history_id': history_id,
             'timestamp': datetime.now().isoformat(),
             'mode': mode,
             'provider': provider,
-            'message': 'Sync process initiated. Check processing history for results.',
+            'message': ('A matching sync is already in progress. Check processing history for results.'
+                        if coalesced else 'Sync process initiated. Check processing history for results.'),
             'estimated_duration': '2-5 minutes'
         }
         
         # Log the sync request
-        logger.info(f"Manual sync triggered - Mode: {mode}, Provider: {provider}")
+        logger.info(f"Manual sync triggered - Mode: {mode}, Provider: {provider}, History ID: {history_id}")
         
-        # TODO: Implement actual sync logic
-        # This would typically involve:
-        # 1. Calling the email_fetcher service
-        # 2. Running PDF parser on new files
-        # 3. Updating the database
-        # 4. Returning real-time status
-        
-        return jsonify(sync_result), 202  # 202 Accepted
+        return _json(sync_result, 202)  # 202 Accepted
         
     except Exception as e:
         logger.error(f"Error triggering sync: {str(e)}")
-        return jsonify({'error': 'Failed to initiate sync'}), 500
+        return _json({'error': 'Failed to initiate sync'}, 500)
 
 
 @api_bp.route('/processing-history', methods=['GET'])
@@ -521,30 +1247,55 @@ def get_processing_history():
             page = int(request.args.get('page', 1))
             per_page = min(int(request.args.get('per_page', 20)), 50)
             
-            # Query processing history
-            query = session.query(ProcessingHistory).order_by(desc(ProcessingHistory.processing_date))
+            # Query processing history, newest first with the id breaking ties for keyset paging
+            query = session.query(
+                *PROCESSING_HISTORY_COLUMNS, _stored_position(ProcessingHistory.processing_date).label('position')
+            ).order_by(
+                desc(ProcessingHistory.processing_date), desc(ProcessingHistory.id)
+            )
             
             # Filter by provider if specified
             provider = request.args.get('provider')
             if provider:
                 query = query.filter(ProcessingHistory.provider_name == provider)
             
-            total_count = query.count()
-            history = query.offset((page - 1) * per_page).limit(per_page).all()
+            cursor = request.args.get('cursor')
+            count_query = query
+            if cursor:
+                try:
+                    cursor_date, cursor_id = _decode_cursor(cursor)
+                    cursor_id = int(cursor_id)
+                except ValueError:
+                    return _json({'error': 'Invalid cursor'}, 400)
+                
+                position = tuple_(_stored_position(ProcessingHistory.processing_date), ProcessingHistory.id)
+                rows = query.filter(position < (cursor_date, cursor_id)).limit(per_page + 1).all()
+            else:
+                rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
             
-            return jsonify({
-                'history': [item.to_dict() for item in history],
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total_count,
-                    'pages': (total_count + per_page - 1) // per_page
-                }
+            history = rows[:per_page]
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'has_next': len(rows) > per_page,
+                'next_cursor': (_encode_cursor(history[-1].position, history[-1].id)
+                                if len(rows) > per_page else None)
+            }
+            
+            if request.args.get('include_total') in ('1', 'true'):
+                total_count, approximate = _total_count(count_query, ProcessingHistory.__tablename__, bool(provider))
+                pagination['total'] = total_count
+                pagination['total_is_approximate'] = approximate
+                pagination['pages'] = (total_count + per_page - 1) // per_page
+            
+            return _json({
+                'history': [processing_history_to_dict(item) for item in history],
+                'pagination': pagination
             })
             
     except Exception as e:
         logger.error(f"Error fetching processing history: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _json({'error': 'Internal server error'}, 500)
 
 
 
@@ -552,19 +1303,19 @@ def get_processing_history():
 @api_bp.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return _json({'error': 'Endpoint not found'}, 404)
 
 
 @api_bp.errorhandler(405)
 def method_not_allowed(error):
     """Handle 405 errors."""
-    return jsonify({'error': 'Method not allowed'}), 405
+    return _json({'error': 'Method not allowed'}, 405)
 
 
 @api_bp.errorhandler(400)
 def bad_request(error):
     """Handle 400 errors."""
-    return jsonify({'error': 'Bad request'}), 400
+    return _json({'error': 'Bad request'}, 400)
 
 
 # New Integration Endpoints
@@ -572,233 +1323,239 @@ def bad_request(error):
 @api_bp.route('/system/status', methods=['GET'])
 def get_system_status():
     """Get comprehensive system status including all services."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({
+    if not _integration_available():
+        return _json({
             'error': 'Integration services not available',
             'basic_health': 'API running but email/PDF services not loaded'
-        }), 503
+        }, 503)
     
     try:
-        integration_service = IntegrationService()
-        status = integration_service.get_system_status()
-        
-        return jsonify(status)
+        integration_service = _service('integration_service')
+        return _cached_status('system', integration_service.get_system_status)
         
     except Exception as e:
         logger.error(f"Error getting system status: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/sync/full', methods=['POST'])
 def run_full_sync():
-    """Run complete email fetch and PDF parsing pipeline."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    """Queue the complete email fetch and PDF parsing pipeline; poll /sync/jobs/<id> for the result."""
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         provider = data.get('provider')
         days_back = data.get('days_back', 7)
         
-        integration_service = IntegrationService()
-        result = integration_service.run_full_sync(provider, days_back)
-        
-        return jsonify(result)
+        integration_service = _service('integration_service')
+        return _enqueue_sync_job('full', integration_service.run_full_sync, provider, days_back)
         
     except Exception as e:
         logger.error(f"Error running full sync: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/sync/email-only', methods=['POST'])
 def run_email_sync():
-    """Run email fetch without PDF parsing."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    """Queue an email fetch without PDF parsing; poll /sync/jobs/<id> for the result."""
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         provider = data.get('provider')
         days_back = data.get('days_back', 7)
         
-        integration_service = IntegrationService()
-        result = integration_service.run_email_sync_only(provider, days_back)
-        
-        return jsonify(result)
+        integration_service = _service('integration_service')
+        return _enqueue_sync_job('email-only', integration_service.run_email_sync_only, provider, days_back)
         
     except Exception as e:
         logger.error(f"Error running email sync: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/sync/pdf-only', methods=['POST'])
 def run_pdf_parsing():
-    """Parse existing PDFs without fetching new emails."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    """Queue parsing of existing PDFs without fetching new emails; poll /sync/jobs/<id> for the result."""
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         provider = data.get('provider')
         
-        integration_service = IntegrationService()
-        result = integration_service.run_pdf_parsing_only(provider)
-        
-        return jsonify(result)
+        integration_service = _service('integration_service')
+        return _enqueue_sync_job('pdf-only', integration_service.run_pdf_parsing_only, provider)
         
     except Exception as e:
         logger.error(f"Error running PDF parsing: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+
+@api_bp.route('/sync/jobs/<string:job_id>', methods=['GET'])
+@api_bp.route('/pdf/reprocess/<string:job_id>', methods=['GET'])
+def get_sync_job(job_id: str):
+    """Get the status, and once finished the result, of a queued pipeline job."""
+    with _sync_lock:
+        job = _sync_jobs.get(job_id)
+        job = dict(job) if job else None
+    
+    if job is None:
+        return _json({'error': 'Sync job not found'}, 404)
+    return _json(job)
 
 
 @api_bp.route('/sync/history', methods=['GET'])
 def get_sync_history():
     """Get batch operation history."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
         limit = int(request.args.get('limit', 20))
         
-        integration_service = IntegrationService()
+        integration_service = _service('integration_service')
         history = integration_service.get_sync_history(limit)
         
-        return jsonify({'history': history})
+        return _json({'history': history})
         
     except Exception as e:
         logger.error(f"Error getting sync history: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/email/status', methods=['GET'])
 def get_email_status():
     """Get email service authentication status."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        email_service = EmailService()
-        status = email_service.get_service_status()
-        
-        return jsonify(status)
+        email_service = _service('email_service')
+        return _cached_status('email', email_service.get_service_status)
         
     except Exception as e:
         logger.error(f"Error getting email status: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/pdf/statistics', methods=['GET'])
 def get_pdf_statistics():
     """Get PDF processing statistics."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        pdf_service = PDFService()
+        pdf_service = _service('pdf_service')
         stats = pdf_service.get_processing_statistics()
         
-        return jsonify(stats)
+        return _json(stats)
         
     except Exception as e:
         logger.error(f"Error getting PDF statistics: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/pdf/reprocess', methods=['POST'])
 def reprocess_failed_pdfs():
-    """Reprocess PDFs that previously failed."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    """Queue reprocessing of PDFs that previously failed; poll /pdf/reprocess/<id> for the result."""
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         provider = data.get('provider')
         
-        pdf_service = PDFService()
-        result = pdf_service.reprocess_failed_pdfs(provider)
-        
-        return jsonify(result)
+        pdf_service = _service('pdf_service')
+        return _enqueue_sync_job('pdf-reprocess', pdf_service.reprocess_failed_pdfs, provider)
         
     except Exception as e:
         logger.error(f"Error reprocessing PDFs: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/templates/test', methods=['POST'])
 def test_template():
     """Test a parsing template with sample PDF."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'provider' not in data or 'pdf_path' not in data:
-            return jsonify({'error': 'provider and pdf_path required'}), 400
+            return _json({'error': 'provider and pdf_path required'}, 400)
         
         provider = data['provider']
         pdf_path = data['pdf_path']
         
-        pdf_service = PDFService()
+        pdf_service = _service('pdf_service')
         result = pdf_service.test_template_with_sample(provider, pdf_path)
         
-        return jsonify(result)
+        return _json(result)
         
     except Exception as e:
         logger.error(f"Error testing template: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 # =============================================================================
 # CONFIGURATION ENDPOINTS
 # =============================================================================
 
+def _gmail_configuration_view() -> Dict[str, Any]:
+    """Build the /configuration/gmail payload, with the credentials masked."""
+    email_service = _service('email_service')
+    auth_adapter = email_service.auth_adapter
+    
+    gmail_config = auth_adapter.credentials.get('gmail', {})
+    
+    # Mask sensitive data
+    masked_config = {
+        'client_id': gmail_config.get('client_id', ''),
+        'client_secret': '••••••••' if gmail_config.get('client_secret') else '',
+        'refresh_token': '••••••••' if gmail_config.get('refresh_token') else '',
+        'status': 'configured' if gmail_config.get('client_id') and gmail_config.get('client_secret') else 'not_configured'
+    }
+    
+    return {
+        'success': True,
+        'config': masked_config
+    }
+
+
 @api_bp.route('/configuration/gmail', methods=['GET'])
 def get_gmail_configuration():
     """Get current Gmail configuration (masked credentials)."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        email_service = EmailService()
-        auth_adapter = email_service.auth_adapter
-        
-        gmail_config = auth_adapter.credentials.get('gmail', {})
-        
-        # Mask sensitive data
-        masked_config = {
-            'client_id': gmail_config.get('client_id', ''),
-            'client_secret': '••••••••' if gmail_config.get('client_secret') else '',
-            'refresh_token': '••••••••' if gmail_config.get('refresh_token') else '',
-            'status': 'configured' if gmail_config.get('client_id') and gmail_config.get('client_secret') else 'not_configured'
-        }
-        
-        return jsonify({
-            'success': True,
-            'config': masked_config
-        })
+        return _cached_status('gmail-config', _gmail_configuration_view, ttl=None)
         
     except Exception as e:
         logger.error(f"Error getting Gmail configuration: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/configuration/gmail', methods=['POST'])
 def save_gmail_configuration():
     """Save Gmail configuration."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
-            return jsonify({'error': 'No configuration data provided'}), 400
+            return _json({'error': 'No configuration data provided'}, 400)
         
-        required_fields = ['client_id', 'client_secret']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'{field} is required'}), 400
+        missing = _missing_fields(data, GMAIL_REQUIRED_FIELDS)
+        if missing:
+            verb = 'is' if len(missing) == 1 else 'are'
+            return _json({'error': f"{', '.join(missing)} {verb} required", 'missing_fields': missing}, 400)
         
-        email_service = EmailService()
+        email_service = _service('email_service')
         auth_adapter = email_service.auth_adapter
         
         # Update Gmail configuration
@@ -812,100 +1569,98 @@ def save_gmail_configuration():
         if data.get('refresh_token'):
             gmail_config['refresh_token'] = data['refresh_token']
         
-        # Save to file
+        # Save to file; the shared service already holds the updated credentials, but the
+        # cached status payloads still describe the old ones
         auth_adapter._save_credentials()
+        _status_cache.clear()
         
-        return jsonify({
+        return _json({
             'success': True,
             'message': 'Gmail configuration saved successfully'
         })
         
     except Exception as e:
         logger.error(f"Error saving Gmail configuration: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/configuration/gmail/test', methods=['POST'])
 def test_gmail_connection():
     """Test Gmail connection."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        email_service = EmailService()
+        email_service = _service('email_service')
         auth_adapter = email_service.auth_adapter
         
         # Try to get credentials
         creds = auth_adapter.get_gmail_credentials()
         if not creds:
-            return jsonify({'error': 'Gmail credentials not configured'}), 400
+            return _json({'error': 'Gmail credentials not configured'}, 400)
         
         # Try to make a simple API call
-        import requests
-        
         headers = {
             'Authorization': f"Bearer {creds['access_token']}",
             'Content-Type': 'application/json'
         }
         
-        # Test with a simple profile request
-        response = requests.get(
+        # Test with a simple profile request, over the email service's keep-alive pool;
+        # the timeouts are (connect, read) seconds
+        response = email_service.http.get(
             'https://gmail.googleapis.com/gmail/v1/users/me/profile',
             headers=headers,
-            timeout=10
+            timeout=(5, 10)
         )
         
         if response.status_code == 200:
             profile_data = response.json()
-            return jsonify({
+            return _json({
                 'success': True,
                 'message': 'Gmail connection successful',
                 'email': profile_data.get('emailAddress', 'Unknown')
             })
         else:
-            return jsonify({
+            return _json({
                 'error': f'Gmail API returned status {response.status_code}: {response.text}'
-            }), 400
+            }, 400)
         
     except Exception as e:
         logger.error(f"Error testing Gmail connection: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+
+# Google OAuth2 consent screen, and the query parameters that are the same for every request
+OAUTH_AUTHORIZE_URL = 'https://accounts.google.com/o/oauth2/auth'
+OAUTH_REDIRECT_URI = 'http://localhost:5000/auth/callback'  # Localhost callback
+_OAUTH_REDIRECT_PARAM = quote_plus(OAUTH_REDIRECT_URI)
+_OAUTH_STATIC_PARAMS = urlencode({'response_type': 'code', 'access_type': 'offline', 'prompt': 'consent'})
 
 
 @api_bp.route('/configuration/gmail/oauth-url', methods=['POST'])
 def get_oauth_url():
     """Generate OAuth2 authorization URL."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        email_service = EmailService()
+        email_service = _service('email_service')
         auth_adapter = email_service.auth_adapter
         
         gmail_config = auth_adapter.credentials.get('gmail', {})
         client_id = gmail_config.get('client_id')
         
         if not client_id:
-            return jsonify({'error': 'Gmail client ID not configured'}), 400
-        
-        # Generate OAuth2 URL
-        from urllib.parse import urlencode
+            return _json({'error': 'Gmail client ID not configured'}, 400)
         
+        # Generate OAuth2 URL; only the client ID and scopes vary
         scopes = ' '.join(gmail_config.get('scopes', ['https://www.googleapis.com/auth/gmail.readonly']))
-        redirect_uri = 'http://localhost:5000/auth/callback'  # Localhost callback
-        
-        oauth_params = {
-            'client_id': client_id,
-            'redirect_uri': redirect_uri,
-            'scope': scopes,
-            'response_type': 'code',
-            'access_type': 'offline',
-            'prompt': 'consent'
-        }
-        
-        auth_url = f"https://accounts.google.com/o/oauth2/auth?{urlencode(oauth_params)}"
+        auth_url = (
+            f"{OAUTH_AUTHORIZE_URL}?client_id={quote_plus(client_id)}&redirect_uri={_OAUTH_REDIRECT_PARAM}"
+            f"&scope={quote_plus(scopes)}&{_OAUTH_STATIC_PARAMS}"
+        )
         
-        return jsonify({
+        return _json({
             'success': True,
             'auth_url': auth_url,
             'message': 'Complete OAuth flow and paste the authorization code back into the refresh token field'
@@ -913,91 +1668,92 @@ def get_oauth_url():
         
     except Exception as e:
         logger.error(f"Error generating OAuth URL: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 
+def _configuration_status_view() -> Dict[str, Any]:
+    """Build the /configuration/status payload."""
+    email_service = _service('email_service')
+    service_status = email_service.get_service_status()
+    
+    return {
+        'success': True,
+        'status': service_status
+    }
+
+
 @api_bp.route('/configuration/status', methods=['GET'])
 def get_configuration_status():
     """Get detailed configuration and connection status."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        email_service = EmailService()
-        service_status = email_service.get_service_status()
-        
-        return jsonify({
-            'success': True,
-            'status': service_status
-        })
+        return _json(_configuration_status_view())
         
     except Exception as e:
         logger.error(f"Error getting configuration status: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+
+def _provider_configuration_view() -> Dict[str, Any]:
+    """Build the /configuration/providers payload."""
+    try:
+        config_data = _cached_json_file(PROVIDERS_CONFIG_PATH)
+    except FileNotFoundError:
+        return {
+            'success': True,
+            'providers': [],
+            'global_settings': {}
+        }
+    
+    # Extract provider configurations
+    providers = []
+    for provider_key, provider_config in config_data.get('providers', {}).items():
+        providers.append({
+            'service_type': provider_config.get('service_type'),
+            'provider_name': provider_config.get('provider_name'),
+            'email_patterns': provider_config.get('email_patterns', {})
+        })
+    
+    return {
+        'success': True,
+        'providers': providers,
+        'global_settings': config_data.get('global_settings', {})
+    }
 
 
 @api_bp.route('/configuration/providers', methods=['GET'])
 def get_provider_configuration():
     """Get current provider configuration for email capture."""
     try:
-        import json
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'providers.json')
-        
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config_data = json.load(f)
-                
-            # Extract provider configurations
-            providers = []
-            for provider_key, provider_config in config_data.get('providers', {}).items():
-                providers.append({
-                    'service_type': provider_config.get('service_type'),
-                    'provider_name': provider_config.get('provider_name'),
-                    'email_patterns': provider_config.get('email_patterns', {})
-                })
-            
-            return jsonify({
-                'success': True,
-                'providers': providers,
-                'global_settings': config_data.get('global_settings', {})
-            })
-        else:
-            return jsonify({
-                'success': True,
-                'providers': [],
-                'global_settings': {}
-            })
+        return _json(_provider_configuration_view())
             
     except Exception as e:
         logger.error(f"Error getting provider configuration: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/configuration/providers', methods=['POST'])
 def save_provider_configuration():
     """Save provider configuration for email capture."""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
-            return jsonify({'error': 'No configuration data provided'}), 400
+            return _json({'error': 'No configuration data provided'}, 400)
         
         providers_config = data.get('providers', [])
         global_settings = data.get('global_settings', {})
         
         # Validate required fields
-        for provider in providers_config:
-            if not provider.get('provider_name') or not provider.get('service_type'):
-                return jsonify({'error': 'Provider name and service type are required'}), 400
+        if any(_missing_fields(provider, PROVIDER_REQUIRED_FIELDS) for provider in providers_config):
+            return _json({'error': 'Provider name and service type are required'}, 400)
         
         # Load existing config or create new
-        import json
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'providers.json')
-        
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config_data = json.load(f)
-        else:
+        try:
+            config_data = _load_json_file(PROVIDERS_CONFIG_PATH)
+        except FileNotFoundError:
             config_data = {'providers': {}, 'global_settings': {}}
         
         # Update provider configurations
@@ -1029,59 +1785,74 @@ def save_provider_configuration():
             config_data['global_settings'] = global_settings
         
         # Save configuration
-        os.makedirs(os.path.dirname(config_path), exist_ok=True)
-        with open(config_path, 'w') as f:
-            json.dump(config_data, f, indent=2)
+        _dump_json_file(PROVIDERS_CONFIG_PATH, config_data, pretty=_pretty_requested())
+        
+        # The shared services hold the provider config they were built with
+        init_services(current_app)
         
-        return jsonify({
+        return _json({
             'success': True,
             'message': 'Provider configuration saved successfully'
         })
         
     except Exception as e:
         logger.error(f"Error saving provider configuration: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+
+# Runs the per-provider Gmail searches of a pattern test concurrently
+_pattern_test_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='pattern-test')
 
 
 @api_bp.route('/configuration/providers/test', methods=['POST'])
 def test_provider_patterns():
     """Test email patterns with current Gmail connection."""
-    if not INTEGRATION_AVAILABLE:
-        return jsonify({'error': 'Integration services not available'}), 503
+    if not _integration_available():
+        return _json({'error': 'Integration services not available'}, 503)
     
     try:
-        email_service = EmailService()
+        email_service = _service('email_service')
         
         # Load current provider configuration
-        import json
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'providers.json')
+        try:
+            config_data = _cached_json_file(PROVIDERS_CONFIG_PATH)
+        except FileNotFoundError:
+            return _json({'error': 'No provider configuration found'}, 400)
         
-        if not os.path.exists(config_path):
-            return jsonify({'error': 'No provider configuration found'}), 400
-            
-        with open(config_path, 'r') as f:
-            config_data = json.load(f)
+        creds = email_service.auth_adapter.get_gmail_credentials()
+        if not creds:
+            return _json({'error': 'Gmail credentials not configured'}, 400)
         
-        results = []
-        for provider_key, provider_config in config_data.get('providers', {}).items():
-            # Simulate email search (dry run)
-            service_type = provider_config.get('service_type')
+        headers = {
+            'Authorization': f"Bearer {creds['access_token']}",
+            'Content-Type': 'application/json'
+        }
+        
+        def search(provider_config: Dict[str, Any]) -> Dict[str, Any]:
+            """Run one provider's Gmail search as a dry run."""
+            result = {
+                'service_type': provider_config.get('service_type'),
+                'provider_name': provider_config.get('provider_name'),
+                'matches': 0,
+                'sample_subjects': []
+            }
             email_patterns = provider_config.get('email_patterns', {})
             
-            # For testing purposes, return mock results
-            # In a real implementation, this would perform actual email searches
-            results.append({
-                'service_type': service_type,
-                'provider_name': provider_config.get('provider_name'),
-                'matches': len(email_patterns.get('from', [])) * 5,  # Mock result
-                'sample_subjects': [
-                    f"{service_type} Bill - Ready for Download",
-                    f"Your {service_type} Statement is Available",
-                    f"Invoice from {provider_config.get('provider_name')}"
-                ]
-            })
+            # Without sender patterns the search would match every recent email
+            if not email_patterns.get('from'):
+                return result
+            
+            try:
+                result.update(email_service.preview_gmail_search(email_patterns, headers))
+            except Exception as e:
+                logger.error(f"Error testing patterns for {result['provider_name']}: {e}")
+                result['error'] = str(e)
+            return result
+        
+        # One Gmail search per provider, run side by side
+        results = list(_pattern_test_executor.map(search, config_data.get('providers', {}).values()))
         
-        return jsonify({
+        return _json({
             'success': True,
             'results': results,
             'message': 'Pattern test completed successfully'
@@ -1089,73 +1860,73 @@ def test_provider_patterns():
         
     except Exception as e:
         logger.error(f"Error testing provider patterns: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 # ================================
 # UTILITY ATTRIBUTES ENDPOINTS
 # ================================
 
+# Utility attributes served before any have been saved
+DEFAULT_UTILITY_ATTRIBUTES = {
+    'electricity': {
+        'provider_name': '',
+        'billing_cycle': 'monthly',
+        'custom_cycle_days': None,
+        'due_date': '1',
+        'custom_due_day': None,
+        'avg_monthly_usage': None
+    },
+    'gas': {
+        'provider_name': '',
+        'billing_cycle': 'monthly', 
+        'custom_cycle_days': None,
+        'due_date': '1',
+        'custom_due_day': None,
+        'avg_monthly_usage': None
+    },
+    'water': {
+        'provider_name': '',
+        'billing_cycle': 'quarterly',
+        'custom_cycle_days': None,
+        'due_date': '1',
+        'custom_due_day': None,
+        'avg_monthly_usage': None
+    }
+}
+
+
+def _utility_attributes_view() -> Dict[str, Any]:
+    """Build the /configuration/utility-attributes payload."""
+    try:
+        attributes = _cached_json_file(UTILITY_ATTRIBUTES_PATH)
+    except FileNotFoundError:
+        attributes = DEFAULT_UTILITY_ATTRIBUTES
+    
+    return {
+        'success': True,
+        'attributes': attributes
+    }
+
+
 @api_bp.route('/configuration/utility-attributes', methods=['GET'])
 def get_utility_attributes():
     """Get utility attributes configuration."""
     try:
-        import json
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'utility_attributes.json')
-        
-        # Default configuration
-        default_attributes = {
-            'electricity': {
-                'provider_name': '',
-                'billing_cycle': 'monthly',
-                'custom_cycle_days': None,
-                'due_date': '1',
-                'custom_due_day': None,
-                'avg_monthly_usage': None
-            },
-            'gas': {
-                'provider_name': '',
-                'billing_cycle': 'monthly', 
-                'custom_cycle_days': None,
-                'due_date': '1',
-                'custom_due_day': None,
-                'avg_monthly_usage': None
-            },
-            'water': {
-                'provider_name': '',
-                'billing_cycle': 'quarterly',
-                'custom_cycle_days': None,
-                'due_date': '1',
-                'custom_due_day': None,
-                'avg_monthly_usage': None
-            }
-        }
-        
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                attributes = json.load(f)
-        else:
-            attributes = default_attributes
-        
-        return jsonify({
-            'success': True,
-            'attributes': attributes
-        })
+        return _json(_utility_attributes_view())
         
     except Exception as e:
         logger.error(f"Error loading utility attributes: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/configuration/utility-attributes', methods=['POST'])
 def save_utility_attributes():
     """Save utility attributes configuration."""
     try:
-        import json
-        
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'attributes' not in data:
-            return jsonify({'error': 'Invalid request data'}), 400
+            return _json({'error': 'Invalid request data'}, 400)
             
         attributes = data['attributes']
         
@@ -1163,52 +1934,43 @@ def save_utility_attributes():
         required_services = ['electricity', 'gas', 'water']
         for service in required_services:
             if service not in attributes:
-                return jsonify({'error': f'Missing {service} attributes'}), 400
+                return _json({'error': f'Missing {service} attributes'}, 400)
                 
             service_attr = attributes[service]
             if 'billing_cycle' not in service_attr:
-                return jsonify({'error': f'Missing billing_cycle for {service}'}), 400
-        
-        # Create config directory if it doesn't exist
-        config_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'config')
-        os.makedirs(config_dir, exist_ok=True)
+                return _json({'error': f'Missing billing_cycle for {service}'}, 400)
         
         # Save configuration
-        config_path = os.path.join(config_dir, 'utility_attributes.json')
-        with open(config_path, 'w') as f:
-            json.dump(attributes, f, indent=2)
+        _dump_json_file(UTILITY_ATTRIBUTES_PATH, attributes, pretty=_pretty_requested())
             
         logger.info("Utility attributes configuration saved successfully")
         
-        return jsonify({
+        return _json({
             'success': True,
             'message': 'Utility attributes saved successfully'
         })
         
     except Exception as e:
         logger.error(f"Error saving utility attributes: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @api_bp.route('/configuration/utility-attributes/validate', methods=['POST'])
 def validate_billing_schedule():
     """Validate billing schedule for potential conflicts."""
     try:
-        import json
-        from datetime import datetime, timedelta, date
-        
         # Load current attributes
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'utility_attributes.json')
-        
-        if not os.path.exists(config_path):
-            return jsonify({'error': 'No utility attributes configuration found'}), 400
-            
-        with open(config_path, 'r') as f:
-            attributes = json.load(f)
+        try:
+            attributes = _cached_json_file(UTILITY_ATTRIBUTES_PATH)
+        except FileNotFoundError:
+            return _json({'error': 'No utility attributes configuration found'}, 400)
         
         conflicts = []
         next_bills = []
         
+        # Bills grouped by the (year, week) they fall in, to check for same-week billing
+        bill_weeks = defaultdict(list)
+        
         # Calculate next bill dates for each service
         today = date.today()
         
@@ -1219,56 +1981,161 @@ def validate_billing_schedule():
             billing_cycle = service_attr.get('billing_cycle', 'monthly')
             
             # Calculate cycle in days
-            cycle_days_map = {
-                'monthly': 30,
-                'bi-monthly': 60,
-                'quarterly': 90,
-                'semi-annual': 180,
-                'annual': 365,
-                'custom': service_attr.get('custom_cycle_days', 30)
-            }
-            
-            cycle_days = cycle_days_map.get(billing_cycle, 30)
+            if billing_cycle == 'custom':
+                cycle_days = service_attr.get('custom_cycle_days', 30)
+            else:
+                cycle_days = BILLING_CYCLE_DAYS.get(billing_cycle, 30)
             
             # Calculate next bill date (simplified)
             next_bill_date = today + timedelta(days=cycle_days)
             
-            next_bills.append({
+            bill = {
                 'service': f"{service_name.title()} ({service_attr['provider_name']})",
-                'date': next_bill_date.strftime('%Y-%m-%d'),
+                'date': next_bill_date.isoformat(),
                 'cycle': billing_cycle
-            })
-        
-        # Check for potential conflicts (same week billing)
-        bill_weeks = {}
-        for bill in next_bills:
-            bill_date = datetime.strptime(bill['date'], '%Y-%m-%d').date()
-            week_key = bill_date.isocalendar()[:2]  # (year, week)
-            
-            if week_key not in bill_weeks:
-                bill_weeks[week_key] = []
-            bill_weeks[week_key].append(bill)
+            }
+            next_bills.append(bill)
+            bill_weeks[next_bill_date.isocalendar()[:2]].append(bill['service'])
         
         # Find conflicts (multiple bills in same week)
-        for week, bills in bill_weeks.items():
-            if len(bills) > 1:
-                services = [bill['service'] for bill in bills]
-                conflicts.append(f"Multiple bills due in week {week[1]} of {week[0]}: {', '.join(services)}")
+        for (year, week), services in bill_weeks.items():
+            if len(services) > 1:
+                conflicts.append(f"Multiple bills due in week {week} of {year}: {', '.join(services)}")
         
         validation_result = {
             'conflicts': conflicts,
             'next_bills': next_bills,
-            'total_services': len([s for s in attributes.values() if s.get('provider_name')])
+            'total_services': len(next_bills)
         }
         
-        return jsonify({
+        return _json({
             'success': True,
             'validation': validation_result
         })
         
     except Exception as e:
         logger.error(f"Error validating billing schedule: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+
+# Sections of /configuration/bundle: (key, payload builder, needs the integration services)
+_CONFIGURATION_VIEWS = (
+    ('gmail', _gmail_configuration_view, True),
+    ('status', _configuration_status_view, True),
+    ('providers', _provider_configuration_view, False),
+    ('utility_attributes', _utility_attributes_view, False),
+)
+
+
+@api_bp.route('/configuration/bundle', methods=['GET'])
+def get_configuration_bundle():
+    """
+    Get everything the configuration page loads in one response.
+    
+    Each section holds the body its own endpoint would return, so one failing
+    section reports its error without failing the others.
+    """
+    integration_available = _integration_available()
+    bundle = {}
+    for name, view, needs_integration in _CONFIGURATION_VIEWS:
+        if needs_integration and not integration_available:
+            bundle[name] = {'error': 'Integration services not available'}
+            continue
+        try:
+            bundle[name] = view()
+        except Exception as e:
+            logger.error(f"Error building {name} configuration: {e}")
+            bundle[name] = {'error': str(e)}
+    
+    return _json(bundle)
+
+
+def _prune_csv_exports() -> None:
+    """Remove exported CSV files the proxy has had ample time to serve."""
+    cutoff = time.time() - CSV_EXPORT_MAX_AGE
+    for export_path in CSV_EXPORT_DIR.glob('*.csv'):
+        try:
+            if export_path.stat().st_mtime < cutoff:
+                export_path.unlink()
+        except FileNotFoundError:
+            # Another worker pruned it first
+            pass
+
+
+def _ensure_csv_export_dir() -> None:
+    """
+    Create CSV_EXPORT_DIR readable only by this user, refusing one that isn't its own.
+    
+    Exports hold account numbers, and the default sits in the shared /tmp, where another
+    user could create the directory first or leave a symlink in its place.
+    """
+    CSV_EXPORT_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(CSV_EXPORT_DIR)
+    if CSV_EXPORT_DIR.is_symlink() or not CSV_EXPORT_DIR.is_dir() \
+            or (hasattr(os, 'getuid') and st.st_uid != os.getuid()):
+        raise PermissionError(f"CSV export directory {CSV_EXPORT_DIR} is not a directory owned by this user")
+    if st.st_mode & 0o077:
+        os.chmod(CSV_EXPORT_DIR, 0o700)
+
+
+def _write_csv_export(chunks) -> str:
+    """Write streamed CSV chunks to a new private file in CSV_EXPORT_DIR and return its name."""
+    _ensure_csv_export_dir()
+    _prune_csv_exports()
+    
+    export_name = f"{uuid.uuid4().hex}.csv"
+    export_path = CSV_EXPORT_DIR / export_name
+    try:
+        fd = os.open(export_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        with open(fd, 'w', encoding='utf-8', newline='') as export_file:
+            export_file.writelines(chunks)
+    except BaseException:
+        export_path.unlink(missing_ok=True)
+        raise
+    return export_name
+
+
+def _gzip_stream(chunks):
+    """Gzip-encode a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(CSV_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+_CSV_ZERO_AMOUNT = '0.00'
+
+
+def _csv_row(row) -> list:
+    """Format one exported invoice row; csv.writer takes care of quoting.
+    
+    Numeric columns arrive as Decimal and are formatted directly, without a float round trip,
+    and dates use the C-level isoformat rather than interpreting a strftime pattern per value.
+    """
+    (invoice_date, provider_name, service_type, total_amount, service_charge,
+     usage_quantity, usage_rate, billing_period_start, billing_period_end,
+     file_path, processing_status, created_at) = row
+    
+    # Calculate usage charge
+    usage_charge = (usage_quantity or 0) * (usage_rate or 0)
+    
+    return [
+        invoice_date.date().isoformat() if invoice_date else '',
+        provider_name or '',
+        service_type or '',
+        format(total_amount, '.2f') if total_amount else _CSV_ZERO_AMOUNT,
+        format(service_charge, '.2f') if service_charge else _CSV_ZERO_AMOUNT,
+        format(usage_quantity, '.2f') if usage_quantity else '',
+        format(usage_rate, '.6f') if usage_rate else '',
+        format(usage_charge, '.2f'),
+        billing_period_start.date().isoformat() if billing_period_start else '',
+        billing_period_end.date().isoformat() if billing_period_end else '',
+        file_path or '',
+        processing_status or '',
+        created_at.isoformat(' ', 'seconds') if created_at else ''
+    ]
 
 
 @api_bp.route('/export/csv', methods=['GET'])
@@ -1277,6 +2144,7 @@ def export_invoices_csv():
     try:
         import csv
         from io import StringIO
+        from flask import Response, stream_with_context
         
         # Get query parameters for filtering
         provider = request.args.get('provider', '')
@@ -1284,97 +2152,126 @@ def export_invoices_csv():
         start_date = request.args.get('start_date', '')
         end_date = request.args.get('end_date', '')
         
-        with db_manager.get_session() as session:
-            # Build the query with filters
-            query = session.query(Invoice)
-            
-            if provider:
-                query = query.filter(Invoice.provider_name.ilike(f'%{provider}%'))
-            
-            if service_type:
-                query = query.filter(Invoice.service_type == service_type)
-            
-            if start_date:
-                try:
-                    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                    query = query.filter(Invoice.invoice_date >= start_dt)
-                except ValueError:
-                    pass
-            
-            if end_date:
-                try:
-                    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-                    query = query.filter(Invoice.invoice_date <= end_dt)
-                except ValueError:
-                    pass
-            
-            # Order by date (newest first)
-            invoices = query.order_by(desc(Invoice.invoice_date)).all()
-            
-            # Create CSV content
+        # Select only the exported columns so rows are never hydrated into Invoice objects
+        stmt = select(
+            Invoice.invoice_date,
+            Invoice.provider_name,
+            Invoice.service_type,
+            Invoice.total_amount,
+            Invoice.service_charge,
+            Invoice.usage_quantity,
+            Invoice.usage_rate,
+            Invoice.billing_period_start,
+            Invoice.billing_period_end,
+            Invoice.file_path,
+            Invoice.processing_status,
+            Invoice.created_at
+        )
+        
+        if provider:
+            # A leading-wildcard ILIKE can't seek an index, so resolve it against the few
+            # distinct provider names first (an index-only scan); the export then seeks
+            # ix_invoice_provider_date on those exact names instead of testing every row
+            with db_manager.get_session() as session:
+                matching_providers = session.scalars(
+                    select(Invoice.provider_name)
+                    .where(Invoice.provider_name.ilike(f'%{provider}%'))
+                    .distinct()
+                ).all()
+            stmt = stmt.where(Invoice.provider_name.in_(matching_providers))
+        
+        if service_type:
+            stmt = stmt.where(Invoice.service_type == service_type)
+        
+        if start_date:
+            try:
+                start_dt = datetime.fromisoformat(start_date)
+                stmt = stmt.where(Invoice.invoice_date >= start_dt)
+            except ValueError:
+                pass
+        
+        if end_date:
+            try:
+                end_dt = datetime.fromisoformat(end_date)
+                stmt = stmt.where(Invoice.invoice_date <= end_dt)
+            except ValueError:
+                pass
+        
+        # Order by date (newest first), fetching in batches from a server-side cursor
+        stmt = stmt.order_by(desc(Invoice.invoice_date)).execution_options(yield_per=CSV_EXPORT_BATCH_SIZE)
+        
+        headers = [
+            'Invoice Date',
+            'Provider Name', 
+            'Service Type',
+            'Total Amount',
+            'Service Charge',
+            'Usage Quantity',
+            'Usage Rate',
+            'Usage Charge',
+            'Billing Period Start',
+            'Billing Period End',
+            'File Path',
+            'Processing Status',
+            'Created At'
+        ]
+        
+        def generate():
+            """Yield the CSV one batch of rows at a time."""
             output = StringIO()
             writer = csv.writer(output)
-            
-            # Write header row
-            headers = [
-                'Invoice Date',
-                'Provider Name', 
-                'Service Type',
-                'Total Amount',
-                'Service Charge',
-                'Usage Quantity',
-                'Usage Rate',
-                'Usage Charge',
-                'Billing Period Start',
-                'Billing Period End',
-                'File Path',
-                'Processing Status',
-                'Created At'
-            ]
             writer.writerow(headers)
+            exported = 0
             
-            # Write data rows
-            for invoice in invoices:
-                # Calculate usage charge
-                usage_charge = 0
-                if invoice.usage_quantity and invoice.usage_rate:
-                    usage_charge = float(invoice.usage_quantity) * float(invoice.usage_rate)
+            try:
+                with db_manager.get_session() as session:
+                    result = session.execute(stmt)
+                    for batch in result.partitions():
+                        writer.writerows(map(_csv_row, batch))
+                        exported += len(batch)
+                        
+                        yield output.getvalue()
+                        output.seek(0)
+                        output.truncate(0)
                 
-                row = [
-                    invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else '',
-                    invoice.provider_name or '',
-                    invoice.service_type or '',
-                    f"{float(invoice.total_amount):.2f}" if invoice.total_amount else '0.00',
-                    f"{float(invoice.service_charge):.2f}" if invoice.service_charge else '0.00',
-                    f"{float(invoice.usage_quantity):.2f}" if invoice.usage_quantity else '',
-                    f"{float(invoice.usage_rate):.6f}" if invoice.usage_rate else '',
-                    f"{usage_charge:.2f}",
-                    invoice.billing_period_start.strftime('%Y-%m-%d') if invoice.billing_period_start else '',
-                    invoice.billing_period_end.strftime('%Y-%m-%d') if invoice.billing_period_end else '',
-                    invoice.file_path or '',
-                    invoice.processing_status or '',
-                    invoice.created_at.strftime('%Y-%m-%d %H:%M:%S') if invoice.created_at else ''
-                ]
-                writer.writerow(row)
-            
-            # Get CSV content
-            csv_content = output.getvalue()
-            output.close()
-            
-            # Create response with proper headers
-            from flask import Response
-            response = Response(
-                csv_content,
+                # Nothing was fetched, so the header row is still buffered
+                if output.tell():
+                    yield output.getvalue()
+                
+                logger.info(f"CSV export completed: {exported} invoices exported")
+                
+            except Exception as e:
+                # Headers are already sent, so the download is cut short rather than failed
+                logger.error(f"Error streaming CSV export after {exported} invoices: {str(e)}")
+                raise
+        
+        if USE_XSENDFILE:
+            # nginx streams the finished file, so the worker is free as soon as it's written
+            export_name = _write_csv_export(generate())
+            return Response(
                 mimetype='text/csv',
                 headers={
                     'Content-Disposition': 'attachment; filename=invoices_export.csv',
-                    'Content-Type': 'text/csv; charset=utf-8'
+                    'X-Accel-Redirect': CSV_EXPORT_ACCEL_PREFIX + export_name
                 }
             )
-            
-            logger.info(f"CSV export completed: {len(invoices)} invoices exported")
-            return response
+        
+        response_headers = {
+            'Content-Disposition': 'attachment; filename=invoices_export.csv',
+            'Content-Type': 'text/csv; charset=utf-8',
+            'Vary': 'Accept-Encoding'
+        }
+        body = generate()
+        if request.accept_encodings['gzip']:
+            body = _gzip_stream(body)
+            response_headers['Content-Encoding'] = 'gzip'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype='text/csv',
+            headers=response_headers
+        )
             
     except Exception as e:
         logger.error(f"Error exporting CSV: {str(e)}")
-        return jsonify({'error': 'Failed to export CSV'}), 500
\ No newline at end of file
+        return _json({'error': 'Failed to export CSV'}, 500)
\ No newline at end of file
@@ -8,20 +8,33 @@ Supports both local SQLite and AWS RDS PostgreSQL through adapter pattern.
 
 import os
 import sys
+import json
+import shutil
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, Response, send_from_directory, request
+from markupsafe import escape
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from email_fetcher.email_service import build_http_session
 from web_app.backend.models import db_manager
-from web_app.backend.api import api_bp
+from web_app.backend.api import (
+    api_bp, init_services, OrjsonProvider, PAYLOAD_GZIP_MIN_SIZE, CREDENTIALS_PATH,
+    _json, _json_bytes, _cached_json_file, _load_json_file
+)
 
 # Load environment variables
 load_dotenv()
@@ -33,129 +46,202 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Google's OAuth token endpoint, reached over one keep-alive pool so repeat callbacks
+# skip the TLS handshake; timeouts are (connect, read) seconds
+OAUTH_TOKEN_URL = "https://oauth2.googleapis.com/token"
+OAUTH_TOKEN_TIMEOUT = (5, 10)
+_HTTP = build_http_session(max_retries=2)
+
+# Frontend origins allowed to call the API
+CORS_ORIGINS = ["http://localhost:3000", "http://localhost:8000", "http://localhost:8080"]
+
+# Seconds browsers may keep the empty favicon response instead of asking again per tab
+FAVICON_MAX_AGE = 86400
+
+# Stands in for the index response's timestamp while the rest of it is encoded
+INDEX_TIMESTAMP_PLACEHOLDER = '__timestamp__'
+
+# Pages for the OAuth callback, encoded once; only the error page takes values, and
+# those are escaped since they come from the query string or an exception
+OAUTH_ERROR_HTML = """<html>
+    <body>
+        <h2>{title}</h2>
+        <p>Error: {error}</p>
+        <p>Please close this window and try again.</p>
+    </body>
+</html>
+"""
+
+OAUTH_NO_CODE_HTML = b"""<html>
+    <body>
+        <h2>OAuth Error</h2>
+        <p>No authorization code received.</p>
+        <p>Please close this window and try again.</p>
+    </body>
+</html>
+"""
+
+OAUTH_CONFIG_NOT_FOUND_HTML = b"""<html>
+    <body>
+        <h2>Configuration Error</h2>
+        <p>Gmail configuration not found in environment variables or file.</p>
+        <p>Please configure GMAIL_CLIENT_ID and GMAIL_CLIENT_SECRET environment variables.</p>
+    </body>
+</html>
+"""
+
+OAUTH_CLIENT_MISSING_HTML = b"""<html>
+    <body>
+        <h2>Configuration Error</h2>
+        <p>Client ID or Secret missing. Please configure Gmail API credentials first.</p>
+        <p>Please close this window and save your credentials.</p>
+    </body>
+</html>
+"""
+
+OAUTH_SUCCESS_HTML = """<html>
+    <head>
+        <title>OAuth Success</title>
+        <style>
+            body { font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; }
+            .success { color: #28a745; }
+            .code { background: #f8f9fa; padding: 10px; border-radius: 5px; font-family: monospace; }
+        </style>
+    </head>
+    <body>
+        <h2 class="success">✅ OAuth2 Authorization Successful!</h2>
+        <p>Your Gmail account has been successfully connected to the Utilities Tracker.</p>
+        <h3>Next Steps:</h3>
+        <ol>
+            <li><strong>Close this window</strong></li>
+            <li><strong>Go back to the Configuration tab</strong></li>
+            <li><strong>Click "Test Connection"</strong> to verify the setup</li>
+            <li><strong>Configure Email Capture patterns</strong> for your utility providers</li>
+        </ol>
+        <p>You can now use the application to automatically fetch utility invoices from your Gmail account.</p>
+        <script>
+            // Auto-close after 10 seconds
+            setTimeout(() => {
+                window.close();
+            }, 10000);
+        </script>
+    </body>
+</html>
+""".encode('utf-8')
+
+
+def _html(body: bytes, status: int = 200) -> Response:
+    """Wrap an encoded page in a response; responses are per request since hooks add headers."""
+    return Response(body, status=status, mimetype='text/html')
+
+
+def _oauth_error(title: str, error: Any, status: int = 400) -> Response:
+    """Render the OAuth error page for a message only known at request time."""
+    return _html(OAUTH_ERROR_HTML.format(title=title, error=escape(error)).encode('utf-8'), status)
+
 
 def create_app(config=None):
     """Create and configure Flask application."""
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # Basic configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['JSON_SORT_KEYS'] = False
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
     
-    # CORS configuration
-    CORS(app, origins=["http://localhost:3000", "http://localhost:8000", "http://localhost:8080"])
+    # CORS configuration; only the API is fetched cross-origin, so the index, favicon
+    # and OAuth callback skip the CORS hooks
+    CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}})
+    
+    # Compress JSON responses; the CSV export compresses its own stream
+    if Compress is not None:
+        app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+        app.config['COMPRESS_MIN_SIZE'] = PAYLOAD_GZIP_MIN_SIZE
+        app.config['COMPRESS_LEVEL'] = 4
+        app.config['COMPRESS_BR_LEVEL'] = 4
+        app.config['COMPRESS_STREAMS'] = False
+        Compress(app)
     
     # Register blueprints
     app.register_blueprint(api_bp)
     
+    # Build the integration services once for all requests; routes build them lazily if this fails
+    try:
+        init_services(app)
+    except Exception as e:
+        logger.warning(f"Integration services not initialised at startup: {e}")
+    
+    # The index only differs between requests in its timestamp, so it is encoded once
+    # and each response splices the current time between the two halves
+    index_head, _, index_tail = _json_bytes({
+        'name': 'Utilities Tracker API',
+        'version': '1.0.0',
+        'environment': 'aws' if os.getenv('AWS_MODE') == 'true' else 'local',
+        'status': 'running',
+        'timestamp': INDEX_TIMESTAMP_PLACEHOLDER,
+        'endpoints': {
+            'health': '/api/health',
+            'invoices': '/api/invoices',
+            'providers': '/api/providers',
+            'analytics': '/api/analytics',
+            'sync': '/api/sync',
+            'processing_history': '/api/processing-history',
+            'export': '/api/export/csv'
+        },
+        'documentation': {
+            'api_docs': 'https://github.com/your-org/utilities-tracker/blob/main/docs/api-documentation.md',
+            'usage_guide': 'See USAGE.md for detailed instructions',
+            'setup_guide': 'See README.md for setup instructions'
+        }
+    }).partition(INDEX_TIMESTAMP_PLACEHOLDER.encode('ascii'))
+    
     @app.route('/')
     def index():
         """Root endpoint providing API information."""
-        return jsonify({
-            'name': 'Utilities Tracker API',
-            'version': '1.0.0',
-            'environment': 'aws' if os.getenv('AWS_MODE') == 'true' else 'local',
-            'status': 'running',
-            'timestamp': datetime.now().isoformat(),
-            'endpoints': {
-                'health': '/api/health',
-                'invoices': '/api/invoices',
-                'providers': '/api/providers',
-                'analytics': '/api/analytics',
-                'sync': '/api/sync',
-                'processing_history': '/api/processing-history',
-                'export': '/api/export/csv'
-            },
-            'documentation': {
-                'api_docs': 'https://github.com/your-org/utilities-tracker/blob/main/docs/api-documentation.md',
-                'usage_guide': 'See USAGE.md for detailed instructions',
-                'setup_guide': 'See README.md for setup instructions'
-            }
-        })
+        timestamp = datetime.now().isoformat().encode('ascii')
+        return Response(index_head + timestamp + index_tail, mimetype='application/json')
     
     @app.route('/favicon.ico')
     def favicon():
         """Serve favicon."""
-        return '', 204
+        response = Response(status=204)
+        response.cache_control.public = True
+        response.cache_control.max_age = FAVICON_MAX_AGE
+        return response
     
     @app.route('/auth/callback')
     def oauth_callback():
         """Handle OAuth2 callback from Google."""
         try:
-            import requests
-            import json
-            from pathlib import Path
-            
             # Get authorization code from query parameters
             auth_code = request.args.get('code')
             error = request.args.get('error')
             
             if error:
-                return f"""
-                <html>
-                    <body>
-                        <h2>OAuth Error</h2>
-                        <p>Error: {error}</p>
-                        <p>Please close this window and try again.</p>
-                    </body>
-                </html>
-                """, 400
+                return _oauth_error('OAuth Error', error)
             
             if not auth_code:
-                return """
-                <html>
-                    <body>
-                        <h2>OAuth Error</h2>
-                        <p>No authorization code received.</p>
-                        <p>Please close this window and try again.</p>
-                    </body>
-                </html>
-                """, 400
+                return _html(OAUTH_NO_CODE_HTML, 400)
             
             # Load Gmail configuration from environment variables or file
-            import os
-            
             # First try environment variables
             client_id = os.getenv('GMAIL_CLIENT_ID')
             client_secret = os.getenv('GMAIL_CLIENT_SECRET')
             
             # If not in environment, try credentials file
             if not client_id or not client_secret:
-                config_dir = Path(__file__).parent.parent.parent / "config"
-                config_file = config_dir / "credentials.json"
-                
-                if not config_file.exists():
-                    return """
-                    <html>
-                        <body>
-                            <h2>Configuration Error</h2>
-                            <p>Gmail configuration not found in environment variables or file.</p>
-                            <p>Please configure GMAIL_CLIENT_ID and GMAIL_CLIENT_SECRET environment variables.</p>
-                        </body>
-                    </html>
-                    """, 400
+                if not CREDENTIALS_PATH.exists():
+                    return _html(OAUTH_CONFIG_NOT_FOUND_HTML, 400)
                     
-                with open(config_file, 'r') as f:
-                    credentials = json.load(f)
-                
-                gmail_config = credentials.get('gmail', {})
+                # Parsed once and reused until the file changes
+                gmail_config = _cached_json_file(CREDENTIALS_PATH).get('gmail', {})
                 client_id = gmail_config.get('client_id')
                 client_secret = gmail_config.get('client_secret')
             
             if not client_id or not client_secret:
-                return """
-                <html>
-                    <body>
-                        <h2>Configuration Error</h2>
-                        <p>Client ID or Secret missing. Please configure Gmail API credentials first.</p>
-                        <p>Please close this window and save your credentials.</p>
-                    </body>
-                </html>
-                """, 400
+                return _html(OAUTH_CLIENT_MISSING_HTML, 400)
             
             # Exchange authorization code for tokens
-            token_url = "https://oauth2.googleapis.com/token"
             token_data = {
                 'client_id': client_id,
                 'client_secret': client_secret,
@@ -164,20 +250,12 @@ def create_app(config=None):
                 'redirect_uri': 'http://localhost:5000/auth/callback'
             }
             
-            token_response = requests.post(token_url, data=token_data)
+            token_response = _HTTP.post(OAUTH_TOKEN_URL, data=token_data, timeout=OAUTH_TOKEN_TIMEOUT)
             token_json = token_response.json()
             
             if token_response.status_code != 200 or 'error' in token_json:
                 error_msg = token_json.get('error_description', 'Unknown error')
-                return f"""
-                <html>
-                    <body>
-                        <h2>Token Exchange Error</h2>
-                        <p>Error: {error_msg}</p>
-                        <p>Please close this window and try again.</p>
-                    </body>
-                </html>
-                """, 400
+                return _oauth_error('Token Exchange Error', error_msg)
             
             # Save tokens based on configuration source
             refresh_token = token_json.get('refresh_token')
@@ -190,80 +268,46 @@ def create_app(config=None):
                 # We don't automatically update .env to avoid overwriting it
                 # The user should manually update GMAIL_REFRESH_TOKEN if needed
             else:
-                # Save to credentials file if using file-based config
+                # Save to credentials file if using file-based config; the cached copy is
+                # shared, so edit a fresh one
+                credentials = _load_json_file(CREDENTIALS_PATH)
+                gmail_config = credentials.setdefault('gmail', {})
                 gmail_config['access_token'] = access_token
                 gmail_config['refresh_token'] = refresh_token
                 gmail_config['token_expiry'] = token_expiry
                 
-                # Update the credentials structure
-                credentials['gmail'] = gmail_config
-                
-                with open(config_file, 'w') as f:
+                with open(CREDENTIALS_PATH, 'w') as f:
                     json.dump(credentials, f, indent=2)
+                
+                # Reload the shared services so they use the new tokens
+                init_services(app)
             
             logger.info("OAuth2 flow completed successfully")
             
-            return """
-            <html>
-                <head>
-                    <title>OAuth Success</title>
-                    <style>
-                        body { font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; }
-                        .success { color: #28a745; }
-                        .code { background: #f8f9fa; padding: 10px; border-radius: 5px; font-family: monospace; }
-                    </style>
-                </head>
-                <body>
-                    <h2 class="success">✅ OAuth2 Authorization Successful!</h2>
-                    <p>Your Gmail account has been successfully connected to the Utilities Tracker.</p>
-                    <h3>Next Steps:</h3>
-                    <ol>
-                        <li><strong>Close this window</strong></li>
-                        <li><strong>Go back to the Configuration tab</strong></li>
-                        <li><strong>Click "Test Connection"</strong> to verify the setup</li>
-                        <li><strong>Configure Email Capture patterns</strong> for your utility providers</li>
-                    </ol>
-                    <p>You can now use the application to automatically fetch utility invoices from your Gmail account.</p>
-                    <script>
-                        // Auto-close after 10 seconds
-                        setTimeout(() => {
-                            window.close();
-                        }, 10000);
-                    </script>
-                </body>
-            </html>
-            """
+            return _html(OAUTH_SUCCESS_HTML)
             
         except Exception as e:
             logger.error(f"Error in OAuth callback: {e}")
-            return f"""
-            <html>
-                <body>
-                    <h2>Internal Error</h2>
-                    <p>Error: {str(e)}</p>
-                    <p>Please close this window and try again.</p>
-                </body>
-            </html>
-            """, 500
+            return _oauth_error('Internal Error', e, 500)
     
     @app.errorhandler(404)
     def not_found(error):
         """Global 404 handler."""
-        return jsonify({
+        return _json({
             'error': 'Not Found',
             'message': 'The requested resource was not found',
             'status': 404
-        }), 404
+        }, 404)
     
     @app.errorhandler(500)
     def internal_error(error):
         """Global 500 handler."""
         logger.error(f"Internal server error: {str(error)}")
-        return jsonify({
+        return _json({
             'error': 'Internal Server Error',
             'message': 'An internal error occurred',
             'status': 500
-        }), 500
+        }, 500)
     
     # Initialize database tables
     try:
@@ -290,6 +334,20 @@ def main():
                        help='Enable auto-reload on file changes')
     
     args = parser.parse_args()
+    debug = args.debug or os.getenv('FLASK_DEBUG') == '1'
+    
+    # Outside debugging, hand the process to gunicorn (see gunicorn.conf.py) when it is
+    # installed; Werkzeug's server is only meant for development
+    gunicorn = None if debug or args.reload else shutil.which('gunicorn')
+    if gunicorn:
+        logger.info(f"Starting Utilities Tracker API with gunicorn at http://{args.host}:{args.port}")
+        os.execvp(gunicorn, [
+            gunicorn,
+            '--config', str(project_root / 'gunicorn.conf.py'),
+            '--chdir', str(project_root),
+            '--bind', f"{args.host}:{args.port}",
+            'web_app.backend.wsgi:app'
+        ])
     
     # Create application
     app = create_app()
@@ -315,8 +373,9 @@ def main():
         app.run(
             host=args.host,
             port=args.port,
-            debug=args.debug or os.getenv('FLASK_DEBUG') == '1',
-            use_reloader=args.reload
+            debug=debug,
+            use_reloader=args.reload,
+            threaded=True
         )
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers.
+
+Run from the project root:
+    gunicorn web_app.backend.wsgi:app
+
+Settings such as the worker class and pool sizes are read from gunicorn.conf.py.
+"""
+
+from web_app.backend.app import create_app
+
+app = create_app()
\ No newline at end of file
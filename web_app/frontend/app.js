@@ -93,9 +93,7 @@ function showSection(sectionId) {
             loadAnalytics();
             break;
         case 'configuration':
-            loadGmailConfiguration();
-            loadEmailCaptureConfiguration();
-            loadUtilityAttributes();
+            loadConfiguration();
             break;
     }
 }
@@ -235,6 +233,7 @@ async function loadInvoices(page = 1) {
         const params = new URLSearchParams({
             page: page,
             per_page: 20,
+            include_total: 1,  // page links need the total
             ...currentFilters
         });
         
@@ -909,6 +908,38 @@ function formatDate(dateString) {
 // CONFIGURATION FUNCTIONS
 // =============================================================================
 
+/**
+ * Load every configuration tab from a single /configuration/bundle request
+ */
+function loadConfiguration() {
+    fetch(`${CONFIG.API_BASE_URL}/configuration/bundle`)
+        .then(response => response.json())
+        .then(data => {
+            applyGmailConfiguration(data.gmail);
+            applyConnectionStatus(data.status);
+            applyEmailCaptureConfiguration(data.providers);
+            applyUtilityAttributes(data.utility_attributes);
+        })
+        .catch(error => {
+            console.error('Failed to load configuration:', error);
+            showAlert('Failed to load configuration', 'danger');
+        });
+}
+
+/**
+ * Fill in the Gmail form from a /configuration/gmail response
+ */
+function applyGmailConfiguration(data) {
+    if (data.success) {
+        const config = data.config;
+        $('#gmailClientId').val(config.client_id || '');
+        $('#gmailClientSecret').val(config.client_secret ? '••••••••' : '');
+        $('#gmailRefreshToken').val(config.refresh_token ? '••••••••' : '');
+        
+        updateGmailConnectionStatus(config.status);
+    }
+}
+
 /**
  * Load Gmail configuration when configuration section is shown
  */
@@ -916,16 +947,7 @@ function loadGmailConfiguration() {
     // Load current configuration
     fetch(`${CONFIG.API_BASE_URL}/configuration/gmail`)
         .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                const config = data.config;
-                $('#gmailClientId').val(config.client_id || '');
-                $('#gmailClientSecret').val(config.client_secret ? '••••••••' : '');
-                $('#gmailRefreshToken').val(config.refresh_token ? '••••••••' : '');
-                
-                updateGmailConnectionStatus(config.status);
-            }
-        })
+        .then(applyGmailConfiguration)
         .catch(error => {
             console.error('Failed to load Gmail configuration:', error);
             showAlert('Failed to load Gmail configuration', 'danger');
@@ -1080,17 +1102,22 @@ function updateGmailConnectionStatus(status) {
     }
 }
 
+/**
+ * Show a /configuration/status response
+ */
+function applyConnectionStatus(data) {
+    if (data.success) {
+        displayConnectionStatus(data.status);
+    }
+}
+
 /**
  * Load detailed connection status
  */
 function loadConnectionStatus() {
     fetch(`${CONFIG.API_BASE_URL}/configuration/status`)
         .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                displayConnectionStatus(data.status);
-            }
-        })
+        .then(applyConnectionStatus)
         .catch(error => {
             console.error('Failed to load connection status:', error);
             $('#connectionStatusDetails').html('<p class="text-danger">Failed to load status</p>');
@@ -1135,6 +1162,50 @@ function displayConnectionStatus(status) {
 // EMAIL CAPTURE CONFIGURATION FUNCTIONS
 // =============================================================================
 
+/**
+ * Fill in the email capture forms from a /configuration/providers response
+ */
+function applyEmailCaptureConfiguration(data) {
+    if (data.success) {
+        const providers = data.providers;
+        
+        // Populate electricity provider
+        const elecProvider = providers.find(p => p.service_type === 'Electricity');
+        if (elecProvider) {
+            $('#elecProviderName').val(elecProvider.provider_name || '');
+            $('#elecEmailAddresses').val(elecProvider.email_patterns?.from?.join('\n') || '');
+            $('#elecSubjectKeywords').val(elecProvider.email_patterns?.subject_keywords?.join(', ') || '');
+            $('#elecExcludeKeywords').val(elecProvider.email_patterns?.exclude_keywords?.join(', ') || '');
+        }
+        
+        // Populate gas provider
+        const gasProvider = providers.find(p => p.service_type === 'Gas');
+        if (gasProvider) {
+            $('#gasProviderName').val(gasProvider.provider_name || '');
+            $('#gasEmailAddresses').val(gasProvider.email_patterns?.from?.join('\n') || '');
+            $('#gasSubjectKeywords').val(gasProvider.email_patterns?.subject_keywords?.join(', ') || '');
+            $('#gasExcludeKeywords').val(gasProvider.email_patterns?.exclude_keywords?.join(', ') || '');
+        }
+        
+        // Populate water provider
+        const waterProvider = providers.find(p => p.service_type === 'Water');
+        if (waterProvider) {
+            $('#waterProviderName').val(waterProvider.provider_name || '');
+            $('#waterEmailAddresses').val(waterProvider.email_patterns?.from?.join('\n') || '');
+            $('#waterSubjectKeywords').val(waterProvider.email_patterns?.subject_keywords?.join(', ') || '');
+            $('#waterExcludeKeywords').val(waterProvider.email_patterns?.exclude_keywords?.join(', ') || '');
+        }
+        
+        // Load global settings
+        if (data.global_settings) {
+            const searchConfig = data.global_settings.search_configuration || {};
+            $('#searchDateRange').val(searchConfig.date_range_days || 90);
+            $('#maxResults').val(searchConfig.max_results_per_provider || 50);
+            $('#searchFolders').val(searchConfig.search_in_folders?.join(', ') || 'INBOX, Bills, Utilities');
+        }
+    }
+}
+
 /**
  * Load email capture configuration when tab is shown
  */
@@ -1142,46 +1213,7 @@ function loadEmailCaptureConfiguration() {
     // Load current provider configurations
     fetch(`${CONFIG.API_BASE_URL}/configuration/providers`)
         .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                const providers = data.providers;
-                
-                // Populate electricity provider
-                const elecProvider = providers.find(p => p.service_type === 'Electricity');
-                if (elecProvider) {
-                    $('#elecProviderName').val(elecProvider.provider_name || '');
-                    $('#elecEmailAddresses').val(elecProvider.email_patterns?.from?.join('\n') || '');
-                    $('#elecSubjectKeywords').val(elecProvider.email_patterns?.subject_keywords?.join(', ') || '');
-                    $('#elecExcludeKeywords').val(elecProvider.email_patterns?.exclude_keywords?.join(', ') || '');
-                }
-                
-                // Populate gas provider
-                const gasProvider = providers.find(p => p.service_type === 'Gas');
-                if (gasProvider) {
-                    $('#gasProviderName').val(gasProvider.provider_name || '');
-                    $('#gasEmailAddresses').val(gasProvider.email_patterns?.from?.join('\n') || '');
-                    $('#gasSubjectKeywords').val(gasProvider.email_patterns?.subject_keywords?.join(', ') || '');
-                    $('#gasExcludeKeywords').val(gasProvider.email_patterns?.exclude_keywords?.join(', ') || '');
-                }
-                
-                // Populate water provider
-                const waterProvider = providers.find(p => p.service_type === 'Water');
-                if (waterProvider) {
-                    $('#waterProviderName').val(waterProvider.provider_name || '');
-                    $('#waterEmailAddresses').val(waterProvider.email_patterns?.from?.join('\n') || '');
-                    $('#waterSubjectKeywords').val(waterProvider.email_patterns?.subject_keywords?.join(', ') || '');
-                    $('#waterExcludeKeywords').val(waterProvider.email_patterns?.exclude_keywords?.join(', ') || '');
-                }
-                
-                // Load global settings
-                if (data.global_settings) {
-                    const searchConfig = data.global_settings.search_configuration || {};
-                    $('#searchDateRange').val(searchConfig.date_range_days || 90);
-                    $('#maxResults').val(searchConfig.max_results_per_provider || 50);
-                    $('#searchFolders').val(searchConfig.search_in_folders?.join(', ') || 'INBOX, Bills, Utilities');
-                }
-            }
-        })
+        .then(applyEmailCaptureConfiguration)
         .catch(error => {
             console.error('Failed to load email capture configuration:', error);
             showAlert('Failed to load email capture configuration', 'danger');
@@ -1293,8 +1325,12 @@ function testEmailPatterns() {
             let message = 'Email pattern test results:\n\n';
             
             for (const result of results) {
+                if (result.error) {
+                    message += `${result.service_type}: search failed (${result.error})\n`;
+                    continue;
+                }
                 message += `${result.service_type}: ${result.matches} potential matches found\n`;
-                if (result.sample_subjects) {
+                if (result.sample_subjects?.length) {
                     message += `  Sample subjects: ${result.sample_subjects.join(', ')}\n`;
                 }
             }
@@ -1317,57 +1353,62 @@ function testEmailPatterns() {
 // UTILITY ATTRIBUTES CONFIGURATION
 // ================================
 
+/**
+ * Fill in the utility attribute forms from a /configuration/utility-attributes response
+ */
+function applyUtilityAttributes(data) {
+    if (data.success) {
+        const attributes = data.attributes;
+        
+        // Load Electricity attributes
+        if (attributes.electricity) {
+            $('#elecAttrProviderName').val(attributes.electricity.provider_name || '');
+            $('#elecBillingCycle').val(attributes.electricity.billing_cycle || 'monthly');
+            $('#elecCustomDays').val(attributes.electricity.custom_cycle_days || '');
+            $('#elecDueDate').val(attributes.electricity.due_date || '1');
+            $('#elecCustomDueDay').val(attributes.electricity.custom_due_day || '');
+            $('#elecAvgUsage').val(attributes.electricity.avg_monthly_usage || '');
+            
+            toggleCustomFields('elec', attributes.electricity.billing_cycle, attributes.electricity.due_date);
+        }
+        
+        // Load Gas attributes
+        if (attributes.gas) {
+            $('#gasAttrProviderName').val(attributes.gas.provider_name || '');
+            $('#gasBillingCycle').val(attributes.gas.billing_cycle || 'monthly');
+            $('#gasCustomDays').val(attributes.gas.custom_cycle_days || '');
+            $('#gasDueDate').val(attributes.gas.due_date || '1');
+            $('#gasCustomDueDay').val(attributes.gas.custom_due_day || '');
+            $('#gasAvgUsage').val(attributes.gas.avg_monthly_usage || '');
+            
+            toggleCustomFields('gas', attributes.gas.billing_cycle, attributes.gas.due_date);
+        }
+        
+        // Load Water attributes
+        if (attributes.water) {
+            $('#waterAttrProviderName').val(attributes.water.provider_name || '');
+            $('#waterBillingCycle').val(attributes.water.billing_cycle || 'quarterly');
+            $('#waterCustomDays').val(attributes.water.custom_cycle_days || '');
+            $('#waterDueDate').val(attributes.water.due_date || '1');
+            $('#waterCustomDueDay').val(attributes.water.custom_due_day || '');
+            $('#waterAvgUsage').val(attributes.water.avg_monthly_usage || '');
+            
+            toggleCustomFields('water', attributes.water.billing_cycle, attributes.water.due_date);
+        }
+        
+        // Update billing schedule preview
+        updateBillingSchedulePreview(attributes);
+        
+    }
+}
+
 /**
  * Load utility attributes configuration when tab is shown
  */
 function loadUtilityAttributes() {
     fetch(`${CONFIG.API_BASE_URL}/configuration/utility-attributes`)
         .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                const attributes = data.attributes;
-                
-                // Load Electricity attributes
-                if (attributes.electricity) {
-                    $('#elecAttrProviderName').val(attributes.electricity.provider_name || '');
-                    $('#elecBillingCycle').val(attributes.electricity.billing_cycle || 'monthly');
-                    $('#elecCustomDays').val(attributes.electricity.custom_cycle_days || '');
-                    $('#elecDueDate').val(attributes.electricity.due_date || '1');
-                    $('#elecCustomDueDay').val(attributes.electricity.custom_due_day || '');
-                    $('#elecAvgUsage').val(attributes.electricity.avg_monthly_usage || '');
-                    
-                    toggleCustomFields('elec', attributes.electricity.billing_cycle, attributes.electricity.due_date);
-                }
-                
-                // Load Gas attributes
-                if (attributes.gas) {
-                    $('#gasAttrProviderName').val(attributes.gas.provider_name || '');
-                    $('#gasBillingCycle').val(attributes.gas.billing_cycle || 'monthly');
-                    $('#gasCustomDays').val(attributes.gas.custom_cycle_days || '');
-                    $('#gasDueDate').val(attributes.gas.due_date || '1');
-                    $('#gasCustomDueDay').val(attributes.gas.custom_due_day || '');
-                    $('#gasAvgUsage').val(attributes.gas.avg_monthly_usage || '');
-                    
-                    toggleCustomFields('gas', attributes.gas.billing_cycle, attributes.gas.due_date);
-                }
-                
-                // Load Water attributes
-                if (attributes.water) {
-                    $('#waterAttrProviderName').val(attributes.water.provider_name || '');
-                    $('#waterBillingCycle').val(attributes.water.billing_cycle || 'quarterly');
-                    $('#waterCustomDays').val(attributes.water.custom_cycle_days || '');
-                    $('#waterDueDate').val(attributes.water.due_date || '1');
-                    $('#waterCustomDueDay').val(attributes.water.custom_due_day || '');
-                    $('#waterAvgUsage').val(attributes.water.avg_monthly_usage || '');
-                    
-                    toggleCustomFields('water', attributes.water.billing_cycle, attributes.water.due_date);
-                }
-                
-                // Update billing schedule preview
-                updateBillingSchedulePreview(attributes);
-                
-            }
-        })
+        .then(applyUtilityAttributes)
         .catch(error => {
             console.error('Failed to load utility attributes:', error);
             showAlert('Failed to load utility attributes configuration', 'warning');
@@ -2,15 +2,21 @@
 """
 Simple HTTP server for frontend development.
 
-Serves the frontend static files on localhost:3000 for development.
+Serves the frontend static files on localhost:3000 for development. Requests are
+handled on their own threads over keep-alive connections, so a page load's assets
+don't queue behind one another; in production serve the directory with nginx or
+Caddy instead.
 """
 
 import http.server
-import socketserver
 import os
 import sys
 from pathlib import Path
 
+# Seconds browsers may reuse app.js and styles.css before revalidating them
+STATIC_MAX_AGE = 300
+STATIC_SUFFIXES = ('.js', '.css')
+
 def main():
     # Change to frontend directory
     frontend_dir = Path(__file__).parent / 'frontend'
@@ -19,14 +25,21 @@ def main():
     PORT = 3000
     
     class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
         def end_headers(self):
+            if self.path.split('?', 1)[0].endswith(STATIC_SUFFIXES):
+                self.send_header('Cache-Control', f'max-age={STATIC_MAX_AGE}')
+            else:
+                self.send_header('Cache-Control', 'no-cache')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type')
             super().end_headers()
     
     try:
-        with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
+        with http.server.ThreadingHTTPServer(("", PORT), MyHTTPRequestHandler) as httpd:
+            httpd.daemon_threads = True
             print(f"🌐 Frontend server starting at http://localhost:{PORT}")
             print(f"📁 Serving files from: {frontend_dir}")
             print(f"🔗 Backend API expected at: http://localhost:5000")